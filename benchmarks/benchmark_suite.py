@@ -0,0 +1,225 @@
+"""Stage-level benchmark suite for the expression pipeline. Measures InputValidator.validate_expression,
+ShuntingYard.convert_to_rpn and RPNEvaluator.evaluate_rpn_expression separately and end-to-end, for
+expressions of different sizes (10 to 10^6 tokens), nesting depths and operator mixes.
+
+The results (seconds per token) are compared to a JSON baseline that is kept in the repository. A run
+fails (exit code 1) if the baseline is missing or any stage has become slower than the allowed threshold,
+unless the run updates the baseline.
+
+Run from the root directory with:
+    python -m benchmarks.benchmark_suite                     # measure and compare to the baseline
+    python -m benchmarks.benchmark_suite --update-baseline   # measure and store the new baseline
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from src.core.input_validator import InputValidator
+from src.core.shunting_yard import ShuntingYard
+from src.core.rpn_evaluator import RPNEvaluator
+from src.core.queue import Queue
+
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+VARIABLES = {"A": 1.5, "B": 0.75}
+
+# Repeating units of each operator mix. Every unit is added to the sum, so the value stays bounded
+MIXES = {
+    "arithmetic": "A * 2 - B / 3 + 1.5",
+    "power": "A ** 2 - B ** 0.5",
+    "functions": "sqrt(A) + sin(30) - cos(B) * min(A, 2) + max(B, 1)",
+    "mixed": "(-A) * sqrt(B + 1) / 2 + max(A ** 2, pi)",
+}
+SIZE_MIX = "mixed"
+DEPTHS = [10, 100, 1000]
+
+
+def count_tokens(expression: str) -> int:
+    return len(InputValidator().validate_expression(expression)[0])
+
+def flat_expression(mix: str, size: int) -> str:
+    """Repeats the unit of an operator mix until the expression has about the given number of tokens.
+
+    Args:
+        mix -- the name of the operator mix
+        size -- the number of tokens wanted
+
+    Returns: The expression as a string
+    """
+    unit = MIXES[mix]
+    repeats = max(1, round(size / (count_tokens(unit) + 1)))
+    return " + ".join([unit] * repeats)
+
+def nested_expression(depth: int) -> str:
+    """Builds an expression whose brackets are nested to the given depth, e.g. '((1 + A) * B + A) * B'.
+
+    Args:
+        depth -- the nesting depth of the brackets
+
+    Returns: The expression as a string
+    """
+    return "(" * depth + "1" + " + A) * B" * depth
+
+def build_cases(max_exponent: int) -> dict:
+    cases = {}
+
+    for exponent in range(1, max_exponent + 1):
+        cases[f"size/{SIZE_MIX}/10^{exponent}"] = flat_expression(SIZE_MIX, 10 ** exponent)
+
+    for depth in DEPTHS:
+        cases[f"depth/{depth}"] = nested_expression(depth)
+
+    for mix in MIXES:
+        cases[f"mix/{mix}/10^3"] = flat_expression(mix, 10 ** 3)
+
+    return cases
+
+def best_time(function, prepare=None, budget: float = 0.2, max_repeats: int = 50) -> float:
+    """Calls the function repeatedly until the time budget is used (at least once) and returns the
+    fastest call. The optional prepare function is called before each call and is not timed. Garbage
+    collection is turned off during the timing (as in timeit) to reduce noise.
+
+    Args:
+        function -- the function to time, called with the return value of prepare (if any)
+        prepare -- a function that creates the input for each call
+        budget -- the total time in seconds to spend on the repeats
+        max_repeats -- the maximum number of repeats
+
+    Returns: The fastest time in seconds
+    """
+    best = float("inf")
+    spent = 0.0
+    repeats = 0
+
+    while repeats < max_repeats and (repeats == 0 or spent < budget):
+        argument = prepare() if prepare else None
+        gc.disable()
+        start = time.perf_counter()
+        function(argument)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        best = min(best, elapsed)
+        spent += elapsed
+        repeats += 1
+
+    return best
+
+def measure(expression: str, budget: float) -> dict:
+    """Measures each stage and the whole pipeline for an expression.
+
+    Args:
+        expression -- the mathematical expression
+        budget -- the time budget per measurement in seconds
+
+    Returns: A dictionary with the time per token (seconds) of each stage and the number of tokens
+    """
+    validator = InputValidator(VARIABLES)
+    sy = ShuntingYard()
+    evaluator = RPNEvaluator()
+
+    tokens = validator.validate_expression(expression)[0]
+    program = sy.convert_to_rpn(tokens).to_tuple()
+
+    def to_queue():
+        queue = Queue()
+        for token in program:
+            queue.enqueue(token)
+        return queue
+
+    def end_to_end(_):
+        validated = validator.validate_expression(expression)[0]
+        evaluator.evaluate_rpn_expression(sy.convert_to_rpn(validated), VARIABLES)
+
+    n = len(tokens)
+    return {
+        "tokens": n,
+        "validate": best_time(lambda _: validator.validate_expression(expression), budget=budget) / n,
+        "convert": best_time(lambda _: sy.convert_to_rpn(tokens), budget=budget) / n,
+        "evaluate": best_time(lambda queue: evaluator.evaluate_rpn_expression(queue, VARIABLES), to_queue,
+                              budget=budget) / n,
+        "end_to_end": best_time(end_to_end, budget=budget) / n,
+    }
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Compares the results to the baseline.
+
+    Args:
+        results -- the measured results by case
+        baseline -- the baseline results by case
+        threshold -- the allowed relative slowdown, e.g. 0.25 for 25 %
+
+    Returns: A list of descriptions of the stages that regressed beyond the threshold
+    """
+    regressions = []
+
+    for case, stages in results.items():
+        if case not in baseline:
+            continue
+        for stage, seconds in stages.items():
+            if stage == "tokens" or stage not in baseline[case]:
+                continue
+            ratio = seconds / baseline[case][stage]
+            if ratio > 1 + threshold:
+                regressions.append(f"{case} {stage}: {ratio:.2f}x the baseline")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage-level benchmark suite with regression tracking")
+    parser.add_argument("--max-exponent", type=int, default=6,
+                        help="largest expression is about 10^n tokens (default 6)")
+    parser.add_argument("--budget", type=float, default=0.2, help="time budget per measurement in seconds")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="path of the JSON baseline")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store the results as the new baseline instead of comparing to it")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown compared to the baseline (default 0.25 = 25 %%)")
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':<24} {'tokens':>8} {'validate':>10} {'convert':>10} {'evaluate':>10} {'end-to-end':>11}"
+          "   (ns per token)")
+
+    for case, expression in build_cases(args.max_exponent).items():
+        stages = measure(expression, args.budget)
+        results[case] = stages
+        print(f"{case:<24} {stages['tokens']:>8} {stages['validate'] * 1e9:>10.1f} {stages['convert'] * 1e9:>10.1f} "
+              f"{stages['evaluate'] * 1e9:>10.1f} {stages['end_to_end'] * 1e9:>11.1f}")
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline found at {args.baseline}. Create one with --update-baseline")
+        sys.exit(1)
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results, baseline["results"], args.threshold)
+
+    if regressions:
+        print(f"\nRegressions compared to the baseline ({baseline['created']}):")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+    print(f"\nNo regressions beyond {args.threshold:.0%} compared to the baseline ({baseline['created']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark comparing the interpreted evaluation of RPN/postfix programs (RPNEvaluator) with the
+evaluation of the same programs as generated Python functions (CodeGenerator). Reports the time per
+evaluation for a set of formulas.
+
+Run from the root directory with:
+    python -m benchmarks.evaluator_benchmark
+"""
+import argparse
+import timeit
+from src.core.expression_compiler import ExpressionCompiler
+
+
+FORMULAS = [
+    "A*2+1",
+    "sqrt(A**2+B**2)",
+    "max(A, B)*sin(C)+min(A, C)/(B+1)",
+    "(A+B)*(A-B)/(C*C+1)+sqrt(A*A+B*B+C*C)-cos(A)*sin(B)",
+]
+
+VARIABLES = {"A": 3.5, "B": 4.25, "C": 30.0}
+
+
+def time_per_call(function, number: int) -> float:
+    """Runs the function the given number of times (best of three) and returns the time per call.
+
+    Args:
+        function -- the function to time
+        number -- how many times the function is called per round
+
+    Returns: The time per call in seconds
+    """
+    return min(timeit.repeat(function, number=number, repeat=3)) / number
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark interpreted and compiled evaluation")
+    parser.add_argument("--number", type=int, default=20000, help="evaluations per round (default 20000)")
+    args = parser.parse_args()
+
+    interpreted = ExpressionCompiler()
+    compiled = ExpressionCompiler(generate_code=True)
+
+    print(f"{'formula':<55} {'interpreted (us)':>17} {'compiled (us)':>14} {'speed-up':>9}")
+
+    for formula in FORMULAS:
+        interpreted_expression = interpreted.compile(formula)
+        compiled_expression = compiled.compile(formula)
+
+        interpreted_time = time_per_call(lambda e=interpreted_expression: e.evaluate(VARIABLES), args.number)
+        compiled_time = time_per_call(lambda e=compiled_expression: e.evaluate(VARIABLES), args.number)
+
+        print(f"{formula:<55} {interpreted_time * 1e6:>17.2f} {compiled_time * 1e6:>14.2f} "
+              f"{interpreted_time / compiled_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
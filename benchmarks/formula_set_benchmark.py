@@ -0,0 +1,62 @@
+"""Benchmark comparing the evaluation of a set of related formulas one at a time (CompiledExpression)
+with the evaluation of the same formulas merged into a single graph (FormulaSet). The formulas are
+built from a pool of common sub-expressions, so many of them share structure. Reports the time per
+evaluation of the whole set and the number of operations calculated.
+
+Run from the root directory with:
+    python -m benchmarks.formula_set_benchmark
+"""
+import argparse
+import random
+import timeit
+from src.core.expression_compiler import ExpressionCompiler
+from src.core.formula_set import FormulaSet
+
+
+SHARED = ["sqrt(A**2+B**2)", "sin(C)", "cos(C)", "(A+B)/2", "max(A, D)", "sqrt(E*E+1)", "max(B-D, D-B)", "sqrt(D+1)"]
+
+VARIABLES = {"A": 3.5, "B": 4.25, "C": 0.3, "D": 7.0, "E": 1.5}
+
+
+def make_formulas(number: int, seed: int = 1) -> list:
+    """Returns formulas that combine two or three of the shared sub-expressions with a number, e.g.
+    'sqrt(A**2+B**2)*sin(C)+3'.
+    """
+    rng = random.Random(seed)
+    formulas = []
+
+    for _ in range(number):
+        terms = rng.sample(SHARED, rng.randint(2, 3))
+        operators = [rng.choice("+-*") for _ in terms]
+        formula = terms[0]
+        for operator, term in zip(operators[1:], terms[1:]):
+            formula += f"{operator}{term}"
+        formulas.append(f"{formula}{operators[0]}{rng.randint(1, 9)}")
+
+    return formulas
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark separate and merged evaluation of formula sets")
+    parser.add_argument("--number", type=int, default=200, help="evaluations per round (default 200)")
+    args = parser.parse_args()
+
+    compiler = ExpressionCompiler()
+
+    print(f"{'formulas':>9} {'tokens':>7} {'nodes':>6} {'separate (us)':>14} {'merged (us)':>12} {'speed-up':>9}")
+
+    for number in (50, 200, 500):
+        formulas = [compiler.compile(formula) for formula in make_formulas(number)]
+        formula_set = FormulaSet([compiled.expression for compiled in formulas], compiler)
+
+        def separate(formulas=formulas):
+            return [compiled.evaluate(VARIABLES) for compiled in formulas]
+
+        separate_time = min(timeit.repeat(separate, number=args.number, repeat=3)) / args.number
+        merged_time = min(timeit.repeat(lambda s=formula_set: s.evaluate(VARIABLES), number=args.number,
+                                        repeat=3)) / args.number
+
+        print(f"{number:>9} {formula_set.tokens:>7} {formula_set.size:>6} {separate_time * 1e6:>14.1f} "
+              f"{merged_time * 1e6:>12.1f} {separate_time / merged_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
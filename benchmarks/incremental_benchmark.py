@@ -0,0 +1,67 @@
+"""Benchmark comparing the full evaluation of a formula (RPNEvaluator) with the incremental evaluation
+(IncrementalEvaluator) on a stream of ticks where only one variable changes per tick. Reports the time
+per tick and the average number of subtrees calculated per tick for formulas of growing size.
+
+Run from the root directory with:
+    python -m benchmarks.incremental_benchmark
+"""
+import argparse
+import random
+import string
+import timeit
+from src.core.expression_compiler import ExpressionCompiler
+
+
+def make_formula(terms: int) -> str:
+    """Returns a formula that adds up a term for each variable A-Z in turn, e.g.
+    'sqrt(A*A+1)*sin(A/2)+sqrt(B*B+2)*sin(B/2)+...'.
+    """
+    variables = string.ascii_uppercase
+    return "+".join(f"sqrt({variables[i % 26]}*{variables[i % 26]}+{i})*sin({variables[i % 26]}/2)"
+                    for i in range(terms))
+
+def make_ticks(number: int, seed: int = 1) -> list:
+    """Returns the variable values of a stream where one random variable changes on each tick."""
+    rng = random.Random(seed)
+    values = {variable: 1.0 for variable in string.ascii_uppercase}
+    ticks = []
+
+    for _ in range(number):
+        values = dict(values)
+        values[rng.choice(string.ascii_uppercase)] = rng.uniform(-10, 10)
+        ticks.append(values)
+
+    return ticks
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full and incremental evaluation")
+    parser.add_argument("--ticks", type=int, default=2000, help="ticks per round (default 2000)")
+    args = parser.parse_args()
+
+    compiler = ExpressionCompiler()
+    ticks = make_ticks(args.ticks)
+
+    print(f"{'terms':>6} {'tokens':>7} {'full (us)':>10} {'incremental (us)':>17} {'subtrees':>9} {'speed-up':>9}")
+
+    for terms in (1, 4, 26, 104, 416):
+        compiled = compiler.compile(make_formula(terms))
+
+        def full(compiled=compiled):
+            for values in ticks:
+                compiled.evaluate(values)
+
+        def incremental(compiled=compiled):
+            evaluator = compiled.incremental()
+            for values in ticks:
+                evaluator.evaluate(values)
+            return evaluator
+
+        full_time = min(timeit.repeat(full, number=1, repeat=3)) / len(ticks)
+        incremental_time = min(timeit.repeat(incremental, number=1, repeat=3)) / len(ticks)
+        evaluator = incremental()
+
+        print(f"{terms:>6} {len(compiled.program):>7} {full_time * 1e6:>10.2f} {incremental_time * 1e6:>17.2f} "
+              f"{evaluator.recalculated / evaluator.evaluations:>9.1f} {full_time / incremental_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark for the Shunting-Yard conversion. Converts generated infix token lists of 10^3-10^6 tokens
+to RPN/postfix and reports the time taken per token, which stays constant when the conversion takes
+linear time.
+
+Run from the root directory with:
+    python -m benchmarks.shunting_yard_benchmark
+"""
+import argparse
+import sys
+import time
+from src.core.shunting_yard import ShuntingYard
+
+
+OPERATORS = ["+", "-", "*", "/", "**"]
+
+
+def generate_tokens(size: int) -> list:
+    """Generates a valid infix token list of approximately the given size. Every tenth operand is
+    wrapped in a function call and every fifth in brackets so that all branches of the algorithm are used.
+
+    Args:
+        size -- the number of tokens to generate
+
+    Returns: A list of validated tokens (str/float)
+    """
+    tokens = [1.0]
+    i = 0
+
+    while len(tokens) < size:
+        tokens.append(OPERATORS[i % len(OPERATORS)])
+        if i % 10 == 0:
+            tokens.extend(["sqrt", "(", float(i), ")"])
+        elif i % 5 == 0:
+            tokens.extend(["(", "A", "+", float(i), ")"])
+        else:
+            tokens.append(float(i))
+        i += 1
+
+    return tokens
+
+def time_conversion(tokens: list, repeats: int) -> float:
+    """Converts the tokens to RPN/postfix the given number of times and returns the best time.
+
+    Args:
+        tokens -- the infix tokens to convert
+        repeats -- how many times the conversion is repeated
+
+    Returns: The fastest conversion time in seconds
+    """
+    sy = ShuntingYard()
+    best = float("inf")
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        sy.convert_to_rpn_program(tokens)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Shunting-Yard conversion")
+    parser.add_argument("--max-exponent", type=int, default=6, help="largest input is 10^n tokens (default 6)")
+    parser.add_argument("--repeats", type=int, default=3, help="repeats per size (default 3)")
+    parser.add_argument("--tolerance", type=float, default=3.0,
+                        help="allowed growth of the time per token from the smallest to the largest input")
+    args = parser.parse_args()
+
+    print(f"{'tokens':>10} {'total (ms)':>12} {'per token (ns)':>16}")
+    per_token_times = []
+
+    for exponent in range(3, args.max_exponent + 1):
+        tokens = generate_tokens(10 ** exponent)
+        seconds = time_conversion(tokens, args.repeats)
+        per_token_times.append(seconds / len(tokens))
+        print(f"{len(tokens):>10} {seconds * 1e3:>12.2f} {per_token_times[-1] * 1e9:>16.1f}")
+
+    growth = per_token_times[-1] / per_token_times[0]
+    print(f"\nGrowth of the time per token: {growth:.2f}x (linear scaling keeps this close to 1)")
+
+    if growth > args.tolerance:
+        print("The conversion does not scale linearly!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
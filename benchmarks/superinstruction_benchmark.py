@@ -0,0 +1,59 @@
+"""Benchmark comparing the token-by-token evaluation of a program (RPNEvaluator.evaluate_program) with the
+evaluation of the same program fused into superinstructions (RPNEvaluator.evaluate_fused), for formulas of
+growing size. Also prints the most frequent opcode sequences of the workload from the OpcodeProfiler.
+
+Run from the root directory with:
+    python -m benchmarks.superinstruction_benchmark
+"""
+import argparse
+import random
+import string
+import timeit
+from src.core.expression_compiler import ExpressionCompiler
+from src.core.superinstructions import OpcodeProfiler
+
+
+def make_formula(terms: int) -> str:
+    """Returns a formula of polynomial-like terms such as 'A*B+C**2-3*D/E', where the variables are
+    picked in turn from A-Z.
+    """
+    variables = string.ascii_uppercase
+    return "+".join(f"{variables[i % 26]}*{variables[(i + 1) % 26]}-{variables[(i + 2) % 26]}**2/{i + 1}"
+                    for i in range(terms))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark token-by-token and fused evaluation")
+    parser.add_argument("--rounds", type=int, default=2000, help="evaluations per round (default 2000)")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    values = [{variable: rng.uniform(1, 10) for variable in string.ascii_uppercase} for _ in range(args.rounds)]
+    profiler = OpcodeProfiler()
+    compiler = ExpressionCompiler(profiler=profiler)
+    evaluator = compiler.evaluator
+
+    print(f"{'terms':>6} {'tokens':>7} {'instructions':>13} {'plain (us)':>11} {'fused (us)':>11} {'speed-up':>9}")
+
+    for terms in (1, 4, 16, 64, 256):
+        compiled = compiler.compile(make_formula(terms))
+        compiled.evaluate(values[0])
+
+        def plain(compiled=compiled):
+            for variables in values:
+                evaluator.evaluate_program(compiled.program, variables)
+
+        def fused(compiled=compiled):
+            for variables in values:
+                evaluator.evaluate_fused(compiled.fused, variables)
+
+        plain_time = min(timeit.repeat(plain, number=1, repeat=3)) / len(values)
+        fused_time = min(timeit.repeat(fused, number=1, repeat=3)) / len(values)
+
+        print(f"{terms:>6} {len(compiled.program):>7} {len(compiled.fused):>13} {plain_time * 1e6:>11.2f} "
+              f"{fused_time * 1e6:>11.2f} {plain_time / fused_time:>8.1f}x")
+
+    print()
+    print(profiler.report(5), end="")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark of adaptive tiering on a workload with a long tail of one-off expressions and a small set of
+hot expressions that are evaluated constantly. Compares interpreting every expression, generating a
+Python function for every expression when it is compiled, and generating the functions only for the
+expressions evaluated more than the hot threshold. The times include the compilation.
+
+Run from the root directory with:
+    python -m benchmarks.tiering_benchmark
+"""
+import argparse
+import random
+import timeit
+from src.core.expression_compiler import ExpressionCompiler
+
+
+def make_workload(one_off: int, hot: int, evaluations: int, seed: int = 1) -> list:
+    """Returns a shuffled list of expressions: one_off distinct expressions evaluated once, and hot
+    expressions evaluated evaluations times each.
+    """
+    rng = random.Random(seed)
+    cold_expressions = [f"sqrt(A**2+{i}*B)*sin(C/{i + 1})-A/{i + 2}" for i in range(one_off)]
+    hot_expressions = [f"(A*{i}+B**2)/(C+{i + 1})+cos(A)*max(B,{i})" for i in range(hot)]
+    workload = cold_expressions + hot_expressions * evaluations
+    rng.shuffle(workload)
+    return workload
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark adaptive tiering")
+    parser.add_argument("--one-off", type=int, default=5000, help="one-off expressions (default 5000)")
+    parser.add_argument("--hot", type=int, default=10, help="hot expressions (default 10)")
+    parser.add_argument("--evaluations", type=int, default=20000,
+                        help="evaluations of each hot expression (default 20000)")
+    args = parser.parse_args()
+
+    workload = make_workload(args.one_off, args.hot, args.evaluations)
+    variables = {"A": 1.5, "B": 2.5, "C": 3.5}
+    modes = [("interpreted", {}), ("generated", {"generate_code": True})]
+    modes += [(f"tiered ({threshold})", {"hot_threshold": threshold}) for threshold in (10, 100, 1000)]
+
+    print(f"{len(workload)} evaluations of {args.one_off + args.hot} expressions")
+    print(f"{'mode':>16} {'total (ms)':>11} {'per evaluation (us)':>20}")
+
+    for name, options in modes:
+        def run(options=options):
+            compiler = ExpressionCompiler(cache_size=args.one_off + args.hot, **options)
+            for expression in workload:
+                compiler.compile(expression).evaluate(variables)
+
+        total = min(timeit.repeat(run, number=1, repeat=3))
+        print(f"{name:>16} {total * 1e3:>11.1f} {total / len(workload) * 1e6:>20.2f}")
+
+if __name__ == "__main__":
+    main()
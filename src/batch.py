@@ -0,0 +1,229 @@
+"""Non-interactive batch mode for the calculator. Reads expressions line by line from a stream (a file or
+stdin), evaluates them and writes each result or error message as a line of JSON to an output stream.
+"""
+import json
+import math
+from collections import deque
+from core.exceptions import InvalidExpressionException
+from core.expression_compiler import ExpressionCompiler
+from core.formula_set import FormulaSet
+from core.instrumentation import Instrumentation
+from core.parallel_evaluator import ParallelEvaluator
+from core.superinstructions import OpcodeProfiler
+
+
+# Number of distinct expressions kept compiled when the same expressions are repeated in the input
+CACHE_SIZE = 1024
+
+# The error of a result that is not a finite number (e.g. '10**308*10'), which cannot be written as JSON
+NOT_FINITE_ERROR = "Maximum data limit exceeded! Please try a smaller calculation."
+
+
+def run_batch(input_stream, output_stream, show_steps: bool = False,
+              instrumentation: Instrumentation | None = None, cache_dir: str | None = None, *,
+              profiler: OpcodeProfiler | None = None, hot_threshold: int | None = None):
+    """Evaluates the expressions in the input stream one line at a time. Empty lines and lines starting
+    with '#' are skipped. An expression that sets a variable (e.g. 'A=1+2') sets it for the following lines.
+    For each expression a JSON object is written on its own line, e.g. {"line": 1, "result": 3} or
+    {"line": 2, "error": "Division with zero undefined!"}.
+
+    Args:
+        input_stream -- an iterable of lines (e.g. an open file or sys.stdin)
+        output_stream -- a writable text stream (e.g. sys.stdout)
+        show_steps -- if True, the validated tokens and the RPN program are added to the output ("tokens", "rpn")
+        instrumentation -- an Instrumentation object that records the pipeline metrics, or None
+        cache_dir -- a directory where the compiled expressions are stored for later runs, or None
+        profiler -- an OpcodeProfiler that counts the opcode sequences of the evaluated programs, or None
+        hot_threshold -- the number of evaluations of an expression after which a Python function is
+            generated for it, or None to evaluate all the expressions with the RPNEvaluator
+
+    Returns: A tuple with the number of expressions evaluated successfully and the number of errors
+    """
+    user_vars = {}
+    compiler = ExpressionCompiler(cache_size=CACHE_SIZE, instrumentation=instrumentation, cache_dir=cache_dir,
+                                  profiler=profiler, hot_threshold=hot_threshold)
+    successes = 0
+    errors = 0
+
+    for line_number, line in enumerate(input_stream, start=1):
+        expression = line.strip()
+
+        if not expression or expression.startswith("#"):
+            continue
+
+        output = {"line": line_number}
+        output.update(evaluate_line(expression, user_vars, compiler, show_steps))
+
+        if "error" in output:
+            errors += 1
+        else:
+            successes += 1
+
+        output_stream.write(json.dumps(output) + "\n")
+
+    return (successes, errors)
+
+def run_parallel_batch(input_stream, output_stream, workers: int | None = None, cache_dir: str | None = None):
+    """Evaluates the expressions in the input stream in parallel processes and writes the results in the
+    same format and order as run_batch(). As the expressions are evaluated independently of each other,
+    they cannot set variables.
+
+    Args:
+        input_stream -- an iterable of lines (e.g. an open file or sys.stdin)
+        output_stream -- a writable text stream (e.g. sys.stdout)
+        workers -- the number of worker processes (None to use one per CPU)
+        cache_dir -- a directory where the compiled expressions are stored for later runs, or None
+
+    Returns: A tuple with the number of expressions evaluated successfully and the number of errors
+    """
+    line_numbers = deque()
+    successes = 0
+    errors = 0
+
+    def read_expressions():
+        for line_number, line in enumerate(input_stream, start=1):
+            expression = line.strip()
+            if expression and not expression.startswith("#"):
+                line_numbers.append(line_number)
+                yield expression
+
+    for result, error in ParallelEvaluator(workers, cache_dir=cache_dir).evaluate(read_expressions()):
+        output = {"line": line_numbers.popleft()}
+        if error is None and not math.isfinite(result):
+            error = NOT_FINITE_ERROR
+
+        if error is None:
+            output["result"] = result
+            successes += 1
+        else:
+            output["error"] = error
+            errors += 1
+
+        output_stream.write(json.dumps(output) + "\n")
+
+    return (successes, errors)
+
+def run_formula_set(formula_stream, input_stream, output_stream, cache_dir: str | None = None):
+    """Evaluates a set of formulas for each set of variable values in the input stream. The formulas are
+    read from the formula stream (one per line, empty lines and lines starting with '#' are skipped) and
+    merged into a FormulaSet, so the sub-expressions they share are calculated once per set of values.
+    Each line of the input stream is a JSON object of variable values, e.g. {"A": 1, "B": 2}, and for each
+    line a JSON object with the results of all the formulas in order is written, e.g.
+    {"line": 1, "results": [3, null], "errors": {"1": "Division with zero undefined!"}}.
+
+    Args:
+        formula_stream -- an iterable of lines containing the formulas
+        input_stream -- an iterable of lines containing the variable values
+        output_stream -- a writable text stream (e.g. sys.stdout)
+        cache_dir -- a directory where the compiled formulas are stored for later runs, or None
+
+    Returns: A tuple with the number of formula results and the number of errors, or error if a formula
+        is not valid
+    """
+    formula_set = _read_formula_set(formula_stream, ExpressionCompiler(cache_size=CACHE_SIZE, cache_dir=cache_dir))
+    successes, errors = 0, 0
+
+    for line_number, line in enumerate(input_stream, start=1):
+        if not line.strip():
+            continue
+
+        output = {"line": line_number}
+        try:
+            variables = json.loads(line)
+        except ValueError:
+            variables = None
+
+        if isinstance(variables, dict):
+            output["results"], messages = _evaluate_formula_set(formula_set, variables)
+            if messages:
+                output["errors"] = messages
+            successes += len(formula_set) - len(messages)
+            errors += len(messages)
+        else:
+            output["error"] = "The line must be a JSON object of variable values!"
+            errors += 1
+
+        output_stream.write(json.dumps(output) + "\n")
+
+    return (successes, errors)
+
+def _evaluate_formula_set(formula_set: FormulaSet, variables: dict) -> tuple:
+    """Evaluates a formula set and reports the results that are not finite numbers as errors."""
+    results, messages = formula_set.evaluate(variables)
+
+    for index, result in enumerate(results):
+        if result is not None and not math.isfinite(result):
+            results[index] = None
+            messages[index] = NOT_FINITE_ERROR
+
+    return results, messages
+
+def _read_formula_set(formula_stream, compiler: ExpressionCompiler) -> FormulaSet:
+    """Reads the formulas of a formula set. An invalid formula is reported with its line number."""
+    formulas = []
+
+    for line_number, line in enumerate(formula_stream, start=1):
+        formula = line.strip()
+        if not formula or formula.startswith("#"):
+            continue
+        try:
+            compiler.compile(formula)
+        except InvalidExpressionException as e:
+            raise InvalidExpressionException(f"Formula on line {line_number}: {e}", e.position) from e
+        formulas.append(formula)
+
+    return FormulaSet(formulas, compiler)
+
+def evaluate_line(expression: str, user_vars: dict, compiler: ExpressionCompiler, show_steps: bool = False) -> dict:
+    """Evaluates a single expression and sets the variable if the expression defines one.
+
+    Args:
+        expression -- the mathematical expression to evaluate
+        user_vars -- the variables set so far, updated if the expression sets a variable
+        compiler -- ExpressionCompiler object used to compile (and cache) the expression
+        show_steps -- if True, the validated tokens and the RPN are included in the output
+
+    Returns: A dictionary with the result (and the variable set) or the error message. A result that is
+        not a finite number is reported as an error
+    """
+    output = {}
+
+    try:
+        result, var_to_set = _evaluate_expression(expression, user_vars, compiler, output if show_steps else None)
+    except InvalidExpressionException as e:
+        output["error"] = str(e)
+        return output
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        # An unexpected error only fails the expression that caused it, not the whole batch
+        output["error"] = f"Unexpected error: {e}"
+        return output
+
+    if not math.isfinite(result):
+        output["error"] = NOT_FINITE_ERROR
+        return output
+
+    output["result"] = result
+    if var_to_set:
+        output["variable"] = var_to_set
+        user_vars[var_to_set] = result
+
+    return output
+
+def _evaluate_expression(expression: str, user_vars: dict, compiler: ExpressionCompiler, steps: dict | None) -> tuple:
+    """Evaluates an expression and returns the result and the variable to set (or None). If steps is a
+    dictionary, the validated tokens and the RPN program of the compiled expression are added to it.
+    """
+    compiled = compiler.compile(expression)
+
+    if steps is not None:
+        # The compiled expression does not keep the validated tokens, so they are only needed for the steps
+        validated_tokens, _ = compiler.validator.validate_expression(expression)
+        steps.update({"tokens": _json_tokens(validated_tokens), "rpn": _json_tokens(compiled.program)})
+
+    return compiled.evaluate(user_vars), compiled.var_to_set
+
+def _json_tokens(tokens) -> list:
+    """Returns the tokens as a list that can be written as JSON. A number that is not finite (e.g. a huge
+    integer in the expression) is given as a string, e.g. "inf", instead of being written as Infinity.
+    """
+    return [str(token) if isinstance(token, float) and not math.isfinite(token) else token for token in tokens]
@@ -0,0 +1,171 @@
+"""Micro-batching of requests for the evaluation server. Requests for the same expression that arrive within
+a short time window are grouped and evaluated together with a single vectorised pass over the columns of
+their variable values, and the results are then returned to each request.
+"""
+import asyncio
+from batch import evaluate_line
+from core.exceptions import InvalidExpressionException
+from core.expression_compiler import ExpressionCompiler, CompiledExpression
+from core.operations import np
+
+
+def evaluate_group(expression: str, variable_sets: list, compiler: ExpressionCompiler) -> list:
+    """Evaluates the same expression with several sets of variable values. The expression is compiled
+    once and evaluated for all the sets with RPNEvaluator.evaluate_rpn_batch(). The rows that fail in
+    the batch evaluation, that do not define all the variables or whose result is not finite are evaluated
+    again one at a time, so the error messages are the same as with evaluate_line(). Large results may
+    differ from evaluate_line() after about 15 significant digits, as the NumPy functions are not always
+    rounded the same way as the math module and the ** operator.
+
+    Args:
+        expression -- the mathematical expression to evaluate
+        variable_sets -- a list of dictionaries containing the values of the variables for each request
+        compiler -- ExpressionCompiler object used to compile (and cache) the expression
+
+    Returns: A list with a dictionary for each set of variables as returned by evaluate_line()
+    """
+    if np is None or len(variable_sets) < 2:
+        return [evaluate_line(expression, dict(variables), compiler) for variables in variable_sets]
+
+    try:
+        compiled = compiler.compile(expression)
+    except InvalidExpressionException as e:
+        return [{"error": str(e)} for _ in variable_sets]
+
+    try:
+        outputs = _evaluate_rows(compiled, variable_sets)
+    except Exception:  # pylint: disable=broad-exception-caught
+        # The rows are evaluated one at a time instead, so an unexpected error only fails the rows causing it
+        outputs = [None] * len(variable_sets)
+
+    for index, output in enumerate(outputs):
+        if output is None:
+            outputs[index] = evaluate_line(expression, dict(variable_sets[index]), compiler)
+
+    return outputs
+
+def _evaluate_rows(compiled: CompiledExpression, variable_sets: list) -> list:
+    """Evaluates a compiled expression for the sets of variables with a single batch evaluation.
+
+    Returns: A list with the output for each set of variables, or None for the sets that must be evaluated
+        one at a time (a variable is missing, the evaluation failed or the result is not finite)
+    """
+    names = compiled.variables_used
+    complete = [index for index, variables in enumerate(variable_sets) if variables.keys() >= names]
+    outputs = [None] * len(variable_sets)
+
+    try:
+        columns = {name: np.array([variable_sets[index][name] for index in complete], dtype=float)
+                   for name in names}
+    except (OverflowError, TypeError, ValueError):
+        # A value that is not a number or an integer too large for a float is only evaluated one row at a time
+        return outputs
+
+    if not complete:
+        return outputs
+
+    results, errors = compiled.evaluate_batch(columns, rounded=False)
+    # An expression without variables gives a single result for all the rows. The scalar evaluation
+    # raises some errors for infinite operands that only give NaN in NumPy, so the rows whose result
+    # is not finite are evaluated again as well
+    results = np.broadcast_to(results, (len(complete),))
+    failed = np.broadcast_to(errors, (len(complete),)) | ~np.isfinite(results)
+
+    for index, result, row_failed in zip(complete, results.tolist(), failed.tolist()):
+        if row_failed:
+            continue
+        # Rounded the same way as in RPNEvaluator.evaluate_program()
+        output = {"result": int(result) if result.is_integer() else round(result, 10)}
+        if compiled.var_to_set:
+            output["variable"] = compiled.var_to_set
+        outputs[index] = output
+
+    return outputs
+
+
+class RequestCoalescer:
+    """Groups the requests for the same expression that arrive within a time window. The first request for
+    an expression opens a group, and the group is evaluated when the window has passed or when it has
+    max_batch_size requests, whichever comes first. Each request waits at most about one window longer
+    than it would without grouping.
+
+    Attributes:
+        group_evaluator (function): A coroutine function that takes the expression and a list of variable
+            dictionaries and returns a list of outputs in the same order
+        window (float): The time window in seconds
+        max_batch_size (int): The maximum number of requests in a group
+        requests (int): The number of requests evaluated
+        batches (int): The number of groups evaluated
+
+    Methods:
+        evaluate(expression, variables): Evaluates an expression as part of a group
+    """
+    def __init__(self, group_evaluator, window: float = 0.001, max_batch_size: int = 1024):
+        if window < 0:
+            raise ValueError("The time window cannot be negative")
+        if max_batch_size < 1:
+            raise ValueError("The maximum batch size must be at least one")
+
+        self.group_evaluator = group_evaluator
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.requests = 0
+        self.batches = 0
+        # The open groups by expression: (timer, list of (variables, future))
+        self._groups = {}
+        self._tasks = set()
+
+    async def evaluate(self, expression: str, variables: dict) -> dict:
+        """Adds the request to the open group of the expression (or opens a new group) and waits for the
+        group to be evaluated.
+
+        Args:
+            expression -- the mathematical expression to evaluate
+            variables -- the values of the variables (copied, not modified)
+
+        Returns: The output of the request as returned by the group evaluator
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        if expression not in self._groups:
+            self._groups[expression] = (loop.call_later(self.window, self._flush, expression), [])
+
+        requests = self._groups[expression][1]
+        requests.append((dict(variables), future))
+
+        if len(requests) >= self.max_batch_size:
+            self._flush(expression)
+
+        return await future
+
+    def _flush(self, expression: str):
+        timer, requests = self._groups.pop(expression)
+        timer.cancel()
+
+        task = asyncio.ensure_future(self._evaluate(expression, requests))
+        # A reference to the task is kept until it is done so that it is not garbage collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _evaluate(self, expression: str, requests: list):
+        self.requests += len(requests)
+        self.batches += 1
+        await self._evaluate_requests(expression, requests)
+
+    async def _evaluate_requests(self, expression: str, requests: list):
+        """Evaluates a group of requests. If the group evaluation fails, the requests are evaluated again
+        one at a time, so that the error is only raised for the requests that cause it.
+        """
+        try:
+            outputs = await self.group_evaluator(expression, [variables for variables, _ in requests])
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            if len(requests) > 1:
+                await asyncio.gather(*(self._evaluate_requests(expression, [request]) for request in requests))
+            elif not requests[0][1].done():
+                requests[0][1].set_exception(e)
+            return
+
+        for (_, future), output in zip(requests, outputs):
+            if not future.done():
+                future.set_result(output)
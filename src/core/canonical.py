@@ -0,0 +1,98 @@
+"""The canonical form of RPN/postfix programs. Expressions that differ only in whitespace, redundant
+brackets or the order of the operands of commutative operations (e.g. 'A+B', '(B) + A') have the same
+canonical form and the same structural hash, so caches and deduplication can key on the meaning of an
+expression instead of its text.
+"""
+import hashlib
+import struct
+from array import array
+from .program import Program, CONST, FIRST_BINARY, LOAD_VAR, symbol_of
+from .operations import OPERATIONS
+
+
+def canonicalise(program: Program | tuple) -> Program:
+    """Returns the canonical form of a program, in which the operands of every commutative operation
+    (see Operation.commutative) are in the order of their structural hashes. Swapping the operands of
+    + and * never changes the result. For min and max the result only differs if an operand is not a
+    number (NaN), and for all of them only the error raised first may differ if both operands fail.
+
+    Args:
+        program -- a Program or tuple that forms an RPN/postfix mathematical expression
+
+    Returns: The canonical Program
+    """
+    nodes, _ = _build_tree(program)
+    opcodes = []
+    constants = []
+    # Depth-first traversal that emits each node after its operands, without recursion
+    to_visit = [(len(nodes) - 1, False)]
+
+    while to_visit:
+        node, operands_visited = to_visit.pop()
+        opcode, value, operands = nodes[node]
+
+        if operands_visited or not operands:
+            opcodes.append(opcode)
+            if opcode == CONST:
+                constants.append(value)
+            continue
+
+        to_visit.append((node, True))
+        to_visit.extend((operand, False) for operand in reversed(operands))
+
+    return Program(array("B", opcodes), array("d", constants))
+
+def canonical_hash(program: Program | tuple) -> str:
+    """Returns the structural hash of the canonical form of a program as a hexadecimal string. The hash
+    depends on the symbols of the operations instead of their opcodes, so it is the same in every
+    process regardless of the order in which the functions were registered.
+
+    Args:
+        program -- a Program or tuple that forms an RPN/postfix mathematical expression
+
+    Returns: The SHA-256 hash of the canonical program
+    """
+    _, digests = _build_tree(program)
+    return digests[-1].hex()
+
+def _build_tree(program: Program | tuple) -> tuple:  # pylint: disable=too-many-statements
+    """Builds the tree of a program with the operands of the commutative operations in canonical order.
+    The hash of each node is calculated from the node and the hashes of its operands (like a Merkle
+    tree), so two subtrees have the same hash if they have the same canonical form.
+
+    Returns: A tuple containing the list of the nodes as (opcode, number or None, operand nodes) in
+        postfix order and the list of the hashes of the nodes
+    """
+    if not isinstance(program, Program):
+        program = Program.from_tokens(program)
+
+    constants = iter(program.constants)
+    nodes = []
+    digests = []
+    # The evaluation stack holds nodes instead of values
+    stack = []
+
+    for opcode in program.opcodes:
+        value = None
+        operands = ()
+
+        if opcode == CONST:
+            value = next(constants)
+            data = b"c" + struct.pack("<d", value)
+        elif opcode >= LOAD_VAR:
+            data = b"v" + symbol_of(opcode).encode()
+        else:
+            if opcode >= FIRST_BINARY:
+                last = stack.pop()
+                operands = (stack.pop(), last)
+                if OPERATIONS.by_opcode[opcode].commutative and digests[last] < digests[operands[0]]:
+                    operands = (last, operands[0])
+            else:
+                operands = (stack.pop(),)
+            data = b"o" + symbol_of(opcode).encode() + b"\0" + b"".join(digests[operand] for operand in operands)
+
+        stack.append(len(nodes))
+        nodes.append((opcode, value, operands))
+        digests.append(hashlib.sha256(data).digest())
+
+    return nodes, digests
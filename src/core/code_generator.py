@@ -0,0 +1,162 @@
+"""Generates a native Python function from an RPN/postfix program. The function evaluates the whole
+expression with a single call, without an evaluation stack or any dispatch on the tokens.
+"""
+import math
+import string
+from .exceptions import InvalidExpressionException
+from .operations import OPERATIONS
+
+
+class CodeGenerator:
+    """The class translates an RPN/postfix program into the source code of a Python function and compiles
+    it with the built-in compile(). The program is translated by simulating the evaluation stack at
+    generation time: each operation is written as an assignment to a local variable named after its
+    position in the stack (s0, s1, ...), so the generated code is straight-line and does not nest.
+
+    The generated function takes a dictionary of variable values and returns the same results and raises
+    the same errors as RPNEvaluator.evaluate_rpn_program().
+
+    The source of each operation is its template in the operation registry (e.g. '{0} + {1}'), or a call
+    of its implementation if it has no template.
+
+    Attributes:
+        one_operand_templates (dict): Python source templates for the one operand operations
+        two_operand_templates (dict): Python source templates for the two operand operations
+        implementations (dict): The implementations called by the generated code by their name in the code
+
+    Methods:
+        generate(program): Returns a Python function that evaluates the program
+        generate_source(program): Returns the source code of the function
+    """
+    def __init__(self):
+        self.one_operand_templates = {}
+        self.two_operand_templates = {}
+        self.implementations = {}
+
+        for operation in OPERATIONS:
+            templates = self.one_operand_templates if operation.arity == 1 else self.two_operand_templates
+            template = operation.template
+
+            if template is None:
+                # The checked implementation raises the errors specific to the operation
+                name = f"_op{operation.opcode}"
+                self.implementations[name] = operation.checked
+                template = f"{name}({{0}})" if operation.arity == 1 else f"{name}({{0}}, {{1}})"
+
+            templates[operation.symbol] = template
+
+    def generate(self, program: tuple):
+        """Generates and compiles a Python function that evaluates the RPN/postfix program.
+
+        Args:
+            program -- tokens that form an RPN/postfix mathematical expression
+
+        Returns: A function that takes a dictionary of variable values (or None) and returns the end result
+        """
+        source = self.generate_source(program)
+        namespace = dict(self.implementations, _InvalidExpressionException=InvalidExpressionException,
+                         _variable_value=_variable_value)
+
+        exec(compile(source, "<compiled expression>", "exec"), namespace)  # pylint: disable=exec-used
+        return namespace["_compiled_expression"]
+
+    def generate_source(self, program: tuple) -> str:  # pylint: disable=too-many-statements
+        """Translates the RPN/postfix program into the source code of a Python function. Errors in the
+        program itself (e.g. not enough operands) are raised already when the source is generated.
+
+        Args:
+            program -- tokens that form an RPN/postfix mathematical expression
+
+        Returns: The source code of a function named _compiled_expression
+        """
+        if not program:
+            raise InvalidExpressionException("No tokens to evaluate!")
+
+        operand_stack = []
+        loaded = []
+        body = []
+
+        for token in program:
+            if isinstance(token, float):
+                operand_stack.append(self._literal(token))
+
+            elif token in self.one_operand_templates:
+                if len(operand_stack) < 1:
+                    raise InvalidExpressionException("Not enough operands, one required")
+
+                target = f"s{len(operand_stack) - 1}"
+                body.append(f"{target} = {self.one_operand_templates[token].format(operand_stack.pop())}")
+                operand_stack.append(target)
+
+            elif token in self.two_operand_templates:
+                if len(operand_stack) < 2:
+                    raise InvalidExpressionException("Not enough operands, two required")
+
+                operand2 = operand_stack.pop()
+                operand1 = operand_stack.pop()
+                target = f"s{len(operand_stack)}"
+                body.append(f"{target} = {self.two_operand_templates[token].format(operand1, operand2)}")
+                operand_stack.append(target)
+
+            elif isinstance(token, str) and len(token) == 1 and token in string.ascii_uppercase:
+                # A variable is loaded where it is first used, so an error before it in postfix order is
+                # raised first as in the RPNEvaluator
+                if token not in loaded:
+                    loaded.append(token)
+                    body.append(f"{token} = _variable_value(variables, {token!r})")
+                operand_stack.append(token)
+
+            else:
+                raise InvalidExpressionException(f"Unrecognised token: {token}")
+
+        if len(operand_stack) != 1:
+            raise InvalidExpressionException("Too many items left in stack! Did you perhaps forget an operator?")
+
+        body.append(f"result = {operand_stack[0]}")
+
+        return _FUNCTION_TEMPLATE.format(body="\n        ".join(body))
+
+    def _literal(self, number: float) -> str:
+        """Returns the Python source for a number.
+
+        Args:
+            number -- a constant from the program
+
+        Returns: The number as a literal, or as an expression for infinity and NaN
+        """
+        if not math.isfinite(number):
+            return f"float({str(number)!r})"
+        # Negative numbers (including -0.0) are enclosed in brackets, e.g. (-2.0)**2 is not -(2.0**2)
+        return f"({number!r})" if math.copysign(1.0, number) < 0 else repr(number)
+
+
+def _variable_value(variables: dict, variable: str) -> float:
+    """Looks up the value of a variable in the generated code. An undefined variable raises a KeyError,
+    which the generated function reports as in the RPNEvaluator.
+    """
+    try:
+        return float(variables[variable])
+    except (TypeError, ValueError) as e:
+        raise InvalidExpressionException(f"The value of the variable {variable} is not a number!") from e
+
+
+_FUNCTION_TEMPLATE = """
+def _compiled_expression(variables=None):
+    variables = variables or {{}}
+    try:
+        {body}
+    except KeyError as e:
+        raise _InvalidExpressionException(f"The variable {{e.args[0]}} has not been defined!") from None
+    except OverflowError as e:
+        raise _InvalidExpressionException("Maximum data limit exceeded! Please try a smaller calculation.") from e
+    except ZeroDivisionError as e:
+        raise _InvalidExpressionException("Division with zero undefined!") from e
+    except TypeError as e:
+        raise _InvalidExpressionException("Complex numbers are not supported") from e
+
+    if isinstance(result, complex):
+        raise _InvalidExpressionException("Complex numbers are not supported")
+    if result.is_integer():
+        return int(result)
+    return round(result, 10)
+"""
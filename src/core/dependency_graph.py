@@ -0,0 +1,179 @@
+"""Variables defined as formulas, like the cells of a spreadsheet. A variable defined as 'B=A*2' keeps its
+formula, and when A changes, B and the variables that depend on B are recomputed.
+"""
+from collections import defaultdict
+from .exceptions import InvalidExpressionException
+from .expression_compiler import ExpressionCompiler
+
+
+class DependencyGraph:
+    """The class stores the formulas of the variables A-Z and the dependencies between them. When a
+    variable is defined, only the variables downstream of it are recomputed, each once and in topological
+    order (every variable after the variables its formula uses). A variable whose inputs did not change
+    value is not recomputed, so a change stops spreading as soon as the values stay the same. Formulas that
+    would make a variable depend on itself are rejected.
+
+    A downstream variable whose formula can no longer be evaluated (e.g. 'B=1/A' after 'A=0') loses its
+    value and keeps its error message until it can be evaluated again.
+
+    Attributes:
+        compiler (ExpressionCompiler): Compiles the formulas
+        formulas (dict): The compiled formulas by variable
+        values (dict): The current values by variable. The dictionary is updated in place, so it can be
+            shared with e.g. an InputValidator
+        errors (dict): The error messages of the variables whose formula could not be evaluated
+        dependents (dict): The variables whose formula uses the variable, by variable
+
+    Methods:
+        define(variable, formula): Sets the formula of a variable and recomputes the variables that depend on it
+        remove(variable): Removes a variable and recomputes the variables that depend on it
+        formula_of(variable): Returns the formula of a variable as a string
+    """
+    def __init__(self, values: dict | None = None, compiler: ExpressionCompiler | None = None):
+        self.compiler = compiler or ExpressionCompiler(cache_size=1024)
+        self.formulas = {}
+        self.values = values if values is not None else {}
+        self.errors = {}
+        self.dependents = defaultdict(set)
+
+    def __contains__(self, variable: str):
+        return variable in self.formulas
+
+    def formula_of(self, variable: str) -> str | None:
+        compiled = self.formulas.get(variable)
+        return compiled.expression if compiled is not None else None
+
+    def define(self, variable: str, formula: str) -> list:
+        """Sets (or replaces) the formula of a variable, evaluates it and recomputes the variables that
+        depend on the variable. If the formula cannot be compiled or evaluated, or it would create a
+        circular reference, nothing is changed.
+
+        Args:
+            variable -- a capital letter A-Z
+            formula -- the mathematical expression of the variable, e.g. 'A*2' (without 'B=')
+
+        Returns: A list of the downstream variables that were recomputed, in the order they were
+            recomputed, or error if the formula is not valid
+        """
+        compiled = self.compiler.compile(formula)
+        if compiled.var_to_set is not None:
+            raise InvalidExpressionException("A formula cannot set another variable!")
+
+        self._check_for_cycle(variable, compiled.variables_used)
+        failed = sorted(compiled.variables_used & self.errors.keys())
+        if failed:
+            raise InvalidExpressionException(f"The variable {failed[0]} cannot be evaluated: {self.errors[failed[0]]}")
+        value = compiled.evaluate(self.values)
+
+        previous = self.formulas.get(variable)
+        if previous is not None:
+            for dependency in previous.variables_used:
+                self.dependents[dependency].discard(variable)
+        for dependency in compiled.variables_used:
+            self.dependents[dependency].add(variable)
+
+        self.formulas[variable] = compiled
+        self.errors.pop(variable, None)
+        changed = self.values.get(variable) != value or variable not in self.values
+        self.values[variable] = value
+
+        return self._recompute_dependents(variable) if changed else []
+
+    def remove(self, variable: str) -> list:
+        """Removes the formula and the value of a variable. The variables that depend on it can no longer
+        be evaluated and get an error message.
+
+        Returns: A list of the downstream variables that were recomputed
+        """
+        compiled = self.formulas.pop(variable)
+        for dependency in compiled.variables_used:
+            self.dependents[dependency].discard(variable)
+
+        self.values.pop(variable, None)
+        self.errors.pop(variable, None)
+        return self._recompute_dependents(variable)
+
+    def _check_for_cycle(self, variable: str, dependencies: frozenset):
+        """Searches the formulas upstream of the new dependencies of a variable for the variable itself.
+
+        Args:
+            variable -- the variable being defined
+            dependencies -- the variables used by the new formula of the variable
+
+        Returns: Nothing, or an InvalidExpressionException with the circular chain (e.g. 'A -> B -> A')
+        """
+        # Each variable to visit is stored with the chain of references that leads to it
+        to_visit = [(dependency, [variable, dependency]) for dependency in sorted(dependencies)]
+        visited = set()
+
+        while to_visit:
+            current, chain = to_visit.pop()
+            if current == variable:
+                raise InvalidExpressionException(f"Circular reference: {' -> '.join(chain)}")
+            if current in visited or current not in self.formulas:
+                continue
+            visited.add(current)
+
+            for dependency in sorted(self.formulas[current].variables_used):
+                to_visit.append((dependency, chain + [dependency]))
+
+    def _downstream(self, variable: str) -> set:
+        downstream = set()
+        to_visit = list(self.dependents[variable])
+
+        while to_visit:
+            current = to_visit.pop()
+            if current not in downstream:
+                downstream.add(current)
+                to_visit.extend(self.dependents[current])
+
+        return downstream
+
+    def _recompute_dependents(self, variable: str) -> list:
+        """Recomputes the variables downstream of a changed variable in topological order (Kahn's
+        algorithm on the downstream variables). A variable is evaluated only if a variable its formula
+        uses has changed.
+
+        Args:
+            variable -- the variable whose value (or error) changed
+
+        Returns: A list of the variables that were recomputed
+        """
+        downstream = self._downstream(variable)
+        # The number of dependencies of each downstream variable that are also downstream, i.e. that must
+        # be recomputed before it
+        waiting = {current: len(self.formulas[current].variables_used & downstream) for current in downstream}
+        ready = sorted(current for current, count in waiting.items() if count == 0)
+        changed = {variable}
+        recomputed = []
+
+        while ready:
+            current = ready.pop()
+
+            if self.formulas[current].variables_used & changed:
+                recomputed.append(current)
+                if self._evaluate(current):
+                    changed.add(current)
+
+            for dependent in self.dependents[current]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+
+        return recomputed
+
+    def _evaluate(self, variable: str) -> bool:
+        """Evaluates the formula of a variable with the current values.
+
+        Returns: True if the value (or the error) of the variable changed
+        """
+        previous = (self.values.get(variable), self.errors.get(variable))
+
+        try:
+            self.values[variable] = self.formulas[variable].evaluate(self.values)
+            self.errors.pop(variable, None)
+        except InvalidExpressionException as e:
+            self.values.pop(variable, None)
+            self.errors[variable] = str(e)
+
+        return (self.values.get(variable), self.errors.get(variable)) != previous
@@ -0,0 +1,89 @@
+"""An on-disk cache of compiled expressions. Each compiled expression is stored in its own file in the cache
+directory, named after the SHA-256 hash of the expression and the compiler settings, so that short-lived
+processes can load the programs compiled by earlier processes instead of validating and converting the
+expressions again.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from .program import Program
+from .serialisation import serialise, deserialise
+from .exceptions import InvalidExpressionException
+
+
+class DiskCache:
+    """A directory of serialised compiled expressions keyed by the hash of the expression and the variant of
+    the compiler (e.g. whether the constants are folded), so a program compiled with other settings is not
+    loaded. An entry that cannot be loaded (e.g. it is corrupted or was written with a different format
+    version) is treated as missing and is replaced when the expression is stored again. Entries are written
+    to a temporary file first and then renamed, so several processes can share the same directory.
+
+    Attributes:
+        directory (Path): The cache directory
+        variant (str): The settings of the compiler that compiles the programs, part of the key of each entry
+        hits (int): The number of lookups that loaded the expression from the cache
+        misses (int): The number of lookups that did not find a valid entry for the expression
+
+    Methods:
+        get(expression): Returns the Program and the variable to set of the expression or None
+        put(expression, program, var_to_set): Stores the compiled expression
+        clear: Removes all the entries from the cache directory
+    """
+    SUFFIX = ".rpn"
+
+    def __init__(self, directory: str | Path, variant: str = ""):
+        self.directory = Path(directory)
+        self.variant = variant
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return sum(1 for _ in self.directory.glob(f"*{self.SUFFIX}"))
+
+    def path(self, expression: str) -> str:
+        key = f"{self.variant}\n{expression}"
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + self.SUFFIX)
+
+    def get(self, expression: str) -> tuple | None:
+        """Loads a compiled expression from the cache.
+
+        Args:
+            expression -- the mathematical expression
+
+        Returns: A tuple containing the Program and the variable to set (or None), or None if the
+            expression is not in the cache
+        """
+        try:
+            with open(self.path(expression), "rb") as file:
+                stored_expression, program, var_to_set = deserialise(file.read())
+        except (OSError, ValueError, InvalidExpressionException):
+            self.misses += 1
+            return None
+
+        # The hash of another expression is the same only if the file has been tampered with
+        if stored_expression != expression:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return (program, var_to_set)
+
+    def put(self, expression: str, program: Program, var_to_set: str | None = None):
+        data = serialise(expression, program, var_to_set)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary_path, self.path(expression))
+        except OSError:
+            Path(temporary_path).unlink(missing_ok=True)
+            raise
+
+    def clear(self):
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            path.unlink(missing_ok=True)
+        self.hits = 0
+        self.misses = 0
@@ -4,4 +4,9 @@ given by the user is not valid
 
 
 class InvalidExpressionException(Exception):
-    pass
+    """Attrs:
+    position -- The index of the invalid part in the user's expression or None if it is not known
+    """
+    def __init__(self, message: str = "", position: int | None = None):
+        super().__init__(message)
+        self.position = position
@@ -0,0 +1,259 @@
+"""Compiles a mathematical expression once into a reusable object that holds the expression as an
+immutable RPN/postfix program. The compiled expression can be evaluated any number of times with
+different variable values without validating and converting the expression again.
+"""
+from .input_validator import InputValidator
+from .shunting_yard import ShuntingYard
+from .rpn_evaluator import RPNEvaluator
+from .rpn_optimiser import RPNOptimiser
+from .code_generator import CodeGenerator
+from .parse_cache import ParseCache
+from .program import Program
+from .disk_cache import DiskCache
+from .instrumentation import Instrumentation
+from .incremental_evaluator import IncrementalEvaluator
+from .canonical import canonical_hash
+from .result_cache import ResultCache
+from .superinstructions import FusedProgram, OpcodeProfiler
+
+
+class CompiledExpression:  # pylint: disable=too-many-instance-attributes
+    """A mathematical expression that has been validated and converted to RPN/postfix. Variables A-Z
+    are kept in the program as they are and their values are given when the expression is evaluated.
+    The program is analysed when it is created, so an error in the structure of the program (e.g. not
+    enough operands) is raised already then and not on each evaluation.
+
+    With a hot threshold, the expression is evaluated with the RPNEvaluator until it has been evaluated
+    hot_threshold times, and then a Python function is generated for it, so an expression that is
+    evaluated only a few times does not pay for the code generation.
+
+    Attributes:
+        expression (str): The original mathematical expression
+        program (Program): The expression in RPN/postfix as opcodes and a constant pool
+        var_to_set (str): The variable the user wants to set (e.g. "A" in "A=1+2") or None if none
+        variables_used (frozenset): The variables A-Z the program needs for evaluation
+        stack_depth (int): The maximum depth of the evaluation stack, found when the program is created
+        function (function): A generated Python function that evaluates the program, or None if the
+            program is evaluated with the RPNEvaluator
+        fused (FusedProgram): The program with superinstructions evaluated by the RPNEvaluator, or None if
+            the program is evaluated token by token (or with the generated function)
+        profiler (OpcodeProfiler): Records the evaluations of the program, or None if not used
+        hot_threshold (int): The number of evaluations with the RPNEvaluator after which the function is
+            generated, or None if the function is not generated on demand
+        evaluations (int): The number of evaluations with the RPNEvaluator
+        instrumentation (Instrumentation): Records the evaluation times and errors, or None if not used
+
+    Methods:
+        evaluate(variables): Evaluates the program with the given variable values
+        evaluate_batch(variables): Evaluates the program for columns (NumPy arrays) of variable values
+        incremental: Returns an IncrementalEvaluator for evaluating the program on a stream of variable values
+        canonical_hash: Returns the structural hash of the canonical form of the program
+    """
+    def __init__(self, expression: str, program: Program | tuple, var_to_set: str | None, evaluator: RPNEvaluator,  # pylint: disable=too-many-arguments
+                 function=None, *, instrumentation: Instrumentation | None = None,
+                 fused: FusedProgram | None = None, profiler: OpcodeProfiler | None = None,
+                 code_generator: CodeGenerator | None = None, hot_threshold: int | None = None):
+        self.expression = expression
+        self.program = program if isinstance(program, Program) else Program.from_tokens(program)
+        self.var_to_set = var_to_set
+        self.variables_used = self.program.variables()
+        self.stack_depth = self.program.stack_depth
+        self.function = function
+        self.fused = fused
+        self.instrumentation = instrumentation
+        self.profiler = profiler
+        self.hot_threshold = hot_threshold
+        self.evaluations = 0
+        self._evaluator = evaluator
+        self._code_generator = code_generator
+        self._canonical_hash = None
+
+    def __repr__(self):
+        return f"CompiledExpression({self.expression!r}, {list(self.program)!r})"
+
+    def evaluate(self, variables: dict | None = None):
+        """Evaluates the compiled RPN/postfix program. The program itself is not modified.
+
+        Args:
+            variables -- a dictionary containing the values of the variables used in the expression
+
+        Returns: The end result of the calculation or error
+        """
+        if self.profiler is not None:
+            self.profiler.record(self.program)
+        if self.instrumentation is not None:
+            self.instrumentation.record_tokens("evaluate", len(self.program))
+            return self.instrumentation.measure("evaluate", self._evaluate, variables)
+        return self._evaluate(variables)
+
+    def _evaluate(self, variables: dict | None):
+        if self.function is None and self.hot_threshold is not None:
+            if self.evaluations >= self.hot_threshold:
+                self._promote()
+            else:
+                self.evaluations += 1
+
+        if self.function is None:
+            if self.fused is not None:
+                return self._evaluator.evaluate_fused(self.fused, variables)
+            return self._evaluator.evaluate_program(self.program, variables)
+        # The results of the generated function are cached in the same result cache as the interpreted ones
+        if self._evaluator.result_cache is not None:
+            return self._evaluator.result_cache.evaluate(self.program, variables, self._call_function)
+        return self.function(variables)
+
+    def _promote(self):
+        """Generates the function of a program that has been evaluated often enough with the RPNEvaluator,
+        so the following evaluations call the function instead. The function is kept in this object, so it
+        is cached together with the parse.
+        """
+        self.function = (self._code_generator or CodeGenerator()).generate(self.program)
+        self.fused = None
+
+    def _call_function(self, _program: Program, variables: dict | None):
+        return self.function(variables)
+
+    def evaluate_batch(self, variables: dict | None = None, rounded: bool = True) -> tuple:
+        """Evaluates the compiled RPN/postfix program for whole columns of variable values at once.
+
+        Args:
+            variables -- a dictionary containing an array of values for each variable used in the expression
+            rounded -- if False, the results are not rounded to 10 decimals
+
+        Returns: A tuple containing an array of results and a boolean mask of the rows that failed
+        """
+        return self._evaluator.evaluate_rpn_batch(self.program.tokens(), variables, rounded)
+
+    def incremental(self) -> IncrementalEvaluator:
+        """Returns a new IncrementalEvaluator for the program. The evaluator keeps the results of the
+        subtrees of the program between evaluations, so it is not shared between streams.
+        """
+        return IncrementalEvaluator(self.program, self._evaluator)
+
+    def canonical_hash(self) -> str:
+        """Returns the structural hash of the program (see canonical.py), which is the same for e.g.
+        'A+B' and 'B + (A)'. The hash is calculated on the first call.
+        """
+        if self._canonical_hash is None:
+            self._canonical_hash = canonical_hash(self.program)
+        return self._canonical_hash
+
+
+class ExpressionCompiler:  # pylint: disable=too-many-instance-attributes
+    """The class runs the validation and the Shunting-Yard conversion of an expression once and returns
+    the result as a CompiledExpression. Variables are not expanded during the validation, so the same
+    compiled expression can be evaluated with any variable values.
+
+    Attributes:
+        validator (InputValidator): Validates and tokenises the expressions without checking the variables
+        sy (ShuntingYard): Converts the tokenised expressions to RPN/postfix
+        evaluator (RPNEvaluator): Evaluates the compiled RPN/postfix programs, with the given ResultCache if
+            the results are cached
+        optimiser (RPNOptimiser): Folds constants in the RPN/postfix programs, or None if not used
+        code_generator (CodeGenerator): Generates Python functions from the RPN/postfix programs, or None
+            if the programs are evaluated with the RPNEvaluator
+        hot_threshold (int): The number of evaluations of a compiled expression with the RPNEvaluator after
+            which its function is generated, or None if the functions are generated when compiling (with
+            code generation) or never
+        cache (ParseCache): An LRU cache of compiled expressions keyed by the expression string, or None
+            if caching is not used
+        instrumentation (Instrumentation): Records the time spent in each stage, the token counts, the
+            errors and the cache lookups, or None if the stages are not measured
+        disk_cache (DiskCache): A directory of serialised programs shared between processes, or None if
+            the programs are not stored on disk
+        fuse (bool): If True, the programs evaluated with the RPNEvaluator are fused into superinstructions
+        profiler (OpcodeProfiler): Counts the opcode sequences of the evaluated programs, or None if not used
+
+    Methods:
+        compile(expression): Validates and converts the expression into a CompiledExpression
+    """
+    def __init__(self, cache_size: int = 0, optimise: bool = True, generate_code: bool = False,  # pylint: disable=too-many-arguments
+                 instrumentation: Instrumentation | None = None, cache_dir: str | None = None, *,
+                 result_cache: ResultCache | None = None, fuse: bool = True,
+                 profiler: OpcodeProfiler | None = None, hot_threshold: int | None = None):
+        if hot_threshold is not None and hot_threshold < 0:
+            raise ValueError("The hot threshold cannot be negative")
+
+        self.validator = InputValidator()
+        self.sy = ShuntingYard()
+        self.evaluator = RPNEvaluator(result_cache)
+        self.optimiser = RPNOptimiser() if optimise else None
+        self.code_generator = CodeGenerator() if generate_code or hot_threshold is not None else None
+        self.hot_threshold = hot_threshold
+        self.cache = ParseCache(cache_size) if cache_size > 0 else None
+        self.instrumentation = instrumentation
+        # The programs folded by the optimiser are not loaded by a compiler that does not optimise
+        self.disk_cache = (DiskCache(cache_dir, "optimised" if optimise else "unoptimised")
+                           if cache_dir is not None else None)
+        self.fuse = fuse
+        self.profiler = profiler
+
+    def compile(self, expression: str) -> CompiledExpression:
+        """Validates, tokenises and converts an infix mathematical expression to a compact Program, which
+        is then optimised by folding its constant sub-expressions and, if code generation is used,
+        translated into a Python function. If the cache is in use and the
+        same expression has been compiled before, the cached CompiledExpression is returned without
+        validating and converting the expression again. If the disk cache is in use, the program is
+        loaded from (or stored in) the cache directory. A program evaluated with the RPNEvaluator is
+        fused into superinstructions unless fusing is turned off. With a hot threshold, the function is
+        generated only when the compiled expression has been evaluated that many times.
+
+        Args:
+            expression -- the user's mathematical expression
+
+        Returns: A CompiledExpression that can be evaluated repeatedly, or error if the expression is invalid
+        """
+        if self.cache is not None:
+            compiled = self.cache.get(expression)
+            if self.instrumentation is not None:
+                self.instrumentation.record_cache(compiled is not None)
+            if compiled is not None:
+                return compiled
+
+        entry = self.disk_cache.get(expression) if self.disk_cache is not None else None
+
+        if entry is not None:
+            program, var_to_set = entry
+        else:
+            program, var_to_set = self._parse(expression)
+            if self.disk_cache is not None:
+                self.disk_cache.put(expression, program, var_to_set)
+
+        # With a hot threshold the function is generated on demand by the compiled expression
+        generate_now = self.code_generator is not None and self.hot_threshold is None
+        function = self.code_generator.generate(program) if generate_now else None
+        fuse_now = function is None and self.fuse
+        fused = FusedProgram.from_program(program, self.evaluator.opcode_operations) if fuse_now else None
+        compiled = CompiledExpression(expression, program, var_to_set, self.evaluator, function,
+                                      instrumentation=self.instrumentation, fused=fused, profiler=self.profiler,
+                                      code_generator=self.code_generator, hot_threshold=self.hot_threshold)
+
+        if self.cache is not None:
+            self.cache.put(expression, compiled)
+
+        return compiled
+
+    def _parse(self, expression: str) -> tuple:
+        """Validates and converts the expression to an optimised Program.
+
+        Args:
+            expression -- the user's mathematical expression
+
+        Returns: A tuple containing the Program and the variable to set (or None), or error if the
+            expression is invalid
+        """
+        if self.instrumentation is None:
+            validated_tokens, var_to_set = self.validator.validate_expression(expression)
+            program = self.sy.convert_to_program(validated_tokens)
+        else:
+            validated_tokens, var_to_set = self.instrumentation.measure(
+                "validate", self.validator.validate_expression, expression
+                )
+            self.instrumentation.record_tokens("validate", len(validated_tokens))
+            program = self.instrumentation.measure("convert", self.sy.convert_to_program, validated_tokens)
+            self.instrumentation.record_tokens("convert", len(program))
+
+        if self.optimiser is not None:
+            program = self.optimiser.optimise_program(program)
+
+        return (program, var_to_set)
@@ -0,0 +1,209 @@
+"""A set of related formulas evaluated together. The formulas are merged into a single graph in which the
+sub-expressions they share (e.g. 'sqrt(A**2+B**2)' or 'sin(C)') are calculated only once per evaluation.
+"""
+import string
+from .program import CONST, FIRST_BINARY, LOAD_VAR
+from .expression_compiler import ExpressionCompiler
+from .canonical import canonicalise
+from .exceptions import InvalidExpressionException
+
+
+class FormulaSet:
+    """The class compiles a list of formulas and merges their RPN/postfix programs into one directed
+    acyclic graph of nodes. Every number, variable and operation of a program becomes a node, and a node
+    that has already been created with the same operation and the same operand nodes is reused instead
+    of creating a new one (hash-consing), so a sub-expression that appears several times in the same or
+    different formulas is a single node. The nodes are created in postfix order, so the operands of a node
+    are always before it and the graph is evaluated with one pass over the nodes.
+
+    The results and errors of each formula are the same as when the formula is evaluated on its own: an
+    error in a node is passed on to the nodes that use it, and an operation with two failed operands gets
+    the error of its first operand, which is the error the formula would raise first. With canonical=True
+    the programs are merged in their canonical form (see canonical.py), so e.g. 'A+B' and 'B+A' also
+    share a node, but a formula whose operands both fail may then report the error of the other operand.
+
+    Attributes:
+        formulas (list): The compiled formulas (CompiledExpression) in the order they were given
+        roots (list): The node of the result of each formula
+        size (int): The number of nodes in the graph, i.e. the operations calculated per evaluation
+        tokens (int): The total number of tokens in the programs of the formulas
+
+    Methods:
+        evaluate(variables): Evaluates all the formulas with the given variable values
+    """
+    def __init__(self, expressions: list, compiler: ExpressionCompiler | None = None, canonical: bool = False):
+        """Compiles the formulas and merges them into a graph.
+
+        Args:
+            expressions -- the mathematical expressions of the formulas
+            compiler -- ExpressionCompiler object used to compile the expressions
+            canonical -- if True, the operands of the commutative operations are put in canonical order
+                before merging, so more sub-expressions are shared
+
+        Returns: Nothing, or error if one of the expressions is not valid
+        """
+        compiler = compiler or ExpressionCompiler()
+        self.formulas = [compiler.compile(expression) for expression in expressions]
+        self.tokens = sum(len(compiled.program) for compiled in self.formulas)
+        # The result of each number node is stored in advance and the other nodes are calculated by the
+        # steps: (node, opcode, implementation or variable name, first operand node, last operand node)
+        self._values = []
+        self._steps = []
+        # The node of each (opcode, value or operand nodes), for finding the nodes that already exist
+        self._node_of = {}
+        self.roots = [self._add_program(canonicalise(compiled.program) if canonical else compiled.program,
+                                        compiler.evaluator.opcode_operations)
+                      for compiled in self.formulas]
+        self.size = len(self._values)
+
+    def __len__(self):
+        return len(self.formulas)
+
+    def _add_program(self, program, operations: list) -> int:
+        """Adds the nodes of a program to the graph, reusing the nodes that already exist.
+
+        Args:
+            program -- the Program of a compiled formula
+            operations -- the implementations of the operations indexed by their opcode
+
+        Returns: The node of the result of the program
+        """
+        constants = iter(program.constants)
+        # The evaluation stack of the program holds nodes instead of values
+        stack = []
+
+        for opcode in program.opcodes:
+            if opcode == CONST:
+                value = next(constants)
+                # -0.0 and 0.0 are equal as keys, so the numbers are keyed by their exact representation
+                key = (CONST, value.hex())
+            elif opcode >= LOAD_VAR:
+                key = (opcode,)
+            elif opcode >= FIRST_BINARY:
+                last = stack.pop()
+                key = (opcode, stack.pop(), last)
+            else:
+                key = (opcode, stack.pop())
+
+            node = self._node_of.get(key)
+            if node is None:
+                node = self._add_node(key, value if opcode == CONST else None, operations)
+            stack.append(node)
+
+        return stack.pop()
+
+    def _add_node(self, key: tuple, value: float | None, operations: list) -> int:
+        node = len(self._values)
+        opcode = key[0]
+        self._node_of[key] = node
+        self._values.append(value)
+
+        if opcode >= LOAD_VAR:
+            self._steps.append((node, opcode, string.ascii_uppercase[opcode - LOAD_VAR], None, None))
+        elif opcode >= FIRST_BINARY:
+            self._steps.append((node, opcode, operations[opcode], key[1], key[2]))
+        elif opcode != CONST:
+            self._steps.append((node, opcode, operations[opcode], None, key[1]))
+
+        return node
+
+    def evaluate(self, variables: dict | None = None) -> tuple:
+        """Evaluates the graph once and returns the results of all the formulas. A formula that fails does
+        not stop the evaluation of the other formulas.
+
+        Args:
+            variables -- a dictionary containing the values of the variables A-Z used in the formulas
+
+        Returns: A tuple containing a list of the results of the formulas (None for the formulas that
+            failed) and a dictionary of the error messages of the failed formulas by their index
+        """
+        variables = variables or {}
+
+        try:
+            values = self._calculate(variables)
+            errors = None
+        except (InvalidExpressionException, OverflowError, ZeroDivisionError, TypeError, ValueError):
+            values, errors = self._calculate_with_errors(variables)
+
+        results = []
+        messages = {}
+
+        for index, root in enumerate(self.roots):
+            end_result = values[root]
+            if errors is not None and errors[root] is not None:
+                messages[index] = errors[root]
+                results.append(None)
+            elif isinstance(end_result, complex):
+                messages[index] = "Complex numbers are not supported"
+                results.append(None)
+            else:
+                # Rounded the same way as in RPNEvaluator.evaluate_program()
+                results.append(int(end_result) if end_result.is_integer() else round(end_result, 10))
+
+        return results, messages
+
+    def _calculate(self, variables: dict) -> list:
+        """Calculates the values of all the nodes, or raises the first error."""
+        values = list(self._values)
+
+        for node, opcode, operation, first, last in self._steps:
+            if opcode >= LOAD_VAR:
+                if operation not in variables:
+                    raise InvalidExpressionException(f"The variable {operation} has not been defined!")
+                values[node] = float(variables[operation])
+            elif opcode >= FIRST_BINARY:
+                values[node] = operation(values[first], values[last])
+            else:
+                values[node] = operation(values[last])
+
+        return values
+
+    def _calculate_with_errors(self, variables: dict) -> tuple:
+        """Calculates the values of all the nodes when some of them fail. A node whose operand failed gets
+        the error of the operand (of the first operand if both failed) without being calculated.
+
+        Returns: A tuple containing the list of the values and the list of the error messages (or None)
+            of the nodes
+        """
+        values = list(self._values)
+        errors = [None] * len(values)
+
+        for step in self._steps:
+            node, _, _, first, last = step
+            if first is not None and errors[first] is not None:
+                errors[node] = errors[first]
+            elif last is not None and errors[last] is not None:
+                errors[node] = errors[last]
+            else:
+                try:
+                    values[node] = self._calculate_step(values, variables, step)
+                except (InvalidExpressionException, OverflowError, ZeroDivisionError, TypeError) as e:
+                    errors[node] = self._error_message(e)
+
+        return values, errors
+
+    @staticmethod
+    def _error_message(error: Exception) -> str:
+        """Returns the message of an error as in RPNEvaluator.evaluate_program()."""
+        if isinstance(error, OverflowError):
+            return "Maximum data limit exceeded! Please try a smaller calculation."
+        if isinstance(error, ZeroDivisionError):
+            return "Division with zero undefined!"
+        if isinstance(error, TypeError):
+            # A function of math or a comparison in min/max was given a complex operand
+            return "Complex numbers are not supported"
+        return str(error)
+
+    @staticmethod
+    def _calculate_step(values: list, variables: dict, step: tuple):
+        _, opcode, operation, first, last = step
+        if opcode >= LOAD_VAR:
+            if operation not in variables:
+                raise InvalidExpressionException(f"The variable {operation} has not been defined!")
+            try:
+                return float(variables[operation])
+            except (TypeError, ValueError) as e:
+                raise InvalidExpressionException(f"The value of the variable {operation} is not a number!") from e
+        if opcode >= FIRST_BINARY:
+            return operation(values[first], values[last])
+        return operation(values[last])
@@ -0,0 +1,163 @@
+"""Incremental evaluation of a compiled program for a stream of variable values. The result of every
+subtree of the program is kept between evaluations, and only the subtrees that contain a changed variable
+are calculated again.
+"""
+import string
+from .program import Program, CONST, FIRST_BINARY, LOAD_VAR
+from .rpn_evaluator import RPNEvaluator
+from .exceptions import InvalidExpressionException
+
+
+# The value of a variable that is not defined, different from any number
+_UNDEFINED = object()
+
+
+class IncrementalEvaluator:
+    """The class evaluates the same program repeatedly when only some of the variables change between
+    evaluations, e.g. a formula updated on every tick of a stream. In RPN/postfix form every token is the
+    root of a subtree (a number, a variable or an operation on the subtrees before it), so the result of
+    each subtree is stored by the position of its token. For each variable, the positions of the subtrees
+    that contain the variable are known in advance. An evaluation compares the variables with the previous
+    evaluation and calculates only the subtrees of the changed variables, in postfix order, so the work is
+    proportional to the paths from the changed variables to the root instead of the whole program.
+
+    The results and errors are the same as with RPNEvaluator.evaluate_program(). After an error, the next
+    evaluation calculates the whole program again.
+
+    Attributes:
+        program (Program): The program being evaluated
+        variables (frozenset): The variables used in the program
+        evaluations (int): The number of evaluations
+        recalculated (int): The number of subtrees calculated in all the evaluations
+
+    Methods:
+        evaluate(variables): Evaluates the program with the given variable values
+        reset: Forgets the stored results, so the next evaluation calculates the whole program
+    """
+    def __init__(self, program: Program | tuple, evaluator: RPNEvaluator | None = None):
+        self.program = program if isinstance(program, Program) else Program.from_tokens(program)
+        self.variables = self.program.variables()
+        self.evaluations = 0
+        self.recalculated = 0
+
+        # The operation of each token as (opcode, implementation or variable name, position of the first
+        # operand). The last operand of an operation is always the token just before it
+        self._nodes = [None] * len(self.program)
+        self._results = [None] * len(self.program)
+        self._subtrees = self._find_subtrees((evaluator or RPNEvaluator()).opcode_operations)
+        self._inputs = None
+
+    def _find_subtrees(self, operations: list) -> dict:  # pylint: disable=too-many-statements
+        """Links each operation to its operands and finds the subtrees that contain each variable.
+
+        Args:
+            operations -- the implementations of the operations indexed by their opcode
+
+        Returns: A dictionary with a sorted list of the positions of the subtrees that contain the variable
+            for each variable
+        """
+        constants = iter(self.program.constants)
+        # A stack of (position of the subtree root, variables in the subtree)
+        stack = []
+        subtrees = {variable: [] for variable in self.variables}
+
+        for position, opcode in enumerate(self.program.opcodes):
+            if opcode == CONST:
+                self._results[position] = next(constants)
+                variables = frozenset()
+            elif opcode >= LOAD_VAR:
+                name = string.ascii_uppercase[opcode - LOAD_VAR]
+                self._nodes[position] = (opcode, name, None)
+                variables = frozenset(name)
+            elif opcode >= FIRST_BINARY:
+                _, last_variables = stack.pop()
+                first_operand, first_variables = stack.pop()
+                self._nodes[position] = (opcode, operations[opcode], first_operand)
+                variables = first_variables | last_variables
+            else:
+                self._nodes[position] = (opcode, operations[opcode], None)
+                _, variables = stack.pop()
+
+            stack.append((position, variables))
+            for variable in variables:
+                subtrees[variable].append(position)
+
+        return subtrees
+
+    def reset(self):
+        """Forgets the stored results, so the next evaluation calculates the whole program."""
+        self._inputs = None
+
+    def evaluate(self, variables: dict | None = None):
+        """Evaluates the program with the given variable values, calculating only the subtrees that
+        contain a variable whose value changed since the previous evaluation.
+
+        Args:
+            variables -- a dictionary containing the values of the variables A-Z in the program
+
+        Returns: The end result of the calculation or error
+        """
+        variables = variables or {}
+        inputs = {variable: variables.get(variable, _UNDEFINED) for variable in self.variables}
+
+        positions = self._changed_positions(inputs)
+        self.evaluations += 1
+        self._inputs = None
+
+        try:
+            self._calculate(positions, variables)
+        except (OverflowError, ZeroDivisionError) as e:
+            raise InvalidExpressionException(
+                "Division with zero undefined!" if isinstance(e, ZeroDivisionError)
+                else "Maximum data limit exceeded! Please try a smaller calculation."
+            ) from e
+        except TypeError as e:
+            # A function of math or a comparison in min/max was given a complex operand
+            raise InvalidExpressionException("Complex numbers are not supported") from e
+
+        self._inputs = inputs
+        end_result = self._results[-1]
+
+        if isinstance(end_result, complex):
+            raise InvalidExpressionException("Complex numbers are not supported")
+        # Rounded the same way as in RPNEvaluator.evaluate_program()
+        return int(end_result) if end_result.is_integer() else round(end_result, 10)
+
+    def _changed_positions(self, inputs: dict):
+        """Returns the positions of the subtrees that contain a variable whose value is not the same as in
+        the previous evaluation, in postfix order, or all the positions if there is no previous evaluation.
+        """
+        if self._inputs is None:
+            return range(len(self.program))
+
+        changed = [variable for variable, value in inputs.items() if self._inputs[variable] != value]
+        if len(changed) == 1:
+            return self._subtrees[changed[0]]
+        return sorted({position for variable in changed for position in self._subtrees[variable]})
+
+    def _calculate(self, positions, variables: dict):
+        """Calculates the results of the subtrees at the given positions in postfix order, so the operands
+        of an operation are always up to date when the operation is calculated.
+        """
+        nodes = self._nodes
+        results = self._results
+
+        for position in positions:
+            node = nodes[position]
+
+            if node is None:  # A number never changes
+                continue
+            opcode, operation, first_operand = node
+            if opcode >= LOAD_VAR:
+                if operation not in variables:
+                    raise InvalidExpressionException(f"The variable {operation} has not been defined!")
+                try:
+                    results[position] = float(variables[operation])
+                except (TypeError, ValueError) as e:
+                    raise InvalidExpressionException(f"The value of the variable {operation} is not a number!") from e
+            elif opcode >= FIRST_BINARY:
+                results[position] = operation(results[first_operand], results[position - 1])
+            else:
+                results[position] = operation(results[position - 1])
+
+        self.recalculated += len(positions)
@@ -1,10 +1,81 @@
 """Checks validity of the user's input string. The string is either considered
 valid and returned tokenised (list) or an error is triggered
 """
+import functools
 import math
 import re
 import string
 from .exceptions import InvalidExpressionException
+from .operations import OPERATIONS
+
+
+# The scanner is compiled once for each set of functions and operators in the operation registry.
+# Each match is a single token
+_TOKEN_PATTERN_TEMPLATE = r"""
+    (?P<number>\d*\.\d+|\d+\.?)          # Match positive floats and integers
+    | (?P<variable>[A-Z])                # Match variables A-Z
+    | (?P<function>{functions})          # Match functions
+    | (?P<constant>pi)                   # Match constants
+    | (?P<operator>{operators})          # Match operators and the minus sign
+    | (?P<bracket>[()])                  # Match brackets
+    | (?P<comma>,)                       # Match commas
+    | (?P<whitespace>\s+)                # Match whitespaces
+    | (?P<invalid>.)                     # Any other character is invalid
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _token_pattern(functions: frozenset, operators: frozenset) -> re.Pattern:
+    """Compiles the regular expression that scans the tokens. The longest names are tried first, so that
+    a name is not matched partially (e.g. '**' before '*').
+
+    Args:
+        functions -- the names of the functions
+        operators -- the symbols of the operators
+
+    Returns: The compiled pattern
+    """
+    def alternatives(symbols):
+        return "|".join(re.escape(symbol) for symbol in sorted(symbols, key=lambda symbol: (-len(symbol), symbol)))
+
+    return re.compile(
+        _TOKEN_PATTERN_TEMPLATE.format(functions=alternatives(functions), operators=alternatives(operators)),
+        re.VERBOSE | re.DOTALL
+        )
+
+
+_NUMBER_START_CHARS = frozenset("0123456789.")
+
+
+class _TokenScanner:
+    """Iterates the tokens of an expression lazily, so that the expression is tokenised and validated
+    in a single scan. Whitespaces are skipped and an invalid character raises an exception immediately.
+
+    Attributes:
+        expression (str): The (spaceless) mathematical expression to scan
+        pattern (re.Pattern): The compiled regular expression that matches the tokens
+        start (int): The index the scan starts from
+        position (int): The index of the latest token scanned, or the length of the expression at the end
+    """
+    def __init__(self, expression: str, pattern: re.Pattern, start: int = 0):
+        self.expression = expression
+        self.pattern = pattern
+        self.start = start
+        self.position = start
+
+    def __iter__(self):
+        for match in self.pattern.finditer(self.expression, self.start):
+            self.position = match.start()
+            kind = match.lastgroup
+
+            if kind == "whitespace":
+                continue
+            if kind == "invalid":
+                raise InvalidExpressionException("The expression contains invalid characters!", self.position)
+
+            yield match.group()
+
+        self.position = len(self.expression)
 
 
 class InputValidator:
@@ -13,13 +84,21 @@ class InputValidator:
     operator) is a list element of type str. 
 
     Attrs:
-    user_variables -- A dictionary containing the variables A-Z that the user has set some value for
+    user_variables -- A dictionary containing the variables A-Z that the user has set some value for, or
+        None if the variables are not checked during the validation (any variable A-Z is accepted)
+
+    Variables are kept in the validated tokens as str tokens (e.g. "A"), so that their values are bound
+    only when the expression is evaluated.
     """
-    def __init__(self, user_variables: dict):
+    def __init__(self, user_variables: dict | None = None):
         self.user_variables = user_variables
         self.constants = {"pi": math.pi}
-        self.operators = set(["+", "-", "*", "/", "**"])
-        self.allowed_start_chars = set(["c", "p", "s", "m", "(", ".", " "])
+        self.operators = OPERATIONS.symbols(kind="operator")
+        self.functions = OPERATIONS.function_names()
+        # The two argument functions (e.g. 'min') take their arguments separated by a comma
+        self.two_argument_functions = OPERATIONS.symbols(arity=2, kind="function")
+        self.token_pattern = _token_pattern(frozenset(self.functions), frozenset(self.operators))
+        self.allowed_start_chars = {name[0] for name in self.functions} | set(["p", "(", ".", " "])
         self.allowed_end_chars = set(["i", ")", ".", " "])
 
     def update_user_variable(self, var_character: str, var_value: str):
@@ -33,11 +112,11 @@ class InputValidator:
         """
         self.user_variables.update({var_character: var_value})
 
-    def validate_expression(self, user_expression: str) -> list:
+    def validate_expression(self, user_expression: str) -> list:  # pylint: disable=too-many-statements
         """Takes the user's mathematical expression as input. Checks if the user wants to define a
         variable. Removes spaces. Ensures the string is not empty and that first and last character
-        are valid. Tokenises the string into a list of str type tokens. Checks for invalid characters
-        that were not tokenised. Finally converts token list to a list of valid tokens.
+        are valid. Finally tokenises and validates the expression in a single scan. If the expression
+        is not valid, the exception raised contains the position of the error in the original expression.
 
         Args:
         user_expression -- user's mathematical expression
@@ -46,42 +125,63 @@ class InputValidator:
         variable to set or 'None' if none 
         """
         var_to_set = None
+        start = 0
 
         spaceless_expression = self._remove_spaces(user_expression)
 
         if self._user_defines_variable(spaceless_expression):
             var_to_set = spaceless_expression[0]
-            spaceless_expression = spaceless_expression[2:]
+            start = 2
 
-        self._validate_length(spaceless_expression)
-        self._validate_first_and_last(spaceless_expression)
+        try:
+            self._validate_length(spaceless_expression[start:])
+            self._validate_first_and_last(spaceless_expression[start:])
 
-        # Tokenise the expression
-        tokens = self._tokenise_expression(spaceless_expression)
+        except InvalidExpressionException as e:
+            e.position = self._original_position(user_expression, start + (e.position or 0))
+            raise
 
-        # Ensure there are no surplus characters that are not valid
-        self._check_for_invalid_characters(spaceless_expression, tokens)
+        scanner = _TokenScanner(spaceless_expression, self.token_pattern, start)
 
-        validated_tokens = self._validate_tokens(tokens)
+        try:
+            validated_tokens = self._validate_tokens(scanner)
+
+        except InvalidExpressionException as e:
+            if e.position is None:
+                e.position = scanner.position
+            e.position = self._original_position(user_expression, e.position)
+            raise
 
         return (validated_tokens, var_to_set)
 
     def _remove_spaces(self, user_expression: str) -> str:
-        """Removes spaces from the expression by iterating through it and forming a new string from
-        the non-space characters.
+        """Removes spaces from the expression.
 
         Args: 
         user_expression -- the mathematical expression to remove spaces from
 
         Returns: A string containing the user_expression without spaces
         """
-        spaceless_str = ""
+        return user_expression.replace(" ", "")
+
+    def _original_position(self, user_expression: str, spaceless_position: int) -> int:
+        """Converts a position in the spaceless expression to the matching position in the original
+        expression that may contain spaces.
 
-        for char in user_expression:
-            if char != " ":
-                spaceless_str += char
+        Args:
+        user_expression -- the original mathematical expression
+        spaceless_position -- index of a character in the expression without spaces
+
+        Returns: The index of the same character in the original expression
+        """
+        for position, char in enumerate(user_expression):
+            if char == " ":
+                continue
+            if spaceless_position == 0:
+                return position
+            spaceless_position -= 1
 
-        return spaceless_str
+        return len(user_expression)
 
     def _user_defines_variable (self, user_expression: str) -> bool:
         """Checks if a user_expression starts with a capital ASCII letter followed by an equals sign
@@ -112,6 +212,23 @@ class InputValidator:
         var_value = self.user_variables[token]
         return float(var_value)
 
+    def _variable_tokens(self, token: str, negative: bool = False) -> list:
+        """Returns the validated tokens for a variable. The variable is kept as it is, so that its value
+        can be bound when the expression is evaluated. If the user's variables are known, the variable
+        must have been defined.
+
+        Args:
+        token -- The string token containing an upper case ASCII letter
+        negative -- True if the variable is preceded by a unary minus
+
+        Returns: A list containing the variable (str), or the negation of the variable in brackets so that
+        it binds as tightly as a negative number (e.g. '(-A)**2' like '(-2)**2')
+        """
+        if self.user_variables is not None:
+            self._expand_variable(token)
+
+        return ["(", "n", token, ")"] if negative else [token]
+
     def _validate_length(self, user_expression: str):
         """Ensures no empty strings will be accepted.
 
@@ -136,80 +253,61 @@ class InputValidator:
         last_char = user_expression[-1]
 
         if not first_char.isdigit():
-            if not first_char in self.user_variables:
+            if not self._is_allowed_variable(first_char):
                 if not first_char in self.allowed_start_chars:
-                    raise InvalidExpressionException("Invalid first character!")
+                    raise InvalidExpressionException("Invalid first character!", 0)
 
         if not last_char.isdigit():
-            if not last_char in self.user_variables:
+            if not self._is_allowed_variable(last_char):
                 if not last_char in self.allowed_end_chars:
-                    raise InvalidExpressionException("Invalid last character!")
-
-    def _tokenise_expression(self, user_expression: str) -> list:
-        """Takes a mathematical expression and uses regex to identify allowed characters/patterns
-        in it, which is used to tokenise the founc elements.
-
-        Args:
-        user_expression -- the original mathematical expression to compare
+                    raise InvalidExpressionException("Invalid last character!", len(user_expression) - 1)
 
-        Returns: The expression as list of str tokens
-        """
-        tokens = []
-
-        pattern = re.compile(r"""
-            (?P<sign>[-])
-            | (?P<float>\d*\.\d+)       # Match positive floats
-            | (?P<integer>\d+\.?)       # Match positive integers
-            | (?P<negative_sign>[,])    # Match the minus sign
-            | (?P<variable>[A-Z])       # Match variables A-Z
-            | (?P<constant>pi)          # Match constants
-            | (?P<function>cos|sin|sqrt|min|max) # Match functions
-            | (?P<operator>\*\*|[+\-*/]) # Match operators
-            | (?P<bracket>[())])        # Match brackets
-            | (?P<comma>[,])            # Match commas
-            | (?P<whitespace>\s+)       # Match whitespaces
-        """, re.VERBOSE)
-
-        tokens = pattern.findall(user_expression)
-        token_list = [token for group in tokens for token in group if token]
-
-        return token_list
-
-    def _check_for_invalid_characters(self, user_expression: str, tokens: list):
-        """Chacks for invalid characters by comparing the original expression string to a parsed
-        (to string) version of the token list.
+    def _is_allowed_variable(self, char: str) -> bool:
+        """Checks if a character is a variable that may be used in the expression. If the user's
+        variables are known, the variable must have been set, otherwise any capital ASCII letter is accepted.
 
         Args:
-        user_expression -- the original mathematical expression to compare
-        tokens -- the token list formed of the original mathematical expression
+        char -- the character to check
 
-        Returns: Nothing if no invalid characters are present or raises an exception if they are
+        Returns: True if the character is an allowed variable, False otherwise
         """
-        string_from_tokens = "".join(tokens)
-        if user_expression != string_from_tokens:
-            raise InvalidExpressionException("The expression contains invalid characters!")
+        if self.user_variables is None:
+            return char in string.ascii_uppercase
+        return char in self.user_variables
 
-    def _validate_tokens(self, tokens: list) -> list:  # pylint: disable=too-many-statements
+    def _validate_tokens(self, tokens) -> list:  # pylint: disable=too-many-statements,too-many-branches
         """Takes the tokenised mathematical expression as input. Removes commas. Checks for: correctly
         paired brackets, no consecutive operators, correct number of args for two arg functions
         (max/min). Attaches unary negative to relevant number or converts it to "n" for clarity.
-        Expands variables. Adds brackets to enclose both arguments of 'min'/'max'. Removes commas.
+        Checks variables. Adds brackets to enclose both arguments of 'min'/'max'. Removes commas.
+        The tokens are iterated only once, so they can also be scanned lazily from the expression.
 
         Args:
-        tokens -- A list of strings - tokenised version of the user's mathematical expression input
+        tokens -- An iterable of strings - tokenised version of the user's mathematical expression input
 
         Returns: A list of valid tokens of type str or float
         """
         validated_tokens = []
         bracket_equality = 0
         min_max_brackets_required = set()
-        previous_is_neg = False
+        pending_neg = False
         expected_commas = 0
 
-        for i, token in enumerate(tokens):
-            if previous_is_neg:
-                previous_is_neg = False  # The number token inspected was added in the last iteration
-                continue
+        for token in tokens:
+            # Handle unary minus by attaching it to a number and adding the neg float to validated
+            # tokens, or replacing the minus with "n" for negative, if in between brackets
+            if pending_neg:
+                pending_neg = False
+
+                if token[0] in _NUMBER_START_CHARS:
+                    validated_tokens.append(-float(token))
+                    continue
+
+                if token in string.ascii_uppercase:
+                    validated_tokens.extend(self._variable_tokens(token, negative=True))
+                    continue
+
+                validated_tokens.append("n" if token == "(" else "-")
 
             bracket_equality += self._get_bracket_value(token)
             # Add a closing bracket for min/max if necessary
@@ -221,29 +319,15 @@ class InputValidator:
                     "Closing bracket before an opening bracket or too many closing brackets!"
                     )
 
-            # Handle unary minus by attaching it to a number and adding the neg float to validated
-            # tokens, or replacing the minus with "n" for negative, if in between brackets
-            if token == "-":
-
-                if i > 0 and validated_tokens[-1] == "(":
-                    if self._is_number(tokens[i+1]):
-                        validated_tokens.append(-float(tokens[i+1]))
-                        previous_is_neg = True
-                        continue
-
-                    if tokens[i+1] in string.ascii_uppercase:
-                        var_value = self._expand_variable(tokens[i+1])
-                        validated_tokens.append(-var_value)
-                        previous_is_neg = True
-                        continue
-
-                    if tokens[i+1] == "(":
-                        token = "n"
+            # The unary minus is handled once the next token is known
+            if token == "-" and validated_tokens and validated_tokens[-1] == "(":
+                pending_neg = True
+                continue
 
             # Min/max arguments must be enclosed in brackets to ensure they are correctly calculated. This is
             # done by adding an opening bracket after 'min'/'max', adding closing and opening bracket when there
             # is a comma, and finally adding a closing bracket when the bracket equality is the same as in the start
-            if token in ("max", "min"):
+            if token in self.two_argument_functions:
                 min_max_brackets_required.add(bracket_equality) # Save the value requiring an extra closing bracket
                 expected_commas += 1
                 validated_tokens.append(token)
@@ -258,19 +342,18 @@ class InputValidator:
 
             # Ensure there are no consecutive operators
             if token in self.operators:
-                if i > 0 and validated_tokens[-1] in self.operators:
+                if validated_tokens and validated_tokens[-1] in self.operators:
                     raise InvalidExpressionException(
                         f"Consecutive operators not allowed!: '{validated_tokens[-1]}', '{token}'"
                         )
 
-            # Expand variables and convert to floats
+            # Keep variables for late binding
             if token in string.ascii_uppercase:
-                var_value = self._expand_variable(token)
-                validated_tokens.append(var_value)
+                validated_tokens.extend(self._variable_tokens(token))
                 continue
 
             # Convert numbers to floats
-            if self._is_number(token):
+            if token[0] in _NUMBER_START_CHARS:
                 validated_tokens.append(float(token))
                 continue
 
@@ -281,6 +364,9 @@ class InputValidator:
 
             validated_tokens.append(token)
 
+        if pending_neg:
+            validated_tokens.append("-")
+
         if bracket_equality != 0:
             raise InvalidExpressionException(f"Unequal brackets!: {bracket_equality}x closing bracket missing")
         if expected_commas < 0:
@@ -307,18 +393,3 @@ class InputValidator:
         if token == ")":
             return -1
         return 0
-
-    def _is_number(self, str_input: str) -> bool:
-        """Checks if argument string contains a number e.g. '-3', '7.89'
-
-        Args: 
-        str_input -- string input to check
-
-        Returns: True if str_input contains a valid number that can be converted into float,
-        False otherwise
-        """
-        try:
-            float(str_input)
-            return True
-        except ValueError:
-            return False
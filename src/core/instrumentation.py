@@ -0,0 +1,181 @@
+"""Opt-in instrumentation of the calculation pipeline. Records how long the validation, the conversion
+and the evaluation of expressions take, how many tokens each stage handles, which errors occur in each
+stage and how often the parse cache is hit. The collected metrics can be read as a dictionary or as
+text in the Prometheus exposition format.
+"""
+import re
+from bisect import bisect_left
+from collections import Counter
+from time import perf_counter
+from .exceptions import InvalidExpressionException
+
+
+# Upper bounds (in seconds) of the latency histogram buckets, the last bucket (+Inf) is implicit
+LATENCY_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 1.0)
+
+STAGES = ("validate", "convert", "evaluate")
+
+
+def error_category(error: Exception) -> str:
+    """Returns the category of an error message, i.e. the message without the details specific to the
+    expression, so that the errors can be counted by their kind. For example, "Unrecognised token: x"
+    becomes "Unrecognised token" and "The variable B has not been defined!" becomes "The variable X has
+    not been defined".
+
+    Args:
+        error -- the exception raised by a pipeline stage
+
+    Returns: The category of the error
+    """
+    if not isinstance(error, InvalidExpressionException):
+        return type(error).__name__
+
+    category = re.split(r"[!:]", str(error), maxsplit=1)[0].strip()
+    return re.sub(r"\b[A-Z]\b", "X", category) or "Unknown error"
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class StageMetrics:
+    """The latency histogram and the counters of a single pipeline stage.
+
+    Attributes:
+        bucket_counts (list): The number of calls whose duration fell in each latency bucket (not cumulative)
+        count (int): The number of calls of the stage
+        total_seconds (float): The total time spent in the stage
+        tokens (int): The total number of tokens handled by the stage
+        errors (Counter): The number of errors raised by the stage by error category
+    """
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.tokens = 0
+        self.errors = Counter()
+
+    def observe(self, seconds: float):
+        self.bucket_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+
+    def cumulative_buckets(self) -> list:
+        cumulative = []
+        total = 0
+        for count in self.bucket_counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+
+class Instrumentation:
+    """Collects the metrics of the pipeline stages. An Instrumentation object is given to the
+    ExpressionCompiler, which then times its stages; without one the compiler does no measuring at all.
+
+    Attributes:
+        prefix (str): The prefix of the metric names in the Prometheus text
+        stages (dict): The StageMetrics of each pipeline stage by the stage name
+        cache_hits (int): The number of parse cache lookups that found the expression
+        cache_misses (int): The number of parse cache lookups that did not find the expression
+
+    Methods:
+        measure(stage, function, argument): Runs a stage function and records its duration and errors
+        record_tokens(stage, tokens): Adds to the number of tokens handled by the stage
+        record_cache(hit): Records a parse cache lookup
+        snapshot: Returns the collected metrics as a dictionary
+        to_prometheus: Returns the collected metrics in the Prometheus text format
+        reset: Clears the collected metrics
+    """
+    def __init__(self, prefix: str = "scicalc"):
+        self.prefix = prefix
+        self.stages = {stage: StageMetrics() for stage in STAGES}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def measure(self, stage: str, function, argument):
+        """Calls the function with the argument and records how long the call took. If the function
+        raises an error, the error is counted by its category and raised again.
+
+        Args:
+            stage -- the name of the pipeline stage ("validate", "convert" or "evaluate")
+            function -- the function that runs the stage
+            argument -- the argument given to the function
+
+        Returns: The return value of the function
+        """
+        metrics = self.stages[stage]
+        start = perf_counter()
+
+        try:
+            result = function(argument)
+        except Exception as e:
+            metrics.observe(perf_counter() - start)
+            metrics.errors[error_category(e)] += 1
+            raise
+
+        metrics.observe(perf_counter() - start)
+        return result
+
+    def record_tokens(self, stage: str, tokens: int):
+        self.stages[stage].tokens += tokens
+
+    def record_cache(self, hit: bool):
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+    def snapshot(self) -> dict:
+        """Returns a copy of the collected metrics. The latency buckets are cumulative, i.e. each bucket
+        contains the calls that took at most the bucket's upper bound.
+
+        Returns: A dictionary with the metrics of each stage ("stages") and the cache lookups ("cache")
+        """
+        stages = {}
+        for stage, metrics in self.stages.items():
+            buckets = dict(zip(LATENCY_BUCKETS + (float("inf"),), metrics.cumulative_buckets()))
+            stages[stage] = {
+                "count": metrics.count,
+                "total_seconds": metrics.total_seconds,
+                "tokens": metrics.tokens,
+                "latency_buckets": buckets,
+                "errors": dict(metrics.errors),
+                }
+
+        return {"stages": stages, "cache": {"hits": self.cache_hits, "misses": self.cache_misses}}
+
+    def to_prometheus(self) -> str:
+        """Returns the collected metrics in the Prometheus text exposition format.
+
+        Returns: The metrics as text, one sample per line
+        """
+        duration = f"{self.prefix}_stage_duration_seconds"
+        lines = [f"# HELP {duration} Time spent in each pipeline stage.", f"# TYPE {duration} histogram"]
+
+        for stage, metrics in self.stages.items():
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), metrics.cumulative_buckets()):
+                lines.append(f'{duration}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{duration}_sum{{stage="{stage}"}} {metrics.total_seconds!r}')
+            lines.append(f'{duration}_count{{stage="{stage}"}} {metrics.count}')
+
+        tokens = f"{self.prefix}_stage_tokens_total"
+        lines += [f"# HELP {tokens} Tokens handled by each pipeline stage.", f"# TYPE {tokens} counter"]
+        lines += [f'{tokens}{{stage="{stage}"}} {metrics.tokens}' for stage, metrics in self.stages.items()]
+
+        errors = f"{self.prefix}_errors_total"
+        lines += [f"# HELP {errors} Errors raised by each pipeline stage.", f"# TYPE {errors} counter"]
+        for stage, metrics in self.stages.items():
+            for category, count in sorted(metrics.errors.items()):
+                lines.append(f'{errors}{{stage="{stage}",category="{_escape_label(category)}"}} {count}')
+
+        cache = f"{self.prefix}_parse_cache_lookups_total"
+        lines += [f"# HELP {cache} Parse cache lookups.", f"# TYPE {cache} counter"]
+        lines.append(f'{cache}{{result="hit"}} {self.cache_hits}')
+        lines.append(f'{cache}{{result="miss"}} {self.cache_misses}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        self.stages = {stage: StageMetrics() for stage in STAGES}
+        self.cache_hits = 0
+        self.cache_misses = 0
@@ -0,0 +1,233 @@
+"""The registry of the operators and functions of the calculator. Each operation is described once (its
+symbol, number of operands, precedence, associativity, implementation and the errors it may raise) and
+the validator, the Shunting-Yard converter, the evaluator and the code generator build their lookup and
+dispatch tables from the registry. New functions can be added with register_operation().
+"""
+import math
+import operator
+import re
+from .exceptions import InvalidExpressionException
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only required for the vectorised implementations used in batch evaluation
+    np = None
+
+
+# Opcodes 1-31 are operations with one operand and 32-63 operations with two operands (see program.py)
+_OPCODE_RANGES = {1: range(1, 32), 2: range(32, 64)}
+
+_FUNCTION_NAME = re.compile(r"[a-z]+")
+
+KINDS = ("operator", "function", "internal")
+
+
+class Operation:  # pylint: disable=too-many-instance-attributes
+    """An operator or a function of the calculator.
+
+    Attributes:
+        symbol (str): The token of the operation, e.g. "+" or "sqrt"
+        arity (int): The number of operands, 1 or 2
+        implementation (function): Calculates the operation on floats
+        precedence (int): The precedence used in the Shunting-Yard conversion
+        associativity (str): "left" or "right"
+        kind (str): "operator" (written between its operands), "function" (written as 'name(x)' or
+            'name(x, y)') or "internal" (produced only by the validator, e.g. the unary negation 'n')
+        errors (dict): Error messages by exception type for errors specific to the operation, e.g.
+            {ValueError: "sqrt(x) is defined for positive input only!"}
+        vectorised (function): A NumPy implementation used in batch evaluation, or None if not available
+        strict (bool): True if a result that is not a finite number for finite operands is an error, e.g.
+            division with zero. Used to mark the failed rows in batch evaluation
+        template (str): Python source used by the code generator, e.g. "{0} + {1}", or None to call the
+            implementation
+        commutative (bool): True if the operands of an operation with two operands can be swapped without
+            changing the result, e.g. 'A+B' and 'B+A'. Used to find the canonical form of a program
+        opcode (int): The opcode of the operation in a Program, given when the operation is registered
+        checked (function): The implementation that raises an InvalidExpressionException for the errors
+            in the errors dictionary
+    """
+    def __init__(self, symbol: str, arity: int, implementation, precedence: int = 3, *,  # pylint: disable=too-many-arguments
+                 associativity: str = "left", kind: str = "function", errors: dict | None = None,
+                 vectorised=None, strict: bool = False, template: str | None = None, commutative: bool = False):
+        self.symbol = symbol
+        self.arity = arity
+        self.implementation = implementation
+        self.precedence = precedence
+        self.associativity = associativity
+        self.kind = kind
+        self.errors = errors or {}
+        self.vectorised = vectorised
+        self.strict = strict
+        self.template = template
+        self.commutative = commutative
+        self.opcode = None
+        self.checked = self._checked_implementation()
+
+    def __repr__(self):
+        return f"Operation({self.symbol!r}, arity={self.arity}, opcode={self.opcode})"
+
+    def _checked_implementation(self):
+        """Returns the implementation wrapped so that the exceptions in the errors dictionary are raised as
+        an InvalidExpressionException with the given message. Without specific errors the implementation
+        is returned as it is, so that it is called without any overhead.
+        """
+        if not self.errors:
+            return self.implementation
+
+        implementation = self.implementation
+        error_types = tuple(self.errors)
+        messages = self.errors
+
+        def checked(*operands):
+            try:
+                return implementation(*operands)
+            except error_types as e:
+                raise InvalidExpressionException(messages[type(e)]) from e
+
+        return checked
+
+
+class OperationRegistry:
+    """Holds the registered operations. The stages of the calculator build their own lookup and dispatch
+    tables from the registry when they are created.
+
+    Attributes:
+        operations (dict): The operations by their symbol
+        by_opcode (list): The operations indexed by their opcode (None for unused opcodes)
+        opcodes (dict): The opcodes by the symbol of the operation
+
+    Methods:
+        register(operation): Adds an operation and gives it an opcode
+        unregister(symbol): Removes an operation
+        get(symbol): Returns the operation for a symbol or None
+        symbols(arity, kind): Returns the symbols of the operations with the given arity and kind
+        precedences: Returns the precedences by symbol
+        function_names: Returns the names of the functions written as 'name(...)'
+        fingerprint: Returns a string that identifies the registered operations and their opcodes
+    """
+    def __init__(self):
+        self.operations = {}
+        self.by_opcode = [None] * 64
+        self.opcodes = {}
+        self._fingerprint = None
+
+    def __contains__(self, symbol):
+        return symbol in self.operations
+
+    def __iter__(self):
+        return iter(self.operations.values())
+
+    def register(self, operation: Operation) -> Operation:  # pylint: disable=too-many-statements
+        """Adds an operation to the registry and gives it the first free opcode for its arity.
+
+        Args:
+            operation -- the Operation to add
+
+        Returns: The registered operation or ValueError if the operation is not valid or already registered
+        """
+        if operation.symbol in self.operations:
+            raise ValueError(f"The operation '{operation.symbol}' has already been registered")
+        if operation.arity not in _OPCODE_RANGES:
+            raise ValueError("An operation must have one or two operands")
+        if operation.commutative and operation.arity != 2:
+            raise ValueError("Only an operation with two operands can be commutative")
+        if operation.kind not in KINDS:
+            raise ValueError(f"The kind of an operation must be one of {', '.join(KINDS)}")
+        if operation.associativity not in ("left", "right"):
+            raise ValueError("The associativity of an operation must be 'left' or 'right'")
+        if operation.kind == "function" and (not _FUNCTION_NAME.fullmatch(operation.symbol)
+                                             or operation.symbol == "pi"):
+            raise ValueError("A function name must consist of lowercase letters a-z and must not be 'pi'")
+
+        free = [opcode for opcode in _OPCODE_RANGES[operation.arity] if self.by_opcode[opcode] is None]
+        if not free:
+            raise ValueError("There are no free opcodes left for the operation")
+
+        operation.opcode = free[0]
+        self.operations[operation.symbol] = operation
+        self.by_opcode[operation.opcode] = operation
+        self.opcodes[operation.symbol] = operation.opcode
+        self._fingerprint = None
+        return operation
+
+    def unregister(self, symbol: str):
+        operation = self.operations.pop(symbol)
+        self.by_opcode[operation.opcode] = None
+        del self.opcodes[symbol]
+        self._fingerprint = None
+
+    def get(self, symbol: str) -> Operation | None:
+        return self.operations.get(symbol)
+
+    def symbols(self, arity: int | None = None, kind: str | None = None) -> set:
+        return {operation.symbol for operation in self.operations.values()
+                if arity in (None, operation.arity) and kind in (None, operation.kind)}
+
+    def precedences(self) -> dict:
+        return {operation.symbol: operation.precedence for operation in self.operations.values()}
+
+    def function_names(self) -> set:
+        return self.symbols(kind="function")
+
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = ";".join(
+                f"{operation.symbol}:{operation.arity}:{operation.opcode}"
+                for operation in sorted(self.operations.values(), key=lambda operation: operation.opcode)
+                )
+        return self._fingerprint
+
+
+# The trigonometric functions of an infinite angle (an overflowed calculation) are not defined
+_INFINITE_ANGLE = {ValueError: "Maximum data limit exceeded! Please try a smaller calculation."}
+
+def _numpy(name: str):
+    return None if np is None else getattr(np, name)
+
+def _trigonometric(name: str) -> Operation:
+    """Returns a trigonometric function of math that takes the angle in degrees."""
+    function = getattr(math, name)
+    vectorised = None if np is None else lambda operand: getattr(np, name)(np.radians(operand))
+    return Operation(name, 1, lambda operand: function(math.radians(operand)), 4, errors=_INFINITE_ANGLE,
+                     vectorised=vectorised)
+
+
+OPERATIONS = OperationRegistry()
+
+for _operation in (
+        Operation("n", 1, operator.neg, 1, kind="internal", vectorised=_numpy("negative"), template="-{0}"),
+        _trigonometric("cos"),
+        _trigonometric("sin"),
+        Operation("sqrt", 1, math.sqrt, 3, errors={ValueError: "sqrt(x) is defined for positive input only!"},
+                  vectorised=_numpy("sqrt"), strict=True),
+        Operation("+", 2, operator.add, 1, kind="operator", vectorised=_numpy("add"), commutative=True,
+                  template="{0} + {1}"),
+        Operation("-", 2, operator.sub, 1, kind="operator", vectorised=_numpy("subtract"), template="{0} - {1}"),
+        Operation("*", 2, operator.mul, 2, kind="operator", vectorised=_numpy("multiply"), commutative=True,
+                  template="{0} * {1}"),
+        Operation("/", 2, operator.truediv, 2, kind="operator", vectorised=_numpy("divide"), strict=True,
+                  template="{0} / {1}"),
+        # Exponentiation is evaluated from left to right, e.g. 2**3**2 = (2**3)**2
+        Operation("**", 2, operator.pow, 3, kind="operator", vectorised=_numpy("power"), strict=True,
+                  template="{0} ** {1}"),
+        Operation("min", 2, min, 3, vectorised=_numpy("minimum"), commutative=True),
+        Operation("max", 2, max, 3, vectorised=_numpy("maximum"), commutative=True),
+        ):
+    OPERATIONS.register(_operation)
+
+
+def register_operation(symbol: str, arity: int, implementation, precedence: int = 3, **options) -> Operation:
+    """Registers a new function (or operator) in the default registry used by all stages of the calculator.
+    The objects of the calculator (e.g. the ExpressionCompiler) should be created after the registration.
+
+    Args:
+        symbol -- the name of the function, lowercase letters a-z
+        arity -- the number of arguments, 1 or 2
+        implementation -- a function that calculates the operation on floats
+        precedence -- the precedence used in the Shunting-Yard conversion
+        options -- the other attributes of the Operation (associativity, kind, errors, vectorised, strict, template,
+            commutative)
+
+    Returns: The registered Operation
+    """
+    return OPERATIONS.register(Operation(symbol, arity, implementation, precedence, **options))
@@ -0,0 +1,99 @@
+"""Evaluates large batches of expressions in parallel processes. The expressions are pure Python CPU
+work, so processes (instead of threads) are used to make use of several cores.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from .expression_compiler import ExpressionCompiler
+from .exceptions import InvalidExpressionException
+
+
+# Each worker process compiles the expressions with its own compiler (and cache)
+_WORKER_COMPILER = None
+WORKER_CACHE_SIZE = 1024
+
+
+def _initialise_worker(cache_dir: str | None = None):
+    global _WORKER_COMPILER  # pylint: disable=global-statement
+    _WORKER_COMPILER = ExpressionCompiler(cache_size=WORKER_CACHE_SIZE, cache_dir=cache_dir)
+
+def _evaluate_chunk(expressions: list, variables: dict | None) -> list:
+    """Evaluates a chunk of expressions in a worker process.
+
+    Args:
+        expressions -- the mathematical expressions to evaluate
+        variables -- the values of the variables used in the expressions
+
+    Returns: A list containing a tuple (result, error message) for each expression, where one is None
+    """
+    results = []
+
+    for expression in expressions:
+        try:
+            compiled = _WORKER_COMPILER.compile(expression)
+            if compiled.var_to_set:
+                raise InvalidExpressionException("Variables cannot be set when evaluating in parallel!")
+            results.append((compiled.evaluate(variables), None))
+
+        except InvalidExpressionException as e:
+            results.append((None, str(e)))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # An unexpected error only fails the expression that caused it, not the whole chunk
+            results.append((None, f"Unexpected error: {e}"))
+
+    return results
+
+
+class ParallelEvaluator:
+    """The class shards a stream of expressions into chunks that are evaluated by a pool of worker
+    processes. Each worker has its own InputValidator, ShuntingYard and RPNEvaluator (through an
+    ExpressionCompiler). The results are returned in the same order as the expressions. At most
+    max_pending chunks are being evaluated or waiting at a time, so the memory used stays bounded
+    regardless of the length of the stream.
+
+    Attributes:
+        workers (int): The number of worker processes
+        chunk_size (int): The number of expressions sent to a worker at a time
+        max_pending (int): The maximum number of chunks submitted but not yet returned
+        cache_dir (str): A directory of compiled programs shared by the workers, or None
+
+    Methods:
+        evaluate(expressions, variables): Returns an iterator of the results in the input order
+    """
+    def __init__(self, workers: int | None = None, chunk_size: int = 1000, max_pending: int | None = None,
+                 cache_dir: str | None = None):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending
+        self.cache_dir = cache_dir
+
+    def evaluate(self, expressions, variables: dict | None = None):
+        """Evaluates the expressions in parallel. Expressions are read from the iterable only as fast as
+        the results are consumed (plus the pending chunks).
+
+        Args:
+            expressions -- an iterable of mathematical expressions (str)
+            variables -- the values of the variables used in the expressions (same for all expressions)
+
+        Returns: A generator of tuples (result, error message) in the order of the expressions
+        """
+        expressions = iter(expressions)
+        pending = deque()
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_initialise_worker,
+                                 initargs=(self.cache_dir,)) as executor:
+            # The executor uses one process per CPU by default
+            max_pending = self.max_pending or 2 * (self.workers or os.cpu_count() or 1)
+
+            while True:
+                while len(pending) < max_pending:
+                    chunk = list(islice(expressions, self.chunk_size))
+                    if not chunk:
+                        break
+                    pending.append(executor.submit(_evaluate_chunk, chunk, variables))
+
+                if not pending:
+                    return
+
+                yield from pending.popleft().result()
@@ -0,0 +1,64 @@
+"""A size-bounded least recently used (LRU) cache for compiled expressions. Because variables are kept in
+the compiled programs and bound only at evaluation time, the cached programs stay valid when the values
+of the variables change.
+"""
+from collections import OrderedDict
+
+
+class ParseCache:
+    """An LRU cache that maps expression strings to their compiled form. When the cache is full, the
+    expression that was used least recently is removed.
+
+    Attributes:
+        max_size (int): The maximum number of expressions held in the cache
+        hits (int): The number of lookups that found the expression in the cache
+        misses (int): The number of lookups that did not find the expression in the cache
+        _entries (OrderedDict): The cached expressions ordered from least to most recently used
+
+    Methods:
+        get(expression): Returns the cached item for the expression or None
+        put(expression, item): Adds the item to the cache and removes the least recently used if necessary
+        clear: Removes all items from the cache
+        hit_rate: Returns the share of lookups that were found in the cache
+    """
+    def __init__(self, max_size: int = 1024):
+        if max_size < 1:
+            raise ValueError("The cache size must be at least 1")
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, expression: str):
+        return expression in self._entries
+
+    def get(self, expression: str):
+        item = self._entries.get(expression)
+
+        if item is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(expression)
+        self.hits += 1
+        return item
+
+    def put(self, expression: str, item):
+        self._entries[expression] = item
+        self._entries.move_to_end(expression)
+
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
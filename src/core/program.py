@@ -0,0 +1,167 @@
+"""A compact representation of an RPN/postfix program. Instead of a tuple of strings and floats, the program
+is stored as an array of one-byte opcodes and an array of the numbers (constants) in the program.
+"""
+import string
+from array import array
+from .exceptions import InvalidExpressionException
+from .operations import OPERATIONS
+
+
+# Opcode of a number: the value is the next unused item in the constant pool
+CONST = 0
+# Opcodes 1-31 are operations with one operand, 32-63 operations with two operands. The opcodes of the
+# operations are given by the operation registry
+FIRST_UNARY = 1
+FIRST_BINARY = 32
+# Opcodes 64-89 load the variables A-Z
+LOAD_VAR = 64
+
+VARIABLE_OPCODES = {variable: LOAD_VAR + index for index, variable in enumerate(string.ascii_uppercase)}
+
+
+def opcode_of(token: str) -> int | None:
+    """Returns the opcode of an operation or a variable, or None if the token is not recognised."""
+    opcode = VARIABLE_OPCODES.get(token)
+    return opcode if opcode is not None else OPERATIONS.opcodes.get(token)
+
+def symbol_of(opcode: int) -> str | None:
+    """Returns the token of an operation or a variable opcode, or None if the opcode is not in use."""
+    if opcode >= LOAD_VAR:
+        return string.ascii_uppercase[opcode - LOAD_VAR] if opcode < LOAD_VAR + 26 else None
+    operation = OPERATIONS.by_opcode[opcode] if opcode > CONST else None
+    return operation.symbol if operation is not None else None
+
+
+class Program:
+    """An RPN/postfix program stored as an array of opcodes (array('B')) and a constant pool (array('d')).
+    Each number in the program is the opcode CONST, and the numbers are stored in the constant pool in
+    the order they appear in the program. The program is checked when it is created, so every operation
+    has enough operands and the maximum depth of the evaluation stack is known before evaluation.
+
+    Iterating over a Program gives the same tokens as the tuple program it was created from.
+
+    Attributes:
+        opcodes (array): The opcodes of the program, one byte per token
+        constants (array): The numbers in the program as doubles
+        stack_depth (int): The maximum depth of the evaluation stack needed by the program
+
+    Methods:
+        from_tokens(tokens): Creates a Program from the tokens of an RPN/postfix program
+        tokens: Returns the program as a tuple of tokens
+        variables: Returns the variables A-Z used in the program
+        variable_names: Returns the variables A-Z used in the program in alphabetical order
+    """
+    __slots__ = ("opcodes", "constants", "stack_depth", "_variable_names", "_hash")
+
+    def __init__(self, opcodes: array, constants: array):
+        self.opcodes = opcodes
+        self.constants = constants
+        self.stack_depth = self._analyse()
+        self._variable_names = None
+        self._hash = None
+
+    @classmethod
+    def from_tokens(cls, tokens) -> "Program":
+        """Encodes the tokens of an RPN/postfix program (e.g. (1.0, 'A', '+')) as opcodes and constants.
+
+        Args:
+            tokens -- tokens that form an RPN/postfix mathematical expression
+
+        Returns: A Program or error if a token is not recognised or the program is not well-formed
+        """
+        opcodes = []
+        constants = []
+
+        for token in tokens:
+            if isinstance(token, float):
+                opcodes.append(CONST)
+                constants.append(token)
+                continue
+
+            opcode = opcode_of(token) if isinstance(token, str) else None
+            if opcode is None:
+                raise InvalidExpressionException(f"Unrecognised token: {token}")
+            opcodes.append(opcode)
+
+        # The arrays are created from complete lists so that they are not over-allocated
+        return cls(array("B", opcodes), array("d", constants))
+
+    def __reduce__(self):
+        # The memoised hash is not pickled, as the hashes of bytes differ between processes
+        return (Program, (self.opcodes, self.constants))
+
+    def __iter__(self):
+        constant_index = 0
+        for opcode in self.opcodes:
+            if opcode == CONST:
+                yield self.constants[constant_index]
+                constant_index += 1
+            else:
+                yield symbol_of(opcode)
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def __repr__(self):
+        return f"Program({list(self)!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Program):
+            return NotImplemented
+        # The constants are compared as bytes like in the hash, so 0.0 and -0.0 are different constants
+        return (self.opcodes.tobytes() == other.opcodes.tobytes()
+                and self.constants.tobytes() == other.constants.tobytes())
+
+    def __hash__(self):
+        # The hash is calculated once, as programs are used as keys of the result cache on every evaluation
+        if self._hash is None:
+            self._hash = hash((self.opcodes.tobytes(), self.constants.tobytes()))
+        return self._hash
+
+    def tokens(self) -> tuple:
+        return tuple(self)
+
+    def variables(self) -> frozenset:
+        return frozenset(self.variable_names())
+
+    def variable_names(self) -> tuple:
+        # The variables are found on the first call, as a program is not modified after it is created
+        if self._variable_names is None:
+            self._variable_names = tuple(sorted({symbol_of(opcode) for opcode in self.opcodes if opcode >= LOAD_VAR}))
+        return self._variable_names
+
+    def _analyse(self) -> int:  # pylint: disable=too-many-statements
+        """Simulates the depth of the evaluation stack to check that every operation has enough operands,
+        that exactly one value is left at the end and that the constant pool matches the opcodes.
+
+        Returns: The maximum depth of the evaluation stack or error if the program is not well-formed
+        """
+        if not self.opcodes:
+            raise InvalidExpressionException("No tokens to evaluate!")
+
+        unknown_opcodes = {opcode for opcode in set(self.opcodes) if opcode != CONST and symbol_of(opcode) is None}
+        if unknown_opcodes:
+            raise InvalidExpressionException(f"Unrecognised opcode: {min(unknown_opcodes)}")
+
+        depth = 0
+        max_depth = 0
+
+        for opcode in self.opcodes:
+            if opcode == CONST or opcode >= LOAD_VAR:
+                depth += 1
+                max_depth = max(max_depth, depth)
+            elif opcode < FIRST_BINARY:
+                if depth < 1:
+                    raise InvalidExpressionException("Not enough operands, one required")
+            else:
+                if depth < 2:
+                    raise InvalidExpressionException("Not enough operands, two required")
+                depth -= 1
+
+        if depth != 1:
+            raise InvalidExpressionException("Too many items left in stack! Did you perhaps forget an operator?")
+
+        if self.opcodes.count(CONST) != len(self.constants):
+            raise InvalidExpressionException("The constant pool does not match the program")
+
+        return max_depth
@@ -12,6 +12,7 @@ class Queue:
         enqueue(token): Adds the token to the end of the queue
         dequeue: Removes and returns the token at the start (left) of the queue
         is_empty: Returns True if the queue has no items, False if it does
+        to_tuple: Returns the tokens as a tuple without removing them from the queue
     """
     def __init__(self):
         self._tokens = deque()
@@ -27,3 +28,6 @@ class Queue:
 
     def is_empty(self):
         return len(self._tokens) == 0
+
+    def to_tuple(self) -> tuple:
+        return tuple(self._tokens)
@@ -0,0 +1,183 @@
+"""A size-bounded cache of evaluation results. A result depends only on the program and the values of the
+variables the program uses, so the results are keyed by the program and the values of those variables
+and a change to any other variable does not invalidate them.
+"""
+import struct
+from collections import OrderedDict
+from .program import Program
+
+
+POLICIES = ("lru", "tinylfu")
+
+# Multipliers for deriving the four counter positions of a key in the frequency sketch from its hash
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5)
+
+
+class FrequencySketch:
+    """A count-min sketch that estimates how often each key has been seen using a fixed amount of memory.
+    Each key increments one small counter (at most 15) in each of four rows, and the estimate is the
+    smallest of the four counters, so collisions with other keys can only make the estimate too large.
+    After a sample of ten times the cache size, all counters are halved so that the estimates follow
+    the recent frequencies.
+
+    Attributes:
+        width (int): The number of counters in each row, a power of two at least the size of the cache (and
+            at least 64, so that the keys of a small cache rarely share counters)
+        additions (int): The number of keys added since the counters were last halved
+
+    Methods:
+        add(key): Increments the counters of the key
+        estimate(key): Returns the estimated frequency of the key
+    """
+    def __init__(self, size: int):
+        self.width = 1 << (max(size, 64) - 1).bit_length()
+        self.additions = 0
+        self._sample_size = 10 * size
+        self._counters = bytearray(4 * self.width)
+        # The offset of each row in the counters and the multiplier of the row
+        self._rows = tuple((row * self.width, seed) for row, seed in enumerate(_SEEDS))
+
+    def _positions(self, key) -> list:
+        key_hash = hash(key)
+        mask = self.width - 1
+        return [offset + (((key_hash * seed) >> 32) & mask) for offset, seed in self._rows]
+
+    def add(self, key):
+        counters = self._counters
+        for position in self._positions(key):
+            if counters[position] < 15:
+                counters[position] += 1
+
+        self.additions += 1
+        if self.additions >= self._sample_size:
+            self._counters = bytearray(counter >> 1 for counter in counters)
+            self.additions //= 2
+
+    def estimate(self, key) -> int:
+        return min(self._counters[position] for position in self._positions(key))
+
+
+class ResultCache:
+    """A cache of the results of evaluated programs. The key of a result is the program together with the
+    values of the variables the program uses, so e.g. the result of 'A*2' is found again when A has the
+    same value, whatever the values of the other variables. Only successful evaluations are stored.
+
+    When the cache is full, the least recently used result is removed to make room for a new one. With
+    the 'lru' policy a new result is always stored. With the 'tinylfu' policy the frequency of every key
+    looked up is estimated with a FrequencySketch, and a new result replaces the least recently used one
+    only if its key has been looked up more often, so a stream of one-off evaluations does not push the
+    frequently evaluated results out of the cache.
+
+    Attributes:
+        max_size (int): The maximum number of results held in the cache
+        policy (str): The eviction policy, 'lru' or 'tinylfu'
+        hits (int): The number of evaluations whose result was found in the cache
+        misses (int): The number of evaluations whose result was not found in the cache
+
+    Methods:
+        evaluate(program, variables, evaluate): Returns the cached result or evaluates the program and
+            stores the result
+        key(program, variables): Returns the key of an evaluation, or None if it cannot be cached
+        get(key): Returns the cached result for a key or None
+        put(key, result): Adds a result to the cache
+        clear: Removes all results from the cache
+        hit_rate: Returns the share of lookups that were found in the cache
+    """
+    def __init__(self, max_size: int = 1024, policy: str = "lru"):
+        if max_size < 1:
+            raise ValueError("The cache size must be at least 1")
+        if policy not in POLICIES:
+            raise ValueError(f"The eviction policy must be one of {', '.join(POLICIES)}")
+
+        self.max_size = max_size
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._sketch = FrequencySketch(max_size) if policy == "tinylfu" else None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def evaluate(self, program: Program, variables: dict | None, evaluate, executable=None):
+        """Returns the result of the program with the variable values from the cache, or evaluates the
+        program and stores the result. Evaluations that fail or that lack a variable are not stored.
+
+        Args:
+            program -- the Program that is evaluated
+            variables -- a dictionary containing the values of the variables A-Z
+            evaluate -- a function that takes the program (or the executable) and the variables and returns
+                the result
+            executable -- another form of the program given to the evaluate function instead of the
+                program (e.g. a FusedProgram), or None
+
+        Returns: The end result of the calculation or error
+        """
+        executable = program if executable is None else executable
+        key = self.key(program, variables)
+        if key is None:
+            return evaluate(executable, variables)
+
+        result = self.get(key)
+        if result is None:
+            result = evaluate(executable, variables)
+            self.put(key, result)
+        return result
+
+    @staticmethod
+    def key(program: Program, variables: dict | None) -> tuple | None:
+        """Returns the key of evaluating a program with the given variables: the program and the values of
+        the variables it uses as floats, packed into bytes so that e.g. 0.0 and -0.0 are different keys.
+
+        Returns: The key, or None if a variable used by the program is not defined or is not a number
+        """
+        names = program.variable_names()
+        if not names:
+            return (program, b"")
+
+        try:
+            values = struct.pack(f"<{len(names)}d", *[float(variables[name]) for name in names])
+        except (TypeError, KeyError, ValueError, OverflowError):
+            return None
+        return (program, values)
+
+    def get(self, key):
+        if self._sketch is not None:
+            self._sketch.add(key)
+
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        if key in self._entries:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            return
+
+        if len(self._entries) >= self.max_size:
+            victim = next(iter(self._entries))
+            if self._sketch is not None and self._sketch.estimate(key) <= self._sketch.estimate(victim):
+                return
+            del self._entries[victim]
+
+        self._entries[key] = result
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        if self._sketch is not None:
+            self._sketch = FrequencySketch(self.max_size)
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
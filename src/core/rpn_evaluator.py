@@ -1,9 +1,13 @@
 """The PRN evaluator used for evaluating a RPN/postfix notation mathematical expression.
 """
-import math
-from .stack import Stack
+import string
 from .queue import Queue
+from .program import Program, CONST, FIRST_BINARY, LOAD_VAR
+from .operations import OPERATIONS, np  # np is None if NumPy is not installed
 from .exceptions import InvalidExpressionException
+from .result_cache import ResultCache
+from .superinstructions import (FusedProgram, PUSH_CONST, PUSH_VAR, UNARY, BINARY, VAR_VAR_BINARY,
+                                VAR_CONST_BINARY, CONST_VAR_BINARY, VAR_BINARY, CONST_BINARY, VAR_UNARY)
 
 
 class RPNEvaluator:
@@ -21,68 +25,209 @@ class RPNEvaluator:
     calculation includes division with zero, taking a square root of a negative nmuber, or an overly
     large calculation.
 
+    The operations and their implementations are taken from the operation registry (operations.py).
+
     Attributes:
-        operators (set): A set containing the allowed operators for the calculations
-        one_arg_functions (set): A set containing the allowed one-argument functions for the calculations
-        two_arg_functions (set): A set containing the allowed two-argument functions for the calculations
+        one_operand_operations (dict): The implementations of the operations with one operand by symbol
+        two_operand_operations (dict): The implementations of the operations with two operands by symbol
+        opcode_operations (list): The implementations of the operations indexed by their opcode
+        variables (set): A set containing the variables A-Z whose values are bound at evaluation time
+        result_cache (ResultCache): Returns the results of programs already evaluated with the same values
+            of their variables, or None if the results are always calculated
 
     Methods:
-        evaluate_rpn_expression (tokens): Converts tokens (Queue object) forming an infix expression into RPN/postfix
-        apply_operator (function, operand1, operand2):
-        apply_one_arg_function (function, operand):
-        apply_two_arg_function (function, operand1, operand2):
+        evaluate_rpn_expression (tokens, variables): Evaluates the tokens (Queue object) of an RPN expression
+        evaluate_rpn_program (program, variables): Evaluates an RPN/postfix program (tuple) without consuming it
+        analyse_program (program): Checks the arity of the operations and returns the maximum stack depth
+        evaluate_analysed_program (program, stack_depth, variables): Evaluates an analysed program on a
+            preallocated stack without checking the number of operands
+        evaluate_program (program, variables): Evaluates a Program of opcodes and constants
+        evaluate_fused (fused, variables): Evaluates a FusedProgram of superinstructions
+        evaluate_rpn_batch (program, variables): Evaluates an RPN/postfix program for columns of variable values
     """
-    def __init__(self):
-        self.one_operand_operations = set(["n", "cos", "sin", "sqrt"])  # 'n' is unary negation
-        self.two_operand_operations = set(["+", "-", "*", "/", "**", "min", "max"])
+    def __init__(self, result_cache: ResultCache | None = None):
+        # The checked implementations raise the errors specific to the operation (e.g. sqrt of a negative number)
+        self.one_operand_operations = {operation.symbol: operation.checked for operation in OPERATIONS
+                                       if operation.arity == 1}
+        self.two_operand_operations = {operation.symbol: operation.checked for operation in OPERATIONS
+                                       if operation.arity == 2}
+        self.opcode_operations = [operation.checked if operation else None for operation in OPERATIONS.by_opcode]
+        self.variables = set(string.ascii_uppercase)
+        self.result_cache = result_cache
 
-    def evaluate_rpn_expression(self, tokens: Queue):  # pylint: disable=too-many-statements
+    def evaluate_rpn_expression(self, tokens: Queue, variables: dict | None = None):
         """Evaluates an RPN/postfix expression (token by token) and returns the end result of the calculation.
-        Uses an evaluation stack to handle the tokens. The last item left in the stack will be the end result.
+        The tokens are removed from the queue as they are evaluated. Variables A-Z in the expression are
+        loaded from the given variables.
 
         Args:
             tokens -- tokens that form an RPN/postfix mathematical expression
+            variables -- a dictionary containing the values of any variables A-Z in the expression
 
-        Returns: The only object in the evaluation stack or error
+        Returns: The end result of the calculation or error
         """
-        evaluation_stack = Stack()
-
-        if tokens.is_empty():
-            raise InvalidExpressionException("No tokens to evaluate!")
+        program = []
 
         while not tokens.is_empty():
-            token = tokens.dequeue()
+            program.append(tokens.dequeue())
 
-            if isinstance(token, float):
-                evaluation_stack.enqueue(token)
-                continue
+        return self.evaluate_rpn_program(tuple(program), variables)
 
-            if token in self.one_operand_operations:
-                if evaluation_stack.get_size() < 1:
-                    raise InvalidExpressionException("Not enough operands, one required")
+    def evaluate_rpn_program(self, program: tuple, variables: dict | None = None):
+        """Evaluates an RPN/postfix program (token by token) and returns the end result of the calculation.
+        The program is first analysed to check that it is well-formed and to find the depth of the
+        evaluation stack it needs. The program is not modified, so the same program can be evaluated any
+        number of times.
 
-                operand = evaluation_stack.dequeue()
+        Args:
+            program -- tokens that form an RPN/postfix mathematical expression
+            variables -- a dictionary containing the values of any variables A-Z in the program
 
-                result = self._apply_operation(token, None, operand)
-                evaluation_stack.enqueue(result)
+        Returns: The end result of the calculation or error
+        """
+        return self.evaluate_analysed_program(program, self.analyse_program(program), variables)
 
-            elif token in self.two_operand_operations:
-                if evaluation_stack.get_size() < 2:
-                    raise InvalidExpressionException("Not enough operands, two required")
+    def analyse_program(self, program: tuple) -> int:
+        """Checks the arity of every operation in an RPN/postfix program by simulating the depth of the
+        evaluation stack, without calculating anything. A program that passes the analysis can be
+        evaluated without checking the number of operands for each operation.
+
+        Args:
+            program -- tokens that form an RPN/postfix mathematical expression
+
+        Returns: The maximum depth of the evaluation stack needed by the program or error if the program
+            is not well-formed
+        """
+        if not program:
+            raise InvalidExpressionException("No tokens to evaluate!")
+
+        depth = 0
+        max_depth = 0
 
-                operand2 = evaluation_stack.dequeue()
-                operand1 = evaluation_stack.dequeue()
+        for token in program:
+            if isinstance(token, float) or token in self.variables:
+                depth += 1
+                max_depth = max(max_depth, depth)
 
-                result = self._apply_operation(token, operand1, operand2)
-                evaluation_stack.enqueue(result)
+            elif token in self.one_operand_operations:
+                if depth < 1:
+                    raise InvalidExpressionException("Not enough operands, one required")
+
+            elif token in self.two_operand_operations:
+                if depth < 2:
+                    raise InvalidExpressionException("Not enough operands, two required")
+                depth -= 1
 
             else:
                 raise InvalidExpressionException(f"Unrecognised token: {token}")
 
-        if evaluation_stack.get_size() != 1:
+        if depth != 1:
             raise InvalidExpressionException("Too many items left in stack! Did you perhaps forget an operator?")
 
-        end_result = evaluation_stack.peek()
+        return max_depth
+
+    def evaluate_analysed_program(self, program: tuple, stack_depth: int, variables: dict | None = None):  # pylint: disable=too-many-statements
+        """Evaluates an RPN/postfix program that has been checked with analyse_program(). The evaluation
+        stack is a list preallocated to the depth found in the analysis and the top of the stack is kept
+        in an index, so the number of operands is not checked during the evaluation.
+
+        Args:
+            program -- tokens that form a well-formed RPN/postfix mathematical expression
+            stack_depth -- the maximum depth of the evaluation stack returned by analyse_program()
+            variables -- a dictionary containing the values of any variables A-Z in the program
+
+        Returns: The end result of the calculation or error
+        """
+        evaluation_stack = [0.0] * stack_depth
+        one_operand_operations = self.one_operand_operations
+        two_operand_operations = self.two_operand_operations
+        top = -1
+
+        try:
+            for token in program:
+                if isinstance(token, float):
+                    top += 1
+                    evaluation_stack[top] = token
+
+                elif token in two_operand_operations:
+                    top -= 1
+                    evaluation_stack[top] = two_operand_operations[token](
+                        evaluation_stack[top], evaluation_stack[top + 1]
+                        )
+
+                elif token in one_operand_operations:
+                    evaluation_stack[top] = one_operand_operations[token](evaluation_stack[top])
+
+                else:
+                    top += 1
+                    evaluation_stack[top] = self._bind_variable(token, variables)
+
+        except OverflowError as e:
+            raise InvalidExpressionException(
+                "Maximum data limit exceeded! Please try a smaller calculation."
+            ) from e
+        except ZeroDivisionError as e:
+            raise InvalidExpressionException("Division with zero undefined!") from e
+        except TypeError as e:
+            # A function of math or a comparison in min/max was given a complex operand
+            raise InvalidExpressionException("Complex numbers are not supported") from e
+
+        end_result = evaluation_stack[0]
+
+        if isinstance(end_result, complex):
+            raise InvalidExpressionException("Complex numbers are not supported")
+
+        if end_result.is_integer():
+            return int(end_result)
+        return round(end_result, 10)
+
+    def evaluate_program(self, program: Program, variables: dict | None = None):
+        """Evaluates a Program of opcodes and constants. The opcodes are dispatched by indexing a list of
+        the operations, and the stack is preallocated to the depth found when the program was created. If
+        the result cache is in use, a result already calculated with the same values of the variables
+        used by the program is returned without evaluating the program again.
+
+        Args:
+            program -- a Program that forms an RPN/postfix mathematical expression
+            variables -- a dictionary containing the values of any variables A-Z in the program
+
+        Returns: The end result of the calculation or error
+        """
+        if self.result_cache is not None:
+            return self.result_cache.evaluate(program, variables, self._execute_program)
+        return self._execute_program(program, variables)
+
+    def _execute_program(self, program: Program, variables: dict | None):  # pylint: disable=too-many-statements
+        evaluation_stack = [0.0] * program.stack_depth
+        operations = self.opcode_operations
+        constants = iter(program.constants)
+        top = -1
+
+        try:
+            for opcode in program.opcodes:
+                if opcode == CONST:
+                    top += 1
+                    evaluation_stack[top] = next(constants)
+                elif opcode >= LOAD_VAR:
+                    top += 1
+                    evaluation_stack[top] = self._bind_variable(string.ascii_uppercase[opcode - LOAD_VAR], variables)
+                elif opcode >= FIRST_BINARY:
+                    top -= 1
+                    evaluation_stack[top] = operations[opcode](evaluation_stack[top], evaluation_stack[top + 1])
+                else:
+                    evaluation_stack[top] = operations[opcode](evaluation_stack[top])
+
+        except OverflowError as e:
+            raise InvalidExpressionException(
+                "Maximum data limit exceeded! Please try a smaller calculation."
+            ) from e
+        except ZeroDivisionError as e:
+            raise InvalidExpressionException("Division with zero undefined!") from e
+        except TypeError as e:
+            # A function of math or a comparison in min/max was given a complex operand
+            raise InvalidExpressionException("Complex numbers are not supported") from e
+
+        end_result = evaluation_stack[0]
 
         if isinstance(end_result, complex):
             raise InvalidExpressionException("Complex numbers are not supported")
@@ -91,44 +236,196 @@ class RPNEvaluator:
             return int(end_result)
         return round(end_result, 10)
 
-    def _apply_operation(self, function: str, operand1: float, operand2: float):  # pylint: disable=too-many-return-statements
-        """Apply a function or operator on two operands (i.e. numbers).
+    def evaluate_fused(self, fused: FusedProgram, variables: dict | None = None):
+        """Evaluates a program whose frequent opcode sequences have been fused into superinstructions, so
+        that there is one dispatch per instruction instead of one per token. The variables are bound once
+        before the evaluation. If a variable cannot be bound, the program is evaluated token by token as
+        in evaluate_program(), so that the errors are raised in the same order. The result cache is used
+        as in evaluate_program().
+
+        Args:
+            fused -- a FusedProgram that forms an RPN/postfix mathematical expression
+            variables -- a dictionary containing the values of any variables A-Z in the program
+
+        Returns: The end result of the calculation or error
+        """
+        if self.result_cache is not None:
+            return self.result_cache.evaluate(fused.program, variables, self._execute_fused, fused)
+        return self._execute_fused(fused, variables)
+
+    def _execute_fused(self, fused: FusedProgram, variables: dict | None):  # pylint: disable=too-many-statements,too-many-branches
+        try:
+            values = [float(variables[name]) for name in fused.variable_names]
+        except (TypeError, KeyError, ValueError, OverflowError):
+            return self._execute_program(fused.program, variables)
+
+        evaluation_stack = [0.0] * fused.stack_depth
+        top = -1
+
+        try:
+            # The instructions are tested roughly in the order of their frequency
+            for kind, operation, first, second in fused.instructions:
+                if kind == BINARY:
+                    top -= 1
+                    evaluation_stack[top] = operation(evaluation_stack[top], evaluation_stack[top + 1])
+                elif kind == VAR_VAR_BINARY:
+                    top += 1
+                    evaluation_stack[top] = operation(values[first], values[second])
+                elif kind == CONST_BINARY:
+                    evaluation_stack[top] = operation(evaluation_stack[top], first)
+                elif kind == VAR_BINARY:
+                    evaluation_stack[top] = operation(evaluation_stack[top], values[first])
+                elif kind == UNARY:
+                    evaluation_stack[top] = operation(evaluation_stack[top])
+                elif kind == VAR_CONST_BINARY:
+                    top += 1
+                    evaluation_stack[top] = operation(values[first], second)
+                elif kind == VAR_UNARY:
+                    top += 1
+                    evaluation_stack[top] = operation(values[first])
+                elif kind == CONST_VAR_BINARY:
+                    top += 1
+                    evaluation_stack[top] = operation(first, values[second])
+                elif kind == PUSH_VAR:
+                    top += 1
+                    evaluation_stack[top] = values[first]
+                elif kind == PUSH_CONST:
+                    top += 1
+                    evaluation_stack[top] = first
+                else:  # CONST_UNARY
+                    top += 1
+                    evaluation_stack[top] = operation(first)
+
+        except OverflowError as e:
+            raise InvalidExpressionException(
+                "Maximum data limit exceeded! Please try a smaller calculation."
+            ) from e
+        except ZeroDivisionError as e:
+            raise InvalidExpressionException("Division with zero undefined!") from e
+        except TypeError as e:
+            # A function of math or a comparison in min/max was given a complex operand
+            raise InvalidExpressionException("Complex numbers are not supported") from e
+
+        end_result = evaluation_stack[0]
+
+        if isinstance(end_result, complex):
+            raise InvalidExpressionException("Complex numbers are not supported")
+
+        if end_result.is_integer():
+            return int(end_result)
+        return round(end_result, 10)
+
+    def evaluate_rpn_batch(self, program: tuple, variables: dict | None = None, rounded: bool = True) -> tuple:  # pylint: disable=too-many-statements
+        """Evaluates an RPN/postfix program for whole columns of variable values in one pass using NumPy
+        array operations. Errors in the calculation (division with zero, square root of a negative number,
+        overly large calculation or complex result) do not raise an exception, but the failing rows are
+        marked in an error mask instead. Errors in the program itself (e.g. not enough operands) are raised.
+
+        Args:
+            program -- tokens that form an RPN/postfix mathematical expression
+            variables -- a dictionary containing a NumPy array (or sequence) of values for each variable
+            rounded -- if False, the results are not rounded to 10 decimals (e.g. to round each result the
+                same way as evaluate_program() does)
+
+        Returns: A tuple containing an array of results (NaN for failed rows) and a boolean error mask
+        """
+        if np is None:
+            raise ModuleNotFoundError("NumPy is required for batch evaluation")
+
+        stack_depth = self.analyse_program(program)
+        columns = {key: np.asarray(values, dtype=float) for key, values in (variables or {}).items()}
+        shape = np.broadcast_shapes(*(column.shape for column in columns.values()))
+        errors = np.zeros(shape, dtype=bool)
+        evaluation_stack = [None] * stack_depth
+        top = -1
+
+        with np.errstate(all="ignore"):
+            for token in program:
+                if isinstance(token, float):
+                    top += 1
+                    evaluation_stack[top] = np.float64(token)
+
+                elif token in self.two_operand_operations:
+                    top -= 1
+                    evaluation_stack[top] = self._apply_batch_operation(
+                        token, evaluation_stack[top], evaluation_stack[top + 1], errors
+                        )
+
+                elif token in self.one_operand_operations:
+                    evaluation_stack[top] = self._apply_batch_operation(token, None, evaluation_stack[top], errors)
+
+                else:
+                    if token not in columns:
+                        raise InvalidExpressionException(f"The variable {token} has not been defined!")
+                    top += 1
+                    evaluation_stack[top] = columns[token]
+
+        results = np.broadcast_to(evaluation_stack[0], shape)
+        if rounded:
+            results = np.round(results, 10)
+        return (np.where(errors, np.nan, results), errors)
+
+    def _apply_batch_operation(self, function: str, operand1, operand2, errors):
+        """Apply a function or operator on two arrays of operands with its NumPy implementation from the
+        operation registry. For operations whose result must be a finite number (e.g. division), the rows
+        where the result is not finite although the operands are finite are marked in the error mask.
+
+        Args:
+            function -- name of the function (may be an operator) to be applied
+            operand1 -- an array of numbers that the operator takes as first input (None for one operand)
+            operand2 -- an array of numbers that the operator takes as second input
+            errors -- the boolean error mask that is updated in place
+
+        Returns: An array containing the results of the operation performed
+        """
+        operation = OPERATIONS.get(function)
+
+        if operation.vectorised is None:
+            raise InvalidExpressionException(f"{function} cannot be used in batch evaluation")
+
+        if operation.arity == 1:
+            result = operation.vectorised(operand2)
+            finite_operands = np.isfinite(operand2)
+        else:
+            result = operation.vectorised(operand1, operand2)
+            finite_operands = np.isfinite(operand1) & np.isfinite(operand2)
+
+        if operation.strict:
+            # Division with zero, overflow and results that are not real numbers are not finite
+            errors |= ~np.isfinite(result) & finite_operands
+        return result
+
+    def _bind_variable(self, variable: str, variables: dict | None) -> float:
+        """Looks up the value of a variable at evaluation time.
+
+        Args:
+            variable -- a capital letter A-Z
+            variables -- a dictionary containing the values of the variables
+
+        Returns: The value of the variable as float or error if it has not been defined or is not a number
+        """
+        if not variables or variable not in variables:
+            raise InvalidExpressionException(f"The variable {variable} has not been defined!")
+        try:
+            return float(variables[variable])
+        except (TypeError, ValueError) as e:
+            raise InvalidExpressionException(f"The value of the variable {variable} is not a number!") from e
+
+    def _apply_operation(self, function: str, operand1: float, operand2: float):
+        """Apply a function or operator on two operands (i.e. numbers) by looking up its implementation in
+        the dispatch tables.
 
         Args:
             function -- name of the function (may be an operator) to be applied
-            operand1 -- a number that the operator takes as first input
+            operand1 -- a number that the operator takes as first input (None for one operand operations)
             operand2 -- a number that the operator takes as second input
 
         Returns: The result of the operation performed
         """
         try:
-            match function:
-                case "+":
-                    return operand1 + operand2
-                case "-":
-                    return operand1 - operand2
-                case "*":
-                    return operand1 * operand2
-                case "/":
-                    return operand1 / operand2
-                case "**":
-                    return operand1 ** operand2
-                case "sqrt":
-                    try:
-                        return math.sqrt(operand2)
-                    except ValueError as e:
-                        raise InvalidExpressionException(
-                            "sqrt(x) is defined for positive input only!") from e
-                case "n":
-                    return -operand2
-                case "cos":
-                    return math.cos(math.radians(operand2))
-                case "sin":
-                    return math.sin(math.radians(operand2))
-                case "min":
-                    return min(operand1, operand2)
-                case "max":
-                    return max(operand1, operand2)
+            if function in self.one_operand_operations:
+                return self.one_operand_operations[function](operand2)
+            return self.two_operand_operations[function](operand1, operand2)
 
         except OverflowError as e:
             raise InvalidExpressionException(
@@ -136,3 +433,6 @@ class RPNEvaluator:
             ) from e
         except ZeroDivisionError as e:
             raise InvalidExpressionException("Division with zero undefined!") from e
+        except TypeError as e:
+            # A function of math or a comparison in min/max was given a complex operand
+            raise InvalidExpressionException("Complex numbers are not supported") from e
@@ -0,0 +1,157 @@
+"""An optimisation pass for RPN/postfix programs. Folds constant sub-expressions into a single number and
+removes operations that do not change the result, so that less work is left for each evaluation.
+"""
+import string
+from .rpn_evaluator import RPNEvaluator
+from .exceptions import InvalidExpressionException
+from .program import Program
+
+
+class RPNOptimiser:
+    """The class simulates the evaluation of an RPN/postfix program with a stack that holds, for each
+    operand, the index where its tokens start in the optimised program and its value if it is a constant.
+    Operations whose operands are all constants (numbers and pi) are calculated and replaced by the result.
+    If the calculation fails (e.g. division with zero), the operation is left in the program, so that the
+    error is raised when the program is evaluated. The following identities are also applied:
+    x*1, 1*x, x+0, 0+x, x-0, x/1, x**1 -> x and n(n(x)) -> x.
+
+    Attributes:
+        evaluator (RPNEvaluator): Calculates the operations on constants
+
+    Methods:
+        optimise(program): Returns the optimised RPN/postfix program
+        optimise_program(program): Returns the optimised Program
+    """
+    def __init__(self):
+        self.evaluator = RPNEvaluator()
+
+    def optimise(self, program: tuple) -> tuple:
+        """Folds the constant sub-expressions of the program and applies the identities. A program that is
+        not valid (e.g. not enough operands) is returned as it is, so that the evaluator can report the error.
+
+        Args:
+            program -- tokens that form an RPN/postfix mathematical expression
+
+        Returns: A tuple that contains the optimised RPN/postfix program
+        """
+        optimised = []
+        operand_stack = []  # (start index in optimised program, constant value or None)
+
+        for token in program:
+            if isinstance(token, float):
+                operand_stack.append((len(optimised), token))
+                optimised.append(token)
+
+            elif isinstance(token, str) and len(token) == 1 and token in string.ascii_uppercase:
+                operand_stack.append((len(optimised), None))
+                optimised.append(token)
+
+            elif token in self.evaluator.one_operand_operations and operand_stack:
+                operand_stack.append(self._optimise_one_operand(token, operand_stack.pop(), optimised))
+
+            elif token in self.evaluator.two_operand_operations and len(operand_stack) >= 2:
+                operand2 = operand_stack.pop()
+                operand1 = operand_stack.pop()
+                operand_stack.append(self._optimise_two_operands(token, operand1, operand2, optimised))
+
+            else:
+                return program
+
+        if len(operand_stack) != 1:
+            return program
+
+        return tuple(optimised)
+
+    def optimise_program(self, program: Program) -> Program:
+        """Folds the constant sub-expressions of a Program and applies the identities.
+
+        Args:
+            program -- a Program that contains an RPN/postfix mathematical expression
+
+        Returns: The optimised Program, or the same Program if there is nothing to optimise
+        """
+        tokens = program.tokens()
+        optimised = self.optimise(tokens)
+        return program if optimised == tokens else Program.from_tokens(optimised)
+
+    def _optimise_one_operand(self, token: str, operand: tuple, optimised: list) -> tuple:
+        """Adds a one operand operation to the optimised program, folding it or removing a double negation
+        when possible.
+
+        Args:
+            token -- the function to apply
+            operand -- the start index and constant value (or None) of the operand
+            optimised -- the optimised program, which is modified in place
+
+        Returns: The start index and constant value (or None) of the result
+        """
+        start, value = operand
+
+        if value is not None:
+            folded = self._fold(token, None, value)
+            if folded is not None:
+                del optimised[start:]
+                optimised.append(folded)
+                return (start, folded)
+
+        # n(n(x)) -> x
+        if token == "n" and optimised[-1] == "n":
+            optimised.pop()
+            return (start, None)
+
+        optimised.append(token)
+        return (start, None)
+
+    def _optimise_two_operands(self, token: str, operand1: tuple, operand2: tuple, optimised: list) -> tuple:
+        """Adds a two operand operation to the optimised program, folding it or applying an identity when
+        possible.
+
+        Args:
+            token -- the function or operator to apply
+            operand1 -- the start index and constant value (or None) of the first operand
+            operand2 -- the start index and constant value (or None) of the second operand
+            optimised -- the optimised program, which is modified in place
+
+        Returns: The start index and constant value (or None) of the result
+        """
+        start1, value1 = operand1
+        start2, value2 = operand2
+
+        if value1 is not None and value2 is not None:
+            folded = self._fold(token, value1, value2)
+            if folded is not None:
+                del optimised[start1:]
+                optimised.append(folded)
+                return (start1, folded)
+
+        # x*1, x+0, x-0, x/1, x**1 -> x
+        if (token in ("*", "/", "**") and value2 == 1) or (token in ("+", "-") and value2 == 0):
+            del optimised[start2:]
+            return (start1, value1)
+
+        # 1*x, 0+x -> x
+        if (token == "*" and value1 == 1) or (token == "+" and value1 == 0):
+            del optimised[start1]
+            return (start1, value2)
+
+        optimised.append(token)
+        return (start1, None)
+
+    def _fold(self, token: str, operand1: float | None, operand2: float) -> float | None:
+        """Calculates an operation on constant operands.
+
+        Args:
+            token -- the function or operator to apply
+            operand1 -- the first operand or None for one operand operations
+            operand2 -- the (second) operand
+
+        Returns: The result as float, or None if the calculation fails or the result is not a real number
+        """
+        try:
+            result = self.evaluator._apply_operation(token, operand1, operand2)  # pylint: disable=protected-access
+        except (InvalidExpressionException, TypeError, ValueError):
+            return None
+
+        if isinstance(result, float):
+            return result
+        return None
@@ -0,0 +1,103 @@
+"""A compact binary format for compiled RPN/postfix programs. A serialised program can be loaded without
+validating and converting the expression again. The format is versioned and checksummed, and it records
+the operations the opcodes refer to, so that a program is never loaded with different operations.
+
+The format (little-endian):
+    magic (4 bytes) | version (1) | variable to set (1) | registry checksum (4) | expression length (4) |
+    opcode count (4) | constant count (4) | expression (UTF-8) | opcodes (1 byte each) |
+    constants (8 bytes each) | checksum of all the preceding bytes (4)
+"""
+import struct
+import sys
+import zlib
+from array import array
+from .operations import OPERATIONS
+from .program import Program
+
+
+MAGIC = b"RPNP"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sBBIIII")
+_CHECKSUM = struct.Struct("<I")
+
+
+def registry_checksum() -> int:
+    """Returns a checksum of the registered operations and their opcodes."""
+    return zlib.crc32(OPERATIONS.fingerprint().encode())
+
+def serialise(expression: str, program: Program, var_to_set: str | None = None) -> bytes:
+    """Serialises a compiled expression into bytes.
+
+    Args:
+        expression -- the original mathematical expression
+        program -- the compiled RPN/postfix program
+        var_to_set -- the variable the expression sets (e.g. "A" in "A=1+2") or None
+
+    Returns: The serialised expression as bytes
+    """
+    encoded_expression = expression.encode()
+    constants = array("d", program.constants)
+    if sys.byteorder != "little":
+        constants.byteswap()
+
+    data = b"".join((
+        _HEADER.pack(MAGIC, FORMAT_VERSION, ord(var_to_set) if var_to_set else 0, registry_checksum(),
+                     len(encoded_expression), len(program.opcodes), len(constants)),
+        encoded_expression,
+        program.opcodes.tobytes(),
+        constants.tobytes(),
+        ))
+    return data + _CHECKSUM.pack(zlib.crc32(data))
+
+def deserialise(data: bytes) -> tuple:
+    """Loads a compiled expression from bytes created with serialise().
+
+    Args:
+        data -- the serialised expression
+
+    Returns: A tuple containing the expression, the Program and the variable to set (or None), or
+        ValueError if the data is not valid, is corrupted or was created with a different format version
+        or different operations
+    """
+    _, _, var_to_set, _, expression_length, opcode_count, constant_count = _check(data)
+
+    position = _HEADER.size
+    expression = data[position:position + expression_length].decode()
+    position += expression_length
+
+    opcodes = array("B", data[position:position + opcode_count])
+    position += opcode_count
+
+    constants = array("d", data[position:position + 8 * constant_count])
+    if sys.byteorder != "little":
+        constants.byteswap()
+
+    return (expression, Program(opcodes, constants), chr(var_to_set) if var_to_set else None)
+
+def _check(data: bytes) -> tuple:
+    """Checks the header, the length and the checksums of serialised data.
+
+    Args:
+        data -- the serialised expression
+
+    Returns: The fields of the header or ValueError if the data is not valid
+    """
+    if len(data) < _HEADER.size + _CHECKSUM.size:
+        raise ValueError("The data is too short to be a serialised program")
+
+    header = _HEADER.unpack_from(data)
+    magic, version, _, checksum, expression_length, opcode_count, constant_count = header
+
+    if magic != MAGIC:
+        raise ValueError("The data is not a serialised program")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported format version {version}")
+    if len(data) != _HEADER.size + expression_length + opcode_count + 8 * constant_count + _CHECKSUM.size:
+        raise ValueError("The length of the data does not match its header")
+    if _CHECKSUM.unpack_from(data, len(data) - _CHECKSUM.size)[0] != zlib.crc32(data[:-_CHECKSUM.size]):
+        raise ValueError("The checksum of the data does not match")
+    if checksum != registry_checksum():
+        raise ValueError("The program was serialised with different operations")
+
+    return header
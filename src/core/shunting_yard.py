@@ -1,8 +1,11 @@
 """The Shunting-Yard algoritm used to convert an infix format mathematical expression given by the
 user into RPN/postfix notation using a queue and a stack.
 """
+import string
 from .stack import Stack
 from .queue import Queue
+from .program import Program
+from .operations import OPERATIONS
 from .exceptions import InvalidExpressionException
 
 
@@ -16,27 +19,25 @@ class ShuntingYard:
         operators (set): A set containing the allowed operators for the calculations
         functions (set): A set containing the allowed functions for the calculations
         precedence (dict): A dict containing the precedence of the operators and functions 
+        right_associative (set): The operators and functions that are evaluated from right to left
+
+    The operators and functions, their precedence and associativity are taken from the operation registry.
 
     Methods:
         convert_to_rpn(tokens): Converts a list of tokens that form an infix expression into RPN/postfix
+        convert_to_rpn_program(tokens): Converts a list of tokens that form an infix expression into an
+            RPN/postfix program (tuple)
+        convert_to_program(tokens): Converts a list of tokens that form an infix expression into a compact
+            Program of opcodes and constants
     """
     def __init__(self):
-        self.operators = set(["+", "-", "*", "/", "**"])
-        # 'n' is the unary negation
-        self.functions = set(["n", "cos", "sin", "sqrt", "min", "max"])
-        self.precedence = {"+": 1,
-                           "-": 1,
-                           "max": 3,
-                           "min": 3,
-                           "n": 1,
-                           "*": 2,
-                           "/": 2,
-                           "**": 3,
-                           "sqrt": 3,
-                           "cos": 4,
-                           "sin": 4}
-
-    def convert_to_rpn(self, tokens: list) -> Queue:  # pylint: disable=too-many-statements
+        self.operators = OPERATIONS.symbols(kind="operator")
+        # The functions include the unary negation 'n'
+        self.functions = OPERATIONS.symbols() - self.operators
+        self.precedence = OPERATIONS.precedences()
+        self.right_associative = {operation.symbol for operation in OPERATIONS if operation.associativity == "right"}
+
+    def convert_to_rpn(self, tokens: list) -> Queue:
         """Converts an infix mathematical expression to RPN/postfix.
         
         Args:
@@ -44,17 +45,32 @@ class ShuntingYard:
         
         Returns: Queue object that contains the mathematical expression in PRN/postfix
         """
-        operator_stack = Stack()
         output_queue = Queue()
 
+        for token in self.convert_to_rpn_program(tokens):
+            output_queue.enqueue(token)
+
+        return output_queue
+
+    def convert_to_rpn_program(self, tokens: list) -> tuple:  # pylint: disable=too-many-statements
+        """Converts an infix mathematical expression to an RPN/postfix program. The tokens are iterated
+        once and the input list is not modified, so the conversion takes linear time.
+
+        Args:
+            tokens -- tokens that form an infix mathematical expression
+
+        Returns: A tuple that contains the mathematical expression in RPN/postfix
+        """
+        operator_stack = Stack()
+        output = []
+
         if not tokens:
             raise InvalidExpressionException("No tokens to evaluate!")
 
-        while tokens:
-            token = tokens.pop(0)
-
-            if isinstance(token, float):
-                output_queue.enqueue(token)
+        for token in tokens:
+            # Numbers and variables left for late binding (e.g. "A") are operands
+            if isinstance(token, float) or self._is_variable(token):
+                output.append(token)
                 continue
 
             if token == "(":
@@ -67,7 +83,7 @@ class ShuntingYard:
 
                     if stack_top == "(":
                         break
-                    output_queue.enqueue(stack_top)
+                    output.append(stack_top)
                 continue
 
             if token in self.operators or token in self.functions:
@@ -78,20 +94,43 @@ class ShuntingYard:
                         operator_stack.enqueue(token)
                         break
 
-                    # Stack's top token has a lower precedence -> add token to stack
-                    if self.precedence[token] > self.precedence[prev_in_stack]:
+                    # Stack's top token has a lower precedence (or the same precedence and the token is right
+                    # associative) -> add token to stack
+                    if self.precedence[token] > self.precedence[prev_in_stack] or (
+                            token in self.right_associative
+                            and self.precedence[token] == self.precedence[prev_in_stack]):
                         operator_stack.enqueue(token)
                         break
 
                     # Stack's top token has a higher or same precedence -> pop all the items with
-                    # higher/same precedence and add them to the output queue
-                    popped_token = operator_stack.dequeue()
-                    output_queue.enqueue(popped_token)
+                    # higher/same precedence and add them to the output
+                    output.append(operator_stack.dequeue())
                 else:
                     operator_stack.enqueue(token)
 
         while not operator_stack.is_empty():
-            popped_token = operator_stack.dequeue()
-            output_queue.enqueue(popped_token)
+            output.append(operator_stack.dequeue())
 
-        return output_queue
+        return tuple(output)
+
+    def convert_to_program(self, tokens: list) -> Program:
+        """Converts an infix mathematical expression to a Program that stores the RPN/postfix as an array
+        of opcodes and an array of constants.
+
+        Args:
+            tokens -- tokens that form an infix mathematical expression
+
+        Returns: A Program that contains the mathematical expression in RPN/postfix
+        """
+        return Program.from_tokens(self.convert_to_rpn_program(tokens))
+
+    def _is_variable(self, token) -> bool:
+        """Checks if the token is a variable A-Z whose value is bound only when the RPN expression
+        is evaluated.
+
+        Args:
+            token -- a token from the infix mathematical expression
+
+        Returns: True if the token is a variable, False otherwise
+        """
+        return isinstance(token, str) and len(token) == 1 and token in string.ascii_uppercase
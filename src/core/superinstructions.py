@@ -0,0 +1,178 @@
+"""Superinstructions for the interpreted evaluation of RPN/postfix programs. A peephole pass replaces
+frequent short sequences of opcodes (e.g. 'A B *' or 'x 2 **') with a single fused instruction, so that the
+evaluator dispatches once per sequence instead of once per token. The profiler reports the most frequent
+opcode sequences of a workload, so that the fused set can be chosen from data.
+"""
+import string
+from collections import Counter
+from .program import Program, CONST, FIRST_BINARY, LOAD_VAR, symbol_of
+
+
+# The kinds of instructions. The first four are the plain instructions and the rest are superinstructions
+# named by the sequence of tokens they replace (VAR is a variable, CONST a number)
+PUSH_CONST = 0                # push a number
+PUSH_VAR = 1                  # push a variable
+UNARY = 2                     # apply an operation to the top of the stack
+BINARY = 3                    # apply an operation to the two topmost values
+VAR_VAR_BINARY = 4            # e.g. 'A B *': push the operation on two variables
+VAR_CONST_BINARY = 5          # e.g. 'A 2 **': push the operation on a variable and a number
+CONST_VAR_BINARY = 6          # e.g. '2 A *': push the operation on a number and a variable
+VAR_BINARY = 7                # e.g. '... C +': apply the operation to the top of the stack and a variable
+CONST_BINARY = 8              # e.g. '... 2 **': apply the operation to the top of the stack and a number
+VAR_UNARY = 9                 # e.g. 'A sin': push the operation on a variable
+CONST_UNARY = 10              # e.g. '2 n': push the operation on a number (when not folded by the optimiser)
+
+# The fused sequences by the kinds of their tokens ('const', 'var', 'unary', 'binary'), longest first
+SUPERINSTRUCTIONS = {
+    ("var", "var", "binary"): VAR_VAR_BINARY,
+    ("var", "const", "binary"): VAR_CONST_BINARY,
+    ("const", "var", "binary"): CONST_VAR_BINARY,
+    ("var", "binary"): VAR_BINARY,
+    ("const", "binary"): CONST_BINARY,
+    ("var", "unary"): VAR_UNARY,
+    ("const", "unary"): CONST_UNARY,
+}
+
+_PLAIN_INSTRUCTIONS = {"const": PUSH_CONST, "var": PUSH_VAR, "unary": UNARY, "binary": BINARY}
+
+
+def opcode_kind(opcode: int) -> str:
+    """Returns the kind of an opcode: 'const', 'var', 'unary' or 'binary'."""
+    if opcode == CONST:
+        return "const"
+    if opcode >= LOAD_VAR:
+        return "var"
+    return "binary" if opcode >= FIRST_BINARY else "unary"
+
+
+class FusedProgram:
+    """An RPN/postfix program as a list of instructions in which the frequent sequences of opcodes are
+    fused into superinstructions (see SUPERINSTRUCTIONS). Each instruction is a tuple (kind, operation,
+    first, second), where the operation is the implementation of the operation of the instruction (or
+    None) and first and second are the operands of the instruction that are not on the stack: numbers or
+    indexes of variables in variable_names, in the order of the tokens.
+
+    Attributes:
+        program (Program): The program the instructions were created from
+        instructions (tuple): The instructions of the program
+        variable_names (tuple): The variables used in the program in alphabetical order
+        stack_depth (int): The maximum depth of the evaluation stack
+
+    Methods:
+        from_program(program, operations): Creates the instructions of a program
+    """
+    __slots__ = ("program", "instructions", "variable_names", "stack_depth")
+
+    def __init__(self, program: Program, instructions: tuple):
+        self.program = program
+        self.instructions = instructions
+        self.variable_names = program.variable_names()
+        self.stack_depth = program.stack_depth
+
+    def __len__(self):
+        return len(self.instructions)
+
+    @classmethod
+    def from_program(cls, program: Program, operations: list) -> "FusedProgram":
+        """Scans the opcodes of a program from left to right and replaces each sequence that matches a
+        superinstruction (the longest match first) with a single instruction.
+
+        Args:
+            program -- the Program to fuse
+            operations -- the implementations of the operations indexed by their opcode
+
+        Returns: A FusedProgram
+        """
+        tokens = cls._tokens(program, operations)
+        instructions = []
+        position = 0
+
+        while position < len(tokens):
+            for length in (3, 2, 1):
+                sequence = tokens[position:position + length]
+                kinds = tuple(kind for kind, _, _ in sequence)
+                instruction = SUPERINSTRUCTIONS.get(kinds) if length > 1 else _PLAIN_INSTRUCTIONS[kinds[0]]
+                if instruction is not None:
+                    operands = [operand for _, _, operand in sequence[:-1]] if length > 1 else [sequence[0][2]]
+                    operands += [None] * (2 - len(operands))
+                    instructions.append((instruction, sequence[-1][1], *operands))
+                    position += length
+                    break
+
+        return cls(program, tuple(instructions))
+
+    @staticmethod
+    def _tokens(program: Program, operations: list) -> list:
+        """Returns the tokens of a program as (kind, operation, operand), where the operand is a number or
+        the index of a variable.
+        """
+        indexes = {name: index for index, name in enumerate(program.variable_names())}
+        tokens = []
+        constants = iter(program.constants)
+
+        for opcode in program.opcodes:
+            kind = opcode_kind(opcode)
+            if kind == "const":
+                tokens.append((kind, None, next(constants)))
+            elif kind == "var":
+                tokens.append((kind, None, indexes[string.ascii_uppercase[opcode - LOAD_VAR]]))
+            else:
+                tokens.append((kind, operations[opcode], None))
+
+        return tokens
+
+
+class OpcodeProfiler:
+    """Counts the sequences of opcodes (n-grams) in the programs evaluated by a workload, weighted by the
+    number of times each program is evaluated. The n-grams are written with the symbols of the operations
+    and 'const' and 'var' for numbers and variables, e.g. ('var', 'var', '*'). Recording an evaluation
+    only counts the program; the n-grams are counted when the report is made.
+
+    Attributes:
+        evaluations (Counter): The number of evaluations of each program
+
+    Methods:
+        record(program): Records an evaluation of a program
+        most_common(length, count): Returns the most frequent n-grams of the given length
+        report(count): Returns the most frequent n-grams of two to four opcodes as text
+    """
+    def __init__(self):
+        self.evaluations = Counter()
+
+    def record(self, program: Program):
+        self.evaluations[program] += 1
+
+    def most_common(self, length: int = 3, count: int = 10, kinds: bool = False) -> list:
+        """Returns the most frequent sequences of opcodes of the given length.
+
+        Args:
+            length -- the number of opcodes in a sequence
+            count -- the number of sequences to return
+            kinds -- if True, the operations are replaced by their kind ('unary' or 'binary'), which
+                gives the frequencies of the patterns in SUPERINSTRUCTIONS
+
+        Returns: A list of (sequence, number of occurrences) from the most frequent
+        """
+        ngrams = Counter()
+
+        for program, evaluations in self.evaluations.items():
+            names = [self._name(opcode, kinds) for opcode in program.opcodes]
+            for start in range(len(names) - length + 1):
+                ngrams[tuple(names[start:start + length])] += evaluations
+
+        return ngrams.most_common(count)
+
+    def report(self, count: int = 10) -> str:
+        lines = [f"{sum(self.evaluations.values())} evaluations of {len(self.evaluations)} programs"]
+
+        for length in (2, 3, 4):
+            lines.append(f"Most frequent sequences of {length} opcodes:")
+            lines.extend(f"  {' '.join(ngram)}: {occurrences}"
+                         for ngram, occurrences in self.most_common(length, count))
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _name(opcode: int, kinds: bool) -> str:
+        kind = opcode_kind(opcode)
+        return kind if kinds or kind in ("const", "var") else symbol_of(opcode)
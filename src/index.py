@@ -1,9 +1,129 @@
+import argparse
+import asyncio
 import sys
 from ui import main
+from batch import run_batch, run_parallel_batch, run_formula_set
+from server import serve
+from core.exceptions import InvalidExpressionException
+from core.instrumentation import Instrumentation
+from core.superinstructions import OpcodeProfiler
+
+
+def parse_arguments():  # pylint: disable=too-many-statements
+    parser = argparse.ArgumentParser(description="SciCalc -- the simple scientific calculator")
+    parser.add_argument("--batch", metavar="FILE", type=argparse.FileType("r"),
+                        help="evaluate the expressions in FILE (one per line, '-' for stdin) non-interactively")
+    parser.add_argument("--steps", action="store_true",
+                        help="with --batch, also output the validated tokens and the RPN of each expression")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="with --batch, evaluate the expressions in N parallel processes (0 for one per CPU). "
+                        "Expressions cannot set variables in parallel mode")
+    parser.add_argument("--metrics", action="store_true",
+                        help="with --batch, write the timings and counters of the pipeline stages to stderr "
+                        "in the Prometheus text format")
+    parser.add_argument("--profile-opcodes", action="store_true",
+                        help="with --batch, write the most frequent sequences of opcodes in the evaluated programs "
+                        "to stderr")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="with --batch, store the compiled expressions in DIR and load them from there "
+                        "on later runs")
+    parser.add_argument("--formula-set", metavar="FILE", type=argparse.FileType("r"),
+                        help="with --batch, evaluate all the formulas in FILE (one per line) for each line of "
+                        "--batch, which is a JSON object of variable values, e.g. {\"A\": 1}")
+    parser.add_argument("--formulas", action="store_true",
+                        help="store the variables as formulas, e.g. 'B=A*2' is recomputed when A changes")
+    parser.add_argument("--serve", metavar="[HOST:]PORT",
+                        help="run an evaluation server on a TCP port that evaluates lines of JSON, e.g. "
+                        "{\"expression\": \"1+2\"}, with --workers worker processes")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="run the evaluation server on a Unix socket instead of a TCP port")
+    parser.add_argument("--batch-window", metavar="MS", type=float,
+                        help="with --serve or --socket, evaluate the requests for the same expression that "
+                        "arrive within MS milliseconds together in one vectorised pass")
+    parser.add_argument("--result-cache", metavar="N", type=int,
+                        help="with --serve or --socket, keep the results of the last N evaluations in each worker, "
+                        "keyed by the expression and the values of the variables it uses")
+    parser.add_argument("--result-cache-policy", choices=("lru", "tinylfu"), default="lru",
+                        help="with --result-cache, the eviction policy (default lru). With tinylfu a new result "
+                        "only replaces a result that has been requested less often")
+    parser.add_argument("--hot-threshold", metavar="N", type=int,
+                        help="with --batch, --serve or --socket, generate a Python function for an expression "
+                        "once it has been evaluated N times instead of interpreting it (e.g. 100)")
+    args = parser.parse_args()
+
+    if args.workers != 1 and args.steps:
+        parser.error("--steps cannot be used with parallel --workers")
+    if args.workers != 1 and args.metrics:
+        parser.error("--metrics cannot be used with parallel --workers")
+    if args.profile_opcodes and (not args.batch or args.workers != 1 or args.formula_set):
+        parser.error("--profile-opcodes requires --batch and cannot be used with parallel --workers or --formula-set")
+    if args.serve and args.socket:
+        parser.error("--serve and --socket cannot be used together")
+    if (args.serve or args.socket) and (args.batch or args.steps or args.metrics):
+        parser.error("the server cannot be used with --batch, --steps or --metrics")
+    if args.formula_set and not args.batch:
+        parser.error("--formula-set requires --batch")
+    if args.formula_set and (args.steps or args.metrics or args.workers != 1):
+        parser.error("--formula-set cannot be used with --steps, --metrics or parallel --workers")
+    if args.formulas and (args.batch or args.serve or args.socket):
+        parser.error("--formulas can only be used in the interactive mode")
+    if args.batch_window is not None and not (args.serve or args.socket):
+        parser.error("--batch-window can only be used with --serve or --socket")
+    if args.batch_window is not None and args.batch_window < 0:
+        parser.error("--batch-window cannot be negative")
+    if args.result_cache is not None and not (args.serve or args.socket):
+        parser.error("--result-cache can only be used with --serve or --socket")
+    if args.result_cache is not None and args.result_cache < 1:
+        parser.error("--result-cache must be at least 1")
+    if args.hot_threshold is not None and not (args.batch or args.serve or args.socket):
+        parser.error("--hot-threshold can only be used with --batch, --serve or --socket")
+    if args.hot_threshold is not None and args.batch and (args.formula_set or args.workers != 1):
+        parser.error("--hot-threshold cannot be used with --formula-set or parallel --workers in the batch mode")
+    if args.hot_threshold is not None and args.hot_threshold < 0:
+        parser.error("--hot-threshold cannot be negative")
+    return args
 
 if __name__ == "__main__":
+    arguments = parse_arguments()
+
+    if arguments.formula_set:
+        with arguments.formula_set, arguments.batch:
+            try:
+                run_formula_set(arguments.formula_set, arguments.batch, sys.stdout, arguments.cache_dir)
+            except InvalidExpressionException as e:
+                sys.exit(f"SciCalc: {e}")
+        sys.exit()
+
+    if arguments.batch:
+        with arguments.batch:
+            if arguments.workers == 1:
+                metrics = Instrumentation() if arguments.metrics else None
+                profiler = OpcodeProfiler() if arguments.profile_opcodes else None
+                run_batch(arguments.batch, sys.stdout, arguments.steps, metrics, arguments.cache_dir,
+                          profiler=profiler, hot_threshold=arguments.hot_threshold)
+                if metrics is not None:
+                    sys.stderr.write(metrics.to_prometheus())
+                if profiler is not None:
+                    sys.stderr.write(profiler.report())
+            else:
+                run_parallel_batch(arguments.batch, sys.stdout, arguments.workers or None, arguments.cache_dir)
+        sys.exit()
+
+    if arguments.serve or arguments.socket:
+        host, _, port = (arguments.serve or "").rpartition(":")
+        try:
+            window = arguments.batch_window / 1000 if arguments.batch_window is not None else None
+            result_cache = (arguments.result_cache, arguments.result_cache_policy) if arguments.result_cache else None
+            asyncio.run(serve(host or None, int(port) if port else None, arguments.socket,
+                              workers=arguments.workers or None, cache_dir=arguments.cache_dir,
+                              batch_window=window, result_cache=result_cache,
+                              hot_threshold=arguments.hot_threshold))
+        except KeyboardInterrupt:
+            pass
+        sys.exit()
+
     try:
-        main()
+        main(arguments.formulas)
         sys.exit()
     except KeyboardInterrupt:
         print("\n*** Quitting the program. Bye! ***")
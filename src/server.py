@@ -0,0 +1,291 @@
+"""Evaluation server for the calculator. Clients connect over TCP or a Unix socket and send requests as
+lines of JSON, e.g. {"id": 1, "expression": "A = 1 + 2"}, and each request is answered with a line of JSON,
+e.g. {"id": 1, "result": 3, "variable": "A"}. Every connection is a session with its own variables, and
+the expressions are evaluated in a pool of worker processes so that the event loop stays responsive.
+"""
+import asyncio
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from batch import NOT_FINITE_ERROR, evaluate_line
+from coalescer import RequestCoalescer, evaluate_group
+from core.expression_compiler import ExpressionCompiler
+from core.result_cache import ResultCache
+
+
+# Number of distinct expressions kept compiled by each worker process
+WORKER_CACHE_SIZE = 1024
+# Maximum length of a request line in bytes
+MAX_REQUEST_SIZE = 64 * 1024
+
+# Each worker process compiles the expressions with its own compiler (and cache)
+_WORKER_COMPILER = None
+
+
+def _initialise_worker(cache_dir: str | None = None, result_cache: tuple | None = None,
+                       hot_threshold: int | None = None):
+    global _WORKER_COMPILER  # pylint: disable=global-statement
+    _WORKER_COMPILER = ExpressionCompiler(cache_size=WORKER_CACHE_SIZE, cache_dir=cache_dir,
+                                          result_cache=ResultCache(*result_cache) if result_cache else None,
+                                          hot_threshold=hot_threshold)
+
+def _evaluate(expression: str, variables: dict) -> dict:
+    """Evaluates an expression in a worker process with the variables of a session. The variables are a
+    copy, so the variable set by the expression is returned in the output and set by the session.
+    """
+    return evaluate_line(expression, variables, _WORKER_COMPILER)
+
+def _evaluate_group(expression: str, variable_sets: list) -> list:
+    return evaluate_group(expression, variable_sets, _WORKER_COMPILER)
+
+
+class Session:
+    """A connection to the server. The requests of a session are handled in the order they are received,
+    so an expression that sets a variable (e.g. 'A=1+2') sets it for the following requests of the same
+    session but not for the other sessions.
+
+    Attributes:
+        server (EvaluationServer): The server that evaluates the expressions
+        variables (dict): The variables set in the session
+
+    Methods:
+        handle(request): Returns the response to a request
+    """
+    def __init__(self, server: "EvaluationServer"):
+        self.server = server
+        self.variables = {}
+
+    async def handle(self, request: dict) -> dict:
+        """Handles a single request. A request contains either an expression to evaluate or one of the
+        commands 'variables' (returns the variables of the session) and 'reset' (removes them). The "id"
+        of the request, if any, is added to the response. An unexpected error in the evaluation only fails
+        the request, not the session.
+
+        Args:
+            request -- the decoded JSON request
+
+        Returns: A dictionary with the result (and the variable set), the variables or the error message
+        """
+        response = {"id": request["id"]} if "id" in request else {}
+        expression = request.get("expression")
+        command = request.get("command")
+
+        if isinstance(expression, str):
+            response.update(await self._evaluate(expression))
+        elif command == "variables":
+            response["variables"] = dict(sorted(self.variables.items()))
+        elif command == "reset":
+            self.variables.clear()
+            response["variables"] = {}
+        else:
+            response["error"] = "A request must contain an expression or a command ('variables' or 'reset')"
+
+        return response
+
+    async def _evaluate(self, expression: str) -> dict:
+        """Evaluates an expression and sets the variable if the expression defines one."""
+        try:
+            output = await self.server.evaluate(expression, self.variables)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            output = {"error": f"Unexpected error: {e}"}
+
+        # A result that is not a finite number cannot be written as JSON
+        if "result" in output and not math.isfinite(output["result"]):
+            output = {"error": NOT_FINITE_ERROR}
+        if "variable" in output:
+            self.variables[output["variable"]] = output["result"]
+
+        return output
+
+
+class EvaluationServer:  # pylint: disable=too-many-instance-attributes
+    """An asyncio server that evaluates expressions for many concurrent clients. Reading and writing the
+    requests happens in the event loop, while the validation, conversion and evaluation are done in a
+    pool of worker processes.
+
+    Attributes:
+        workers (int): The number of worker processes (None to use one per CPU)
+        cache_dir (str): A directory of compiled programs shared by the workers, or None
+        result_cache (tuple): The size and eviction policy of the result cache of each worker, or None if
+            the results are not cached
+        hot_threshold (int): The number of evaluations of an expression in a worker after which a Python
+            function is generated for it, or None if the expressions are only interpreted
+        coalescer (RequestCoalescer): Groups the requests for the same expression from all the sessions
+            within a time window, or None if each request is evaluated separately
+        sessions (set): The sessions of the connected clients
+
+    Methods:
+        start_tcp(host, port): Starts listening on a TCP port
+        start_unix(path): Starts listening on a Unix socket
+        evaluate(expression, variables): Evaluates an expression in a worker process
+        close: Stops the server and the worker processes
+    """
+    def __init__(self, workers: int | None = None, cache_dir: str | None = None,
+                 batch_window: float | None = None, result_cache: tuple | None = None,
+                 hot_threshold: int | None = None):
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.result_cache = result_cache
+        self.hot_threshold = hot_threshold
+        self.coalescer = RequestCoalescer(self._evaluate_group, batch_window) if batch_window is not None else None
+        self.sessions = set()
+        self._executor = None
+        self._server = None
+        self._path = None
+        # The writers of the open connections by the task that handles the connection
+        self._connections = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exception):
+        await self.close()
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> tuple:
+        """Starts listening on a TCP port. Port 0 selects a free port.
+
+        Returns: The address (host, port) the server listens on
+        """
+        self._start_executor()
+        self._server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_REQUEST_SIZE)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start_unix(self, path: str):
+        self._start_executor()
+        self._server = await asyncio.start_unix_server(self._handle_connection, path, limit=MAX_REQUEST_SIZE)
+        self._path = path
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stops accepting connections, closes the open connections after their current requests and
+        stops the worker processes.
+        """
+        if self._server is not None:
+            self._server.close()
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        if self._path is not None:
+            with contextlib.suppress(OSError):
+                os.unlink(self._path)
+            self._path = None
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def evaluate(self, expression: str, variables: dict) -> dict:
+        """Evaluates an expression in a worker process, together with the other requests for the same
+        expression if the requests are grouped.
+
+        Args:
+            expression -- the mathematical expression to evaluate
+            variables -- the variables of the session (not modified)
+
+        Returns: A dictionary with the result (and the variable set) or the error message
+        """
+        if self.coalescer is not None:
+            return await self.coalescer.evaluate(expression, variables)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _evaluate, expression, dict(variables))
+
+    async def _evaluate_group(self, expression: str, variable_sets: list) -> list:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _evaluate_group, expression, variable_sets)
+
+    def _start_executor(self):
+        # The workers are started with 'spawn' instead of 'fork', as a forked worker would inherit the open
+        # client connections and keep them open after the server has closed them
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_initialise_worker,
+                                                 initargs=(self.cache_dir, self.result_cache, self.hot_threshold),
+                                                 mp_context=multiprocessing.get_context("spawn"))
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves a client as a new session until the connection is closed."""
+        session = Session(self)
+        self.sessions.add(session)
+        self._connections[asyncio.current_task()] = writer
+
+        try:
+            await self._serve(session, reader, writer)
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            await _close(writer)
+            del self._connections[asyncio.current_task()]
+
+    async def _serve(self, session: Session, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Reads the requests of a client line by line and writes a response for each until the client
+        closes the connection. A request that is too long closes the connection after an error response.
+        """
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                writer.write(_encode({"error": "The request is too long!"}))
+                await writer.drain()
+                return
+
+            if not line:
+                return
+
+            # Empty lines are skipped
+            if line.strip():
+                writer.write(_encode(await self._respond(session, line)))
+                await writer.drain()
+
+    async def _respond(self, session: Session, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+        except (ValueError, UnicodeDecodeError):
+            return {"error": "The request is not valid JSON!"}
+
+        if not isinstance(request, dict):
+            return {"error": "The request must be a JSON object!"}
+
+        return await session.handle(request)
+
+
+async def _close(writer: asyncio.StreamWriter):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+
+def _encode(response: dict) -> bytes:
+    return (json.dumps(response, allow_nan=False) + "\n").encode()
+
+async def serve(host: str | None = None, port: int | None = None, path: str | None = None, *,  # pylint: disable=too-many-arguments
+                workers: int | None = None, cache_dir: str | None = None, batch_window: float | None = None,
+                result_cache: tuple | None = None, hot_threshold: int | None = None):
+    """Runs an evaluation server on a TCP port or a Unix socket until it is cancelled.
+
+    Args:
+        host -- the host name or address to listen on (with port)
+        port -- the TCP port to listen on
+        path -- the path of the Unix socket to listen on (instead of a TCP port)
+        workers -- the number of worker processes (None to use one per CPU)
+        cache_dir -- a directory where the compiled expressions are stored for later runs, or None
+        batch_window -- the time window in seconds for grouping the requests for the same expression, or
+            None to evaluate each request separately
+        result_cache -- the size and eviction policy ('lru' or 'tinylfu') of the result cache of each
+            worker process, e.g. (4096, 'lru'), or None to not cache the results
+        hot_threshold -- the number of evaluations of an expression in a worker after which a Python
+            function is generated for it, or None to only interpret the expressions
+    """
+    async with EvaluationServer(workers, cache_dir, batch_window, result_cache, hot_threshold) as server:
+        if path is not None:
+            await server.start_unix(path)
+        else:
+            await server.start_tcp(host or "127.0.0.1", port)
+        await server.serve_forever()
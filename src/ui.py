@@ -5,6 +5,7 @@ from core.exceptions import InvalidExpressionException
 from core.input_validator import InputValidator
 from core.shunting_yard import ShuntingYard
 from core.rpn_evaluator import RPNEvaluator
+from core.dependency_graph import DependencyGraph
 from utils import printer
 
 
@@ -28,7 +29,8 @@ def get_user_command():
 
     return user_command
 
-def evaluate_expression(validator: InputValidator, sy: ShuntingYard, rpn_evaluator: RPNEvaluator):  # pylint: disable=too-many-statements
+def evaluate_expression(validator: InputValidator, sy: ShuntingYard, rpn_evaluator: RPNEvaluator,  # pylint: disable=too-many-statements
+                        graph: DependencyGraph | None = None):
     """Queries the user for an expression to evaluate and possibly set as the value of a variable.
     Validates, tokenises, converts to RPN/postfix, and evaluates the expression.
     Sets the variable if necessary.
@@ -39,7 +41,9 @@ def evaluate_expression(validator: InputValidator, sy: ShuntingYard, rpn_evaluat
         sy -- ShuntingYard object whose method convert_to_rpn() is called to convert the tokenised infix
             expression to RPN/postfix form (type: Queue)
         rpn_evaluator -- RPNEvaluator object whose method evaluate_rpn_expression() is called to evaluate
-            the postfix expression Queue
+            the postfix expression Queue with the values of the user's variables
+        graph -- DependencyGraph object that stores the variables as formulas, or None if the variables
+            are stored as numbers
 
     Returns: Nothing if successful. The value of the expression is printed as output
     """
@@ -68,6 +72,8 @@ def evaluate_expression(validator: InputValidator, sy: ShuntingYard, rpn_evaluat
 
             except InvalidExpressionException as e:
                 print(f"\n{UNDERLINE}Validation error:{RESET} {e}")
+                if e.position is not None:
+                    printer.print_error_position(expression_input, e.position)
                 continue
 
             try:
@@ -80,7 +86,7 @@ def evaluate_expression(validator: InputValidator, sy: ShuntingYard, rpn_evaluat
                 continue
 
             try:
-                end_result = rpn_evaluator.evaluate_rpn_expression(rpn_expression)
+                end_result = rpn_evaluator.evaluate_rpn_expression(rpn_expression, USER_VARS)
                 print("\nFinal result:")
                 print(end_result)
 
@@ -89,11 +95,13 @@ def evaluate_expression(validator: InputValidator, sy: ShuntingYard, rpn_evaluat
                 continue
 
             if var_to_set:
-                set_variable(var_to_set, end_result, validator)
+                formula = expression_input.split("=", 1)[1].strip()
+                set_variable(var_to_set, end_result, validator, graph, formula)
 
             return
 
-def set_variable(var_to_set: str, var_value: int | float, validator: InputValidator):
+def set_variable(var_to_set: str, var_value: int | float, validator: InputValidator,  # pylint: disable=too-many-arguments
+                 graph: DependencyGraph | None = None, formula: str | None = None):
     """Sets the value for the variable specified by the user. If the variable is already in use, allows
     the user to overwrite the old value, continue without updating any variable, or choose a new variable
     to update with the value. In the last case, the same options are presented to the user if the new
@@ -104,6 +112,9 @@ def set_variable(var_to_set: str, var_value: int | float, validator: InputValida
         var_value -- Integer or floating point value for the variable
         validator -- InputValidator object whose method update_user_variable() is called to update the
             user variables of the object as well
+        graph -- DependencyGraph object that stores the formula of the variable and recomputes the
+            variables that depend on it, or None if the value is stored as a number
+        formula -- the expression of the variable (e.g. 'A*2' in 'B=A*2'), used with the graph
 
     Returns: Nothing if successful. The action taken is printed as output
     """
@@ -128,20 +139,54 @@ def set_variable(var_to_set: str, var_value: int | float, validator: InputValida
             continue
         break
 
+    if graph is not None:
+        set_formula(var_to_set, formula, graph)
+        return
+
     USER_VARS.update({var_to_set: var_value})
     validator.update_user_variable(var_to_set, var_value)
     print(f"\nVariable {var_to_set} = {var_value} set!")
     return
 
-def main():
+def set_formula(var_to_set: str, formula: str, graph: DependencyGraph):
+    """Stores the formula of a variable in the dependency graph, which also updates USER_VARS, and prints
+    the variables that were recomputed because they depend on the variable.
+
+    Args:
+        var_to_set -- Variable the user wishes to set, capital ASCII A-Z
+        formula -- the expression of the variable, e.g. 'A*2'
+        graph -- DependencyGraph object that stores the formulas of the variables
+
+    Returns: Nothing. The variables set and recomputed (or the error) are printed as output
+    """
+    try:
+        recomputed = graph.define(var_to_set, formula)
+    except InvalidExpressionException as e:
+        print(f"\n{UNDERLINE}Variable not updated:{RESET} {e}")
+        return
+
+    print(f"\nVariable {var_to_set} = {formula} = {USER_VARS[var_to_set]} set!")
+
+    for variable in recomputed:
+        if variable in graph.errors:
+            print(f"  {variable} = {graph.formula_of(variable)}: {graph.errors[variable]}")
+        else:
+            print(f"  {variable} = {graph.formula_of(variable)} = {USER_VARS[variable]} updated")
+
+def main(formulas: bool = False):
     """The main function for the application that queries the user for commands that determine which action
     to take. Exiting the while loop terminates the application. 
 
+    Args:
+        formulas -- if True, the variables are stored as formulas (e.g. 'B=A*2') that are recomputed when
+            the variables they use change
+
     Returns: Nothing if successful. Instructions are printed as output
     """
     validator = InputValidator(USER_VARS)
     sy = ShuntingYard()
     rpn_evaluator = RPNEvaluator()
+    graph = DependencyGraph(USER_VARS) if formulas else None
 
     printer.print_intro()
     printer.print_instructions()
@@ -156,11 +201,11 @@ def main():
 
         # Solve a mathematical expression
         if user_command == "1":
-            evaluate_expression(validator, sy, rpn_evaluator)
+            evaluate_expression(validator, sy, rpn_evaluator, graph)
 
         # Print all defined variables and their values in alphabetical order
         elif user_command == "2":
-            printer.print_variables(USER_VARS)
+            printer.print_variables(USER_VARS, graph)
 
         else:
             print("\nNice try! That is not a valid command. Try again.")
@@ -57,9 +57,17 @@ def print_expression_help():
     print("                 ^        ^")
     print_separator()
 
-def print_variables(user_vars: dict):
+def print_error_position(expression: str, position: int):
+    print(f"  {expression}")
+    print("  " + " " * position + "^")
+
+def print_variables(user_vars: dict, graph=None):
     print(f"\n{BOLD}Defined variables:{RESET}\n")
 
+    if graph is not None:
+        print_formulas(graph)
+        return
+
     if not user_vars:
         print("  You have no defined variables")
         return
@@ -67,5 +75,16 @@ def print_variables(user_vars: dict):
     for key in sorted(user_vars.keys()):
         print(f"  {key} = {user_vars[key]}")
 
+def print_formulas(graph):
+    if not graph.formulas:
+        print("  You have no defined variables")
+        return
+
+    for key in sorted(graph.formulas):
+        if key in graph.errors:
+            print(f"  {key} = {graph.formula_of(key)}: {graph.errors[key]}")
+        else:
+            print(f"  {key} = {graph.formula_of(key)} = {graph.values[key]}")
+
 def print_outro():
     print(f"\n{BOLD}Quitting the program... Bye!{RESET}\n")
@@ -0,0 +1,23 @@
+"""Functions that are not operations of the calculator but are registered by the tests that use them,
+as an example of extending the operation registry: the tangent (in degrees), the natural logarithm, the
+exponential function and the absolute value.
+"""
+import math
+from src.core.operations import OPERATIONS, register_operation, np
+
+
+# The trigonometric functions of an infinite angle (an overflowed calculation) are not defined
+_INFINITE_ANGLE = {ValueError: "Maximum data limit exceeded! Please try a smaller calculation."}
+
+
+def register_extra_operations():
+    register_operation("tan", 1, lambda operand: math.tan(math.radians(operand)), 4, errors=_INFINITE_ANGLE,
+                       vectorised=None if np is None else lambda operand: np.tan(np.radians(operand)))
+    register_operation("log", 1, math.log, errors={ValueError: "log(x) is defined for positive input only!"},
+                       vectorised=None if np is None else np.log, strict=True)
+    register_operation("exp", 1, math.exp, vectorised=None if np is None else np.exp, strict=True)
+    register_operation("abs", 1, math.fabs, vectorised=None if np is None else np.abs)
+
+def unregister_extra_operations():
+    for symbol in ("tan", "log", "exp", "abs"):
+        OPERATIONS.unregister(symbol)
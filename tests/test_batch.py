@@ -0,0 +1,162 @@
+"""Tests for the batch mode. Calls on run_batch() in batch.py with in-memory streams.
+"""
+import io
+import json
+import pytest
+from src import batch
+from src.batch import run_batch, run_parallel_batch, run_formula_set
+from src.core.superinstructions import OpcodeProfiler
+
+
+def run(lines, show_steps=False):
+    output = io.StringIO()
+    counts = run_batch(io.StringIO("\n".join(lines) + "\n"), output, show_steps)
+    return [json.loads(line) for line in output.getvalue().splitlines()], counts
+
+def test_batch_evaluates_each_line():
+    results, counts = run(["1 + 2 * (-5.55)", "5*25/900*sqrt(9)+min(sin(60),1)"])
+
+    assert results == [{"line": 1, "result": -10.1}, {"line": 2, "result": 1.2826920705}]
+    assert counts == (2, 0)
+
+def test_batch_reports_errors_and_continues():
+    results, counts = run(["1/0", "min(1,2,3)", "2**3"])
+
+    assert results[0] == {"line": 1, "error": "Division with zero undefined!"}
+    assert "Unnecessary commas" in results[1]["error"]
+    assert results[2] == {"line": 3, "result": 8}
+    assert counts == (1, 2)
+
+def test_batch_reports_unexpected_errors_and_continues(monkeypatch):
+    compile_expression = batch.ExpressionCompiler.compile
+
+    def compile_with_error(compiler, expression):
+        if expression == "2+2":
+            raise RuntimeError("an unexpected error")
+        return compile_expression(compiler, expression)
+
+    monkeypatch.setattr(batch.ExpressionCompiler, "compile", compile_with_error)
+    results, counts = run(["sqrt((-8)**0.5)", "2+2", "1+1"])
+
+    assert results == [{"line": 1, "error": "Complex numbers are not supported"},
+                       {"line": 2, "error": "Unexpected error: an unexpected error"}, {"line": 3, "result": 2}]
+    assert counts == (1, 2)
+
+def test_batch_rejects_results_that_are_not_finite():
+    output = io.StringIO()
+    run_batch(io.StringIO("A=10**308*10\n10**308*10-10**308*10\nA\n"), output)
+    lines = output.getvalue().splitlines()
+
+    # Valid JSON without Infinity or NaN
+    assert [json.loads(line, parse_constant=pytest.fail) for line in lines] == [
+        {"line": 1, "error": "Maximum data limit exceeded! Please try a smaller calculation."},
+        {"line": 2, "error": "Maximum data limit exceeded! Please try a smaller calculation."},
+        {"line": 3, "error": "The variable A has not been defined!"}]
+
+def test_batch_sets_variables_for_following_lines():
+    results, _ = run(["A = 3", "B=A*2", "A+B", "C+1"])
+
+    assert results[0] == {"line": 1, "result": 3, "variable": "A"}
+    assert results[1] == {"line": 2, "result": 6, "variable": "B"}
+    assert results[2] == {"line": 3, "result": 9}
+    assert results[3] == {"line": 4, "error": "The variable C has not been defined!"}
+
+def test_batch_skips_empty_lines_and_comments():
+    results, _ = run(["# comment", "", "1+1"])
+
+    assert results == [{"line": 3, "result": 2}]
+
+def test_batch_shows_steps_only_when_asked():
+    results, _ = run(["A=1+2", "(-A)*2"], show_steps=True)
+
+    assert results[1]["tokens"] == ["(", "(", "n", "A", ")", ")", "*", 2.0]
+    assert results[1]["rpn"] == ["A", "n", 2.0, "*"]
+    assert results[1]["result"] == -6
+
+def test_batch_shows_the_steps_of_the_compiled_expression():
+    results, _ = run(["A=2", "A*sqrt(9)*1", "1/0"], show_steps=True)
+
+    # The RPN is the program that is evaluated, after the optimiser has folded the constants
+    assert results[1]["rpn"] == ["A", 3.0, "*"]
+    assert results[1]["result"] == 6
+    assert results[2]["rpn"] == [1.0, 0.0, "/"]
+    assert results[2]["error"] == "Division with zero undefined!"
+
+def test_batch_shows_steps_of_numbers_that_are_not_finite():
+    output = io.StringIO()
+    run_batch(io.StringIO(f"min({'9' * 400}, 1)\nA*0+{'9' * 400}\n"), output, show_steps=True)
+    lines = [json.loads(line, parse_constant=pytest.fail) for line in output.getvalue().splitlines()]
+
+    assert lines[0]["tokens"] == ["min", "(", "(", "inf", ")", "(", 1.0, ")", ")"]
+    assert lines[0]["result"] == 1
+    assert lines[1]["rpn"] == ["A", 0.0, "*", "inf", "+"]
+    assert lines[1]["error"] == "The variable A has not been defined!"
+
+def test_batch_profiles_opcodes_when_asked():
+    profiler = OpcodeProfiler()
+    output = io.StringIO()
+    run_batch(io.StringIO("A=2\nA*A+1\nA*A+1\n"), output, profiler=profiler)
+
+    assert [json.loads(line)["result"] for line in output.getvalue().splitlines()] == [2, 5, 5]
+    assert sum(profiler.evaluations.values()) == 3
+    assert "var var *: 2" in profiler.report()
+
+def test_batch_with_hot_threshold_gives_the_same_results():
+    lines = ["A=2", "A*A+1", "B=A*A+1", "A*A+1", "1/(B-5)", "1/(B-5)", "C+1"]
+    output = io.StringIO()
+    run_batch(io.StringIO("\n".join(lines) + "\n"), output, hot_threshold=1)
+
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == run(lines)[0]
+
+def test_parallel_batch_keeps_line_order():
+    output = io.StringIO()
+    lines = ["# header"] + [f"{i}+1" for i in range(20)] + ["1/0"]
+    counts = run_parallel_batch(io.StringIO("\n".join(lines)), output, workers=2)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert results[0] == {"line": 2, "result": 1}
+    assert results[19] == {"line": 21, "result": 20}
+    assert results[20] == {"line": 22, "error": "Division with zero undefined!"}
+    assert counts == (20, 1)
+
+def test_parallel_batch_rejects_results_that_are_not_finite():
+    output = io.StringIO()
+    counts = run_parallel_batch(io.StringIO("10**308*10\nsqrt((-8)**0.5)\n1+1\n"), output, workers=2)
+
+    assert [json.loads(line, parse_constant=pytest.fail) for line in output.getvalue().splitlines()] == [
+        {"line": 1, "error": "Maximum data limit exceeded! Please try a smaller calculation."},
+        {"line": 2, "error": "Complex numbers are not supported"}, {"line": 3, "result": 2}]
+    assert counts == (1, 2)
+
+def test_formula_set_evaluates_all_formulas_for_each_line():
+    output = io.StringIO()
+    formulas = io.StringIO("# distance\nsqrt(A**2+B**2)\n\nsqrt(A**2+B**2)/C\n")
+    rows = io.StringIO('{"A": 3, "B": 4, "C": 2}\n\n{"A": 3, "B": 4, "C": 0}\n[1]\n')
+    counts = run_formula_set(formulas, rows, output)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert results[0] == {"line": 1, "results": [5, 2.5]}
+    assert results[1] == {"line": 3, "results": [5, None], "errors": {"1": "Division with zero undefined!"}}
+    assert results[2] == {"line": 4, "error": "The line must be a JSON object of variable values!"}
+    assert counts == (3, 2)
+
+def test_formula_set_reports_complex_operands_per_formula():
+    output = io.StringIO()
+    run_formula_set(io.StringIO("sqrt(A**0.5)\nA*2\n"), io.StringIO('{"A": -8}\n{"A": 4}\n'), output)
+
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+        {"line": 1, "results": [None, -16], "errors": {"0": "Complex numbers are not supported"}},
+        {"line": 2, "results": [1.4142135624, 8]}]
+
+def test_formula_set_rejects_results_that_are_not_finite():
+    output = io.StringIO()
+    run_formula_set(io.StringIO("A*10\nA+1\n"), io.StringIO('{"A": 1e308}\n'), output)
+
+    assert json.loads(output.getvalue(), parse_constant=pytest.fail) == {
+        "line": 1, "results": [None, 1e308],
+        "errors": {"0": "Maximum data limit exceeded! Please try a smaller calculation."}}
+
+def test_formula_set_rejects_invalid_formula():
+    # The exception class of the module under test (imported as core.exceptions)
+    with pytest.raises(batch.InvalidExpressionException, match="Formula on line 2"):
+        run_formula_set(io.StringIO("A+1\n1+\n"), io.StringIO("{}\n"), io.StringIO())
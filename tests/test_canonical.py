@@ -0,0 +1,53 @@
+import unittest
+from src.core.canonical import canonicalise, canonical_hash
+from src.core.expression_compiler import ExpressionCompiler
+from src.core.rpn_evaluator import RPNEvaluator
+
+
+class TestCanonical(unittest.TestCase):
+    def setUp(self):
+        self.compiler = ExpressionCompiler()
+
+    def hash_of(self, expression: str) -> str:
+        return canonical_hash(self.compiler.compile(expression).program)
+
+    def test_same_hash_for_equivalent_expressions(self):
+        for expressions in (["A+B", "B + A", "((B))+(A)"], ["max(A,B)", "max(B, A)"], ["min(A,2)", "min(2,A)"],
+                            ["A*(B+C)", "(C+B)*A", "(B+C)*A"],
+                            ["sqrt(A**2+B**2)*sin(C)", "sin(C)*sqrt(B**2+A**2)"]):
+            self.assertEqual({self.hash_of(expression) for expression in expressions}, {self.hash_of(expressions[0])},
+                             expressions)
+
+    def test_different_hash_for_different_expressions(self):
+        expressions = ["A-B", "B-A", "A/B", "B/A", "A**B", "B**A", "A+B+C", "A+(B+C)", "A*0", "A*(-0)", "A", "B",
+                       "sin(A)", "cos(A)"]
+
+        self.assertEqual(len({self.hash_of(expression) for expression in expressions}), len(expressions))
+
+    def test_canonical_program(self):
+        program = canonicalise(self.compiler.compile("(C+B)*A").program)
+
+        self.assertEqual(list(program), ["A", "B", "C", "+", "*"])
+        self.assertEqual(program.stack_depth, 3)
+        self.assertEqual(canonicalise(program), program)
+        self.assertEqual(canonical_hash(program), self.hash_of("A*(C+B)"))
+
+    def test_tuple_program(self):
+        self.assertEqual(canonical_hash(("B", "A", "+")), canonical_hash(("A", "B", "+")))
+        self.assertEqual(list(canonicalise((1.0,))), [1.0])
+
+    def test_canonical_program_gives_the_same_results(self):
+        evaluator = RPNEvaluator()
+        variables = {"A": 1.5, "B": -2, "C": 7}
+
+        for expression in ("max(A, B)*sin(C)+min(A, C)/(B+1)", "(A+B)*(A-B)/(C*C+1)+sqrt(A*A+B*B+C*C)-cos(A)*sin(B)",
+                           "A**2-B/C*(C+A)"):
+            program = self.compiler.compile(expression).program
+            self.assertEqual(evaluator.evaluate_program(canonicalise(program), variables),
+                             evaluator.evaluate_program(program, variables))
+
+    def test_compiled_expression_hash(self):
+        compiled = self.compiler.compile("B + A*2")
+
+        self.assertEqual(compiled.canonical_hash(), self.hash_of("2*A+B"))
+        self.assertEqual(len(compiled.canonical_hash()), 64)
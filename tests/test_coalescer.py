@@ -0,0 +1,119 @@
+"""Tests for the grouping of requests in coalescer.py. The RequestCoalescer is tested with a fake group
+evaluation and evaluate_group() by comparing it with evaluate_line().
+"""
+import asyncio
+import pytest
+from src import coalescer
+from src.coalescer import RequestCoalescer, evaluate_group
+from src.batch import evaluate_line
+
+# The compiler must come from the same modules as batch.py and coalescer.py (imported from src by them),
+# so that they catch the errors the compiler raises
+ExpressionCompiler = coalescer.ExpressionCompiler
+np = coalescer.np
+
+
+def run_requests(requests_coalescer, requests):
+    async def main():
+        return await asyncio.gather(*(requests_coalescer.evaluate(expression, variables)
+                                      for expression, variables in requests))
+
+    return asyncio.run(main())
+
+def test_requests_for_same_expression_are_grouped():
+    groups = []
+
+    async def evaluate(expression, variable_sets):
+        groups.append((expression, variable_sets))
+        return [{"result": variables["A"] * 2} for variables in variable_sets]
+
+    requests_coalescer = RequestCoalescer(evaluate, window=0.01)
+    requests = [("A*2", {"A": value}) for value in range(5)] + [("A+1", {"A": 1})]
+    outputs = run_requests(requests_coalescer, requests)
+
+    assert outputs == [{"result": value * 2} for value in range(5)] + [{"result": 2}]
+    assert sorted(len(variable_sets) for _, variable_sets in groups) == [1, 5]
+    assert (requests_coalescer.requests, requests_coalescer.batches) == (6, 2)
+
+def test_full_group_is_evaluated_without_waiting_for_window():
+    sizes = []
+
+    async def evaluate(_, variable_sets):
+        sizes.append(len(variable_sets))
+        return [{} for _ in variable_sets]
+
+    requests_coalescer = RequestCoalescer(evaluate, window=60, max_batch_size=4)
+
+    async def main():
+        requests = (requests_coalescer.evaluate("A", {"A": 1}) for _ in range(8))
+        return await asyncio.wait_for(asyncio.gather(*requests), 5)
+
+    asyncio.run(main())
+    assert sizes == [4, 4]
+
+def test_error_in_group_evaluation_is_raised_for_each_request():
+    async def evaluate(_expression, _variable_sets):
+        raise RuntimeError("worker failed")
+
+    requests_coalescer = RequestCoalescer(evaluate)
+
+    async def main():
+        return await asyncio.gather(requests_coalescer.evaluate("1", {}), requests_coalescer.evaluate("1", {}),
+                                    return_exceptions=True)
+
+    assert [str(error) for error in asyncio.run(main())] == ["worker failed", "worker failed"]
+
+def test_failed_group_is_evaluated_one_request_at_a_time():
+    groups = []
+
+    async def evaluate(_, variable_sets):
+        groups.append(len(variable_sets))
+        if any(variables["A"] < 0 for variables in variable_sets):
+            raise RuntimeError("worker failed")
+        return [{"result": variables["A"]} for variables in variable_sets]
+
+    requests_coalescer = RequestCoalescer(evaluate, window=0.01)
+
+    async def main():
+        return await asyncio.gather(*(requests_coalescer.evaluate("A", {"A": value}) for value in (1, -1, 2)),
+                                    return_exceptions=True)
+
+    outputs = asyncio.run(main())
+    assert outputs[0] == {"result": 1} and outputs[2] == {"result": 2}
+    assert str(outputs[1]) == "worker failed"
+    assert groups == [3, 1, 1, 1]
+    assert (requests_coalescer.requests, requests_coalescer.batches) == (3, 1)
+
+def test_invalid_settings_raise_value_error():
+    with pytest.raises(ValueError):
+        RequestCoalescer(None, window=-1)
+    with pytest.raises(ValueError):
+        RequestCoalescer(None, max_batch_size=0)
+
+@pytest.mark.parametrize("expression", ["A*sqrt(B)+min(A, B)/2", "C=A**B", "1/(A-B)", "sqrt(A-B)",
+                                        "2**0.5+1", "A*B+C", "1+", "sin(A)*cos(B)"])
+def test_evaluate_group_matches_evaluate_line(expression):
+    compiler = ExpressionCompiler(cache_size=10)
+    variable_sets = [{"A": a, "B": b} for a in (0, 1, -2.5, 3, 1e300, 10**400) for b in (0, 2, 0.5, -1)]
+    variable_sets.append({"A": 1})
+
+    expected = [evaluate_line(expression, dict(variables), compiler) for variables in variable_sets]
+    assert evaluate_group(expression, variable_sets, compiler) == expected
+
+def test_evaluate_group_fails_only_the_rows_with_errors():
+    compiler = ExpressionCompiler(cache_size=10)
+    for expression, values in (("sqrt(A**0.5)", (4, -8, 9)), ("A*2", ("x", 1, [1], "3"))):
+        variable_sets = [{"A": value} for value in values]
+
+        expected = [evaluate_line(expression, dict(variables), compiler) for variables in variable_sets]
+        assert evaluate_group(expression, variable_sets, compiler) == expected
+        assert "result" in expected[-1]
+    assert expected[0] == expected[2] == {"error": "The value of the variable A is not a number!"}
+
+@pytest.mark.skipif(np is None, reason="NumPy is not installed")
+def test_evaluate_group_rounds_results_like_scalar_evaluation():
+    compiler = ExpressionCompiler()
+    outputs = evaluate_group("A/3", [{"A": 3}, {"A": 1}, {"A": 6.0000000000001}], compiler)
+
+    assert outputs == [{"result": 1}, {"result": 0.3333333333}, {"result": 2.0}]
+    assert isinstance(outputs[0]["result"], int) and isinstance(outputs[2]["result"], float)
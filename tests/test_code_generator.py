@@ -0,0 +1,84 @@
+import unittest
+from src.core.code_generator import CodeGenerator
+from src.core.expression_compiler import ExpressionCompiler
+from src.core.rpn_evaluator import RPNEvaluator
+from src.core.exceptions import InvalidExpressionException
+from tests.extra_operations import register_extra_operations, unregister_extra_operations
+
+
+def setUpModule():
+    # The tests also use functions that are registered only for the tests (see extra_operations.py)
+    register_extra_operations()
+
+def tearDownModule():
+    unregister_extra_operations()
+
+
+class TestCodeGenerator(unittest.TestCase):
+    def setUp(self):
+        self.generator = CodeGenerator()
+
+    def test_generated_function_evaluates_program(self):
+        # sqrt(3*3)*3**2.5+sin(51/2+25.5)-cos(51/2+25.5)/max(1+1,0)*(-1)
+        program = (3.0, 3.0, '*', 'sqrt', 3.0, 2.5, '**', '*', 51.0, 2.0, '/', 25.5, '+', 'sin', '+',
+                   51.0, 2.0, '/', 25.5, '+', 'cos', 1.0, 1.0, '+', 0.0, 'max', '/', -1.0, '*', '-')
+        function = self.generator.generate(program)
+        self.assertEqual(47.8571779613, function())
+
+    def test_generated_function_with_variables(self):
+        function = self.generator.generate(('A', 'n', 'B', 'min', 'A', '*'))
+        self.assertEqual(-4, function({"A": 2, "B": 1}))
+        self.assertEqual(-0.25, function({"A": 0.5, "B": "3"}))
+
+    def test_negative_zero_is_enclosed_in_brackets(self):
+        function = self.generator.generate((-0.0, 'A', '**'))
+        self.assertEqual(0, function({"A": 2}))
+
+    def test_generated_code_has_no_stack(self):
+        source = self.generator.generate_source(('A', 2.0, '*', 1.0, '+'))
+        self.assertIn("s0 = A * 2.0", source)
+        self.assertIn("s0 = s0 + 1.0", source)
+
+    def test_undefined_variable(self):
+        function = self.generator.generate(('A', 'B', '+'))
+        with self.assertRaises(InvalidExpressionException):
+            function({"A": 1})
+        with self.assertRaises(InvalidExpressionException):
+            function()
+
+    def test_variable_that_is_not_a_number(self):
+        function = self.generator.generate(('A', 'B', '+'))
+        for value in ("x", [1]):
+            with self.assertRaisesRegex(InvalidExpressionException, "The value of the variable B is not a number!"):
+                function({"A": 1, "B": value})
+
+    def test_evaluation_errors(self):
+        cases = [((1.0, 'A', '/'), 0.0), (('A', 'sqrt'), -9.0), ((90000.0, 'A', '**'), 90000.0),
+                 (('A', 0.005, '**'), -5.0)]
+        for program, value in cases:
+            with self.assertRaises(InvalidExpressionException):
+                self.generator.generate(program)({"A": value})
+
+    def test_same_results_and_errors_as_evaluator(self):
+        compiler = ExpressionCompiler(optimise=False)
+        evaluator = RPNEvaluator()
+        cases = [("exp((2/0)+C)", {}), ("sqrt(-2)-B", {}), ("log(A)+B", {"A": -1}), ("B+log(A)", {"A": -1}),
+                 ("sqrt(A**0.5)", {"A": -8}), ("max(1, B**C)", {"B": -1, "C": 0.5}), ("abs(A**0.5)+1", {"A": -4}),
+                 ("A**0.5", {"A": -4}), ("10**A*B", {"A": 400}), ("A*B+sqrt(C)", {"A": 1, "B": 2, "C": 9}),
+                 ("(-A**2)", {"A": 2}), ("sin(A)+B", {"B": 1})]
+
+        for expression, variables in cases:
+            program = compiler.compile(expression).program
+            outcomes = []
+            for evaluate in (lambda: evaluator.evaluate_program(program, variables),
+                             lambda: self.generator.generate(program.tokens())(variables)):
+                try:
+                    outcomes.append(evaluate())
+                except InvalidExpressionException as e:
+                    outcomes.append(str(e))
+            self.assertEqual(outcomes[0], outcomes[1], expression)
+
+    def test_program_errors_are_raised_at_generation(self):
+        for program in [(), (1.0, '+'), ('sqrt',), (1.0, 1.0), ('b',)]:
+            with self.assertRaises(InvalidExpressionException):
+                self.generator.generate(program)
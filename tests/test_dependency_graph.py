@@ -0,0 +1,94 @@
+import unittest
+from src.core.dependency_graph import DependencyGraph
+from src.core.exceptions import InvalidExpressionException
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = DependencyGraph()
+        for variable, formula in (("A", "3"), ("B", "A*2"), ("C", "B+A"), ("D", "min(C, 100)"), ("E", "1/A")):
+            self.graph.define(variable, formula)
+
+    def test_define_evaluates_formulas(self):
+        self.assertEqual(self.graph.values, {"A": 3, "B": 6, "C": 9, "D": 9, "E": 0.3333333333})
+        self.assertEqual(self.graph.formula_of("C"), "B+A")
+        self.assertIn("B", self.graph)
+        self.assertNotIn("F", self.graph)
+
+    def test_change_recomputes_downstream_in_topological_order(self):
+        recomputed = self.graph.define("A", "60")
+
+        self.assertEqual(sorted(recomputed), ["B", "C", "D", "E"])
+        self.assertLess(recomputed.index("B"), recomputed.index("C"))
+        self.assertLess(recomputed.index("C"), recomputed.index("D"))
+        self.assertEqual(self.graph.values, {"A": 60, "B": 120, "C": 180, "D": 100, "E": 0.0166666667})
+
+    def test_only_changed_values_are_propagated(self):
+        self.assertEqual(self.graph.define("A", "1+2"), [])
+        self.assertEqual(self.graph.define("B", "A+A"), [])
+        self.assertEqual(self.graph.define("C", "200"), ["D"])
+        self.assertEqual(self.graph.define("C", "300"), ["D"])
+        # D stays 100, so nothing downstream of D would be recomputed
+        self.graph.define("F", "D*2")
+        self.assertEqual(self.graph.define("C", "400"), ["D"])
+        self.assertEqual(self.graph.values["F"], 200)
+
+    def test_redefined_formula_changes_dependencies(self):
+        self.graph.define("C", "10")
+        self.assertEqual(self.graph.define("B", "5"), [])
+        self.assertEqual(self.graph.dependents["B"], set())
+        self.assertEqual(self.graph.define("A", "4"), ["E"])
+
+    def test_circular_references_are_rejected(self):
+        with self.assertRaises(InvalidExpressionException) as e:
+            self.graph.define("A", "D+1")
+        self.assertEqual(str(e.exception), "Circular reference: A -> D -> C -> B -> A")
+
+        with self.assertRaises(InvalidExpressionException):
+            self.graph.define("F", "F+1")
+        self.assertEqual(self.graph.values["A"], 3)
+        self.assertEqual(self.graph.formula_of("A"), "3")
+
+    def test_errors_downstream_are_recorded_and_cleared(self):
+        self.graph.define("A", "0")
+        self.assertEqual(self.graph.errors, {"E": "Division with zero undefined!"})
+        self.assertNotIn("E", self.graph.values)
+
+        with self.assertRaises(InvalidExpressionException):
+            self.graph.define("F", "E*2")
+
+        self.graph.define("A", "2")
+        self.assertEqual(self.graph.errors, {})
+        self.assertEqual(self.graph.values["E"], 0.5)
+
+    def test_invalid_formula_changes_nothing(self):
+        for formula in ("1/0", "G+1", "1+", "B=2"):
+            with self.assertRaises(InvalidExpressionException):
+                self.graph.define("A", formula)
+        self.assertEqual(self.graph.values["A"], 3)
+        self.assertEqual(self.graph.values["C"], 9)
+
+    def test_remove_makes_dependents_undefined(self):
+        recomputed = self.graph.remove("B")
+        self.assertEqual(recomputed[0], "C")
+        self.assertEqual(self.graph.errors, {"C": "The variable B has not been defined!",
+                                             "D": "The variable C has not been defined!"})
+        self.graph.define("B", "1")
+        self.assertEqual(self.graph.values["D"], 4)
+
+    def test_values_dictionary_is_shared(self):
+        values = {}
+        graph = DependencyGraph(values)
+        graph.define("A", "2")
+        graph.define("B", "A**3")
+        graph.define("A", "3")
+        self.assertEqual(values, {"A": 3, "B": 27})
+
+    def test_long_chain(self):
+        graph = DependencyGraph()
+        graph.define("A", "1")
+        for previous, variable in zip("ABCDEFGHIJKLMNOPQRSTUVWXY", "BCDEFGHIJKLMNOPQRSTUVWXYZ"):
+            graph.define(variable, f"{previous}+1")
+
+        self.assertEqual(graph.define("A", "10"), list("BCDEFGHIJKLMNOPQRSTUVWXYZ"))
+        self.assertEqual(graph.values["Z"], 35)
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from src.core.disk_cache import DiskCache
+from src.core.program import Program
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = DiskCache(self.directory.name)
+        self.program = Program.from_tokens((1.0, 'A', '+'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_missing_expression_returns_none(self):
+        self.assertIsNone(self.cache.get("1+A"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+    def test_put_and_get(self):
+        self.cache.put("B=1+A", self.program, "B")
+        self.assertEqual(self.cache.get("B=1+A"), (self.program, "B"))
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_entries_are_shared_between_caches(self):
+        self.cache.put("1+A", self.program)
+        self.assertEqual(DiskCache(self.directory.name).get("1+A"), (self.program, None))
+
+    def test_entries_of_another_variant_are_not_loaded(self):
+        self.cache.put("1+A", self.program)
+        other = DiskCache(self.directory.name, "unoptimised")
+        self.assertIsNone(other.get("1+A"))
+        other.put("1+A", self.program)
+        self.assertEqual(other.get("1+A"), (self.program, None))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_corrupted_entry_is_a_miss(self):
+        self.cache.put("1+A", self.program)
+        with open(self.cache.path("1+A"), "r+b") as file:
+            file.seek(-1, os.SEEK_END)
+            file.write(b"\x00")
+
+        self.assertIsNone(self.cache.get("1+A"))
+        self.assertEqual(self.cache.misses, 1)
+
+        self.cache.put("1+A", self.program)
+        self.assertEqual(self.cache.get("1+A"), (self.program, None))
+
+    def test_entry_of_another_expression_is_a_miss(self):
+        self.cache.put("1+A", self.program)
+        os.replace(self.cache.path("1+A"), self.cache.path("A+1"))
+        self.assertIsNone(self.cache.get("A+1"))
+
+    def test_clear(self):
+        self.cache.put("1+A", self.program)
+        self.cache.get("1+A")
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+        self.assertEqual(os.listdir(self.directory.name), [])
@@ -0,0 +1,191 @@
+import tempfile
+import unittest
+from src.core.expression_compiler import ExpressionCompiler, CompiledExpression
+from src.core.exceptions import InvalidExpressionException
+from tests.extra_operations import register_extra_operations, unregister_extra_operations
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def setUpModule():
+    # The tests also use functions that are registered only for the tests (see extra_operations.py)
+    register_extra_operations()
+
+def tearDownModule():
+    unregister_extra_operations()
+
+
+class TestExpressionCompiler(unittest.TestCase):
+    def setUp(self):
+        self.compiler = ExpressionCompiler()
+
+    def test_compile_returns_compiled_expression(self):
+        result = ExpressionCompiler(optimise=False).compile("1 + 2 * (-5.55)")
+        self.assertIsInstance(result, CompiledExpression)
+        self.assertEqual(result.program.tokens(), (1.0, 2.0, -5.55, '*', '+'))
+
+    def test_compiled_program_keeps_variables(self):
+        result = self.compiler.compile("A*2+sqrt(B)")
+        self.assertEqual(result.program.tokens(), ('A', 2.0, '*', 'B', 'sqrt', '+'))
+        self.assertEqual(result.variables_used, frozenset(["A", "B"]))
+
+    def test_compiled_program_keeps_negated_variable(self):
+        result = self.compiler.compile("(-A)+1")
+        self.assertEqual(result.program.tokens(), ('A', 'n', 1.0, '+'))
+        self.assertEqual(result.evaluate({"A": 4}), -3)
+
+    def test_negated_variable_binds_like_negative_number(self):
+        self.assertEqual(self.compiler.compile("(-2**2)").evaluate(), 4)
+        self.assertEqual(self.compiler.compile("(-A**2)").evaluate({"A": 2}), 4)
+        with self.assertRaisesRegex(InvalidExpressionException, "Complex numbers are not supported"):
+            self.compiler.compile("(-3**0.5)").evaluate()
+        with self.assertRaisesRegex(InvalidExpressionException, "Complex numbers are not supported"):
+            self.compiler.compile("(-B**0.5)").evaluate({"B": 3})
+
+    def test_compile_identifies_variable_to_set(self):
+        result = self.compiler.compile("L = (-9)**3")
+        self.assertEqual(result.var_to_set, "L")
+        self.assertEqual(result.evaluate(), -729)
+
+    def test_evaluate_can_be_repeated(self):
+        compiled = self.compiler.compile("5*25/900*sqrt(9)+min(sin(60),1)")
+        self.assertEqual(compiled.evaluate(), 1.2826920705)
+        self.assertEqual(compiled.evaluate(), 1.2826920705)
+
+    def test_evaluate_with_different_variable_values(self):
+        compiled = self.compiler.compile("A**2+B")
+        self.assertEqual(compiled.evaluate({"A": 3, "B": 1}), 10)
+        self.assertEqual(compiled.evaluate({"A": 0.5, "B": "2"}), 2.25)
+
+    def test_evaluate_with_undefined_variable(self):
+        compiled = self.compiler.compile("A+B")
+        with self.assertRaises(InvalidExpressionException):
+            compiled.evaluate({"A": 1})
+
+    def test_compile_invalid_expression(self):
+        with self.assertRaises(InvalidExpressionException):
+            self.compiler.compile("(-3)***2.5")
+
+    def test_evaluation_error_is_raised_on_every_evaluation(self):
+        compiled = self.compiler.compile("1/A")
+        with self.assertRaises(InvalidExpressionException):
+            compiled.evaluate({"A": 0})
+        self.assertEqual(compiled.evaluate({"A": 4}), 0.25)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_evaluate_batch(self):
+        compiled = self.compiler.compile("A**2+1/B")
+        results, errors = compiled.evaluate_batch({"A": np.array([1.0, 2.0]), "B": np.array([4.0, 0.0])})
+        self.assertEqual(1.25, results[0])
+        self.assertEqual([False, True], errors.tolist())
+
+    def test_cache_returns_same_compiled_expression(self):
+        compiler = ExpressionCompiler(cache_size=10)
+        first = compiler.compile("A*2+1")
+        second = compiler.compile("A*2+1")
+        self.assertIs(first, second)
+        self.assertEqual(compiler.cache.hits, 1)
+
+    def test_cached_expression_uses_current_variable_values(self):
+        compiler = ExpressionCompiler(cache_size=10)
+        self.assertEqual(compiler.compile("A*2").evaluate({"A": 1}), 2)
+        self.assertEqual(compiler.compile("A*2").evaluate({"A": 5}), 10)
+
+    def test_compiled_expression_has_stack_depth(self):
+        self.assertEqual(self.compiler.compile("A+B*(C-1)").stack_depth, 4)
+
+    def test_malformed_program_is_rejected_at_compile_time(self):
+        with self.assertRaises(InvalidExpressionException):
+            CompiledExpression("1 +", (1.0, '+'), None, self.compiler.evaluator)
+
+    def test_disk_cache_is_shared_between_compilers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = ExpressionCompiler(cache_dir=directory).compile("C=A*sqrt(9)+B")
+            compiler = ExpressionCompiler(cache_dir=directory, generate_code=True)
+            second = compiler.compile("C=A*sqrt(9)+B")
+            self.assertEqual(compiler.disk_cache.hits, 1)
+            self.assertEqual(second.program, first.program)
+            self.assertEqual(second.var_to_set, "C")
+            self.assertEqual(second.evaluate({"A": 2, "B": 1}), 7)
+            with self.assertRaises(InvalidExpressionException):
+                compiler.compile("1+")
+            self.assertEqual(len(compiler.disk_cache), 1)
+
+    def test_disk_cache_keeps_programs_of_other_optimiser_setting_apart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            folded = ExpressionCompiler(cache_dir=directory).compile("A*sqrt(9)")
+            compiler = ExpressionCompiler(cache_dir=directory, optimise=False)
+            unfolded = compiler.compile("A*sqrt(9)")
+            self.assertEqual(compiler.disk_cache.misses, 1)
+            self.assertEqual(folded.program.tokens(), ('A', 3.0, '*'))
+            self.assertEqual(unfolded.program.tokens(), ('A', 9.0, 'sqrt', '*'))
+            self.assertEqual(ExpressionCompiler(cache_dir=directory, optimise=False).compile("A*sqrt(9)").program,
+                             unfolded.program)
+
+    def test_no_cache_by_default(self):
+        self.assertIsNone(self.compiler.cache)
+        self.assertIsNot(self.compiler.compile("1+1"), self.compiler.compile("1+1"))
+
+    def test_compile_folds_constants(self):
+        result = self.compiler.compile("A*sqrt(9)*1+(-(-B))")
+        self.assertEqual(result.program.tokens(), ('A', 3.0, '*', 'B', '+'))
+        self.assertEqual(result.evaluate({"A": 2, "B": 1}), 7)
+
+    def test_hot_expression_is_promoted_to_generated_code(self):
+        compiler = ExpressionCompiler(cache_size=10, hot_threshold=2)
+        compiled = compiler.compile("A**2+sqrt(B)")
+        self.assertIsNone(compiled.function)
+
+        results = [compiled.evaluate({"A": 3, "B": 16}) for _ in range(3)]
+        self.assertEqual(results, [13, 13, 13])
+        self.assertEqual(compiled.evaluations, 2)
+        self.assertIsNotNone(compiled.function)
+        self.assertIsNone(compiled.fused)
+        # The generated function is cached with the parse
+        self.assertIs(compiler.compile("A**2+sqrt(B)").function, compiled.function)
+        with self.assertRaises(InvalidExpressionException):
+            compiled.evaluate({"A": 3, "B": -16})
+
+    def test_promoted_expression_gives_same_results_and_errors(self):
+        cases = (("log(A)+B", {"A": -1, "B": 1}), ("log(A)+B", {"A": -1}), ("sqrt(A**0.5)", {"A": -8}),
+                 ("exp((2/0)+C)", {}), ("A*B", {"A": 1e308, "B": 10}), ("10**A", {"A": 400}),
+                 ("exp(A)", {"A": 1000}), ("max(1, A**B)", {"A": -2, "B": 0.5}), ("(-A**2)+C", {"A": 3}),
+                 ("1/(A-B)", {"A": 2, "B": 2}), ("A*B+sqrt(C)", {"A": 2, "B": 3, "C": 16}),
+                 ("L=min(A, 1)/3", {"A": 2}), ("A+B", {"A": 1, "B": "x"}), ("sqrt(A)", {"A": [1]}))
+
+        def outcome(compiled, variables):
+            try:
+                return compiled.evaluate(variables)
+            except InvalidExpressionException as e:
+                return str(e)
+
+        for expression, variables in cases:
+            interpreted = [outcome(ExpressionCompiler(fuse=fuse).compile(expression), variables)
+                           for fuse in (True, False)]
+            promoted = ExpressionCompiler(hot_threshold=0).compile(expression)
+            self.assertEqual([outcome(promoted, variables)] * 2, interpreted, expression)
+            self.assertIsNotNone(promoted.function)
+
+    def test_cold_expression_is_not_promoted(self):
+        compiled = ExpressionCompiler(hot_threshold=5).compile("1/A")
+        for _ in range(5):
+            with self.assertRaises(InvalidExpressionException):
+                compiled.evaluate({"A": 0})
+        self.assertEqual(compiled.evaluations, 5)
+        self.assertIsNone(compiled.function)
+        self.assertIsNotNone(ExpressionCompiler(hot_threshold=0).compile("1/A").fused)
+
+    def test_negative_hot_threshold_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            ExpressionCompiler(hot_threshold=-1)
+
+    def test_compile_with_generated_code(self):
+        compiler = ExpressionCompiler(generate_code=True)
+        compiled = compiler.compile("A**2+sqrt(B)")
+        self.assertIsNotNone(compiled.function)
+        self.assertEqual(compiled.evaluate({"A": 3, "B": 16}), 13)
+        with self.assertRaises(InvalidExpressionException):
+            compiled.evaluate({"A": 3, "B": -16})
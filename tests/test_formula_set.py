@@ -0,0 +1,105 @@
+import unittest
+from src.core.expression_compiler import ExpressionCompiler
+from src.core.formula_set import FormulaSet
+from src.core.exceptions import InvalidExpressionException
+from tests.extra_operations import register_extra_operations, unregister_extra_operations
+
+
+def setUpModule():
+    # The tests also use functions that are registered only for the tests (see extra_operations.py)
+    register_extra_operations()
+
+def tearDownModule():
+    unregister_extra_operations()
+
+
+class TestFormulaSet(unittest.TestCase):
+    def setUp(self):
+        self.compiler = ExpressionCompiler()
+
+    def test_results_of_all_formulas(self):
+        formula_set = FormulaSet(["sqrt(A**2+B**2)", "sqrt(A**2+B**2)*2", "A+B", "10/4"])
+
+        self.assertEqual(formula_set.evaluate({"A": 3, "B": 4}), ([5, 10, 7, 2.5], {}))
+        self.assertEqual(formula_set.evaluate({"A": 6, "B": 8}), ([10, 20, 14, 2.5], {}))
+        self.assertEqual(len(formula_set), 4)
+
+    def test_shared_subexpressions_are_single_nodes(self):
+        # sqrt(A**2+B**2): A, 2, **, B, ** (2 is shared), +, sqrt
+        formula_set = FormulaSet(["sqrt(A**2+B**2)", "sqrt(A**2+B**2)*sin(C)", "sin(C)+sqrt(A**2+B**2)"])
+
+        self.assertEqual(formula_set.tokens, 8 + 11 + 11)
+        # The nodes of the first formula, C, sin, the multiplication and the addition
+        self.assertEqual(formula_set.size, 7 + 4)
+        self.assertEqual(formula_set.roots[0], 6)
+
+    def test_same_formula_twice(self):
+        formula_set = FormulaSet(["A*2", "A*2"])
+
+        self.assertEqual(formula_set.roots[0], formula_set.roots[1])
+        self.assertEqual(formula_set.evaluate({"A": 1.5}), ([3, 3], {}))
+
+    def test_canonical_formulas_share_commutative_operations(self):
+        expressions = ["A+B", "B+A", "max(A, B)*2", "2*max(B, A)"]
+
+        self.assertEqual(FormulaSet(expressions).size, 9)
+        formula_set = FormulaSet(expressions, canonical=True)
+        # A, B, +, max, 2, *
+        self.assertEqual(formula_set.size, 6)
+        self.assertEqual(formula_set.evaluate({"A": 1, "B": 3}), ([4, 4, 6, 6], {}))
+
+    def test_negative_zero_is_not_shared_with_zero(self):
+        formula_set = FormulaSet(["A*0", "A*(-0)"], ExpressionCompiler(optimise=False))
+
+        # A, 0.0, *, -0.0, *
+        self.assertEqual(formula_set.size, 5)
+
+    def test_errors_only_affect_the_formulas_that_fail(self):
+        formula_set = FormulaSet(["1/A", "sqrt(B)", "A+1", "1/A+sqrt(B)", "sqrt(B)+1/A", "C*2", "(-8)**A"])
+        results, errors = formula_set.evaluate({"A": 0, "B": -1})
+
+        self.assertEqual(results, [None, None, 1, None, None, None, 1])
+        self.assertEqual(errors, {0: "Division with zero undefined!", 1: "sqrt(x) is defined for positive input only!",
+                                  3: "Division with zero undefined!", 4: "sqrt(x) is defined for positive input only!",
+                                  5: "The variable C has not been defined!"})
+
+        results, errors = formula_set.evaluate({"A": 0.5, "B": 4, "C": 10.0 ** 200})
+        self.assertEqual(results, [2, 2, 1.5, 4, 4, 2e200, None])
+        self.assertEqual(errors, {6: "Complex numbers are not supported"})
+
+    def test_complex_operands_only_fail_their_formulas(self):
+        formula_set = FormulaSet(["sqrt(A**0.5)", "max(1, B**C)", "A+B", "abs(A**0.5)"])
+
+        self.assertEqual(formula_set.evaluate({"A": -8, "B": -1, "C": 0.5}),
+                         ([None, None, -9, None], {0: "Complex numbers are not supported",
+                                                   1: "Complex numbers are not supported",
+                                                   3: "Complex numbers are not supported"}))
+
+    def test_variable_that_is_not_a_number(self):
+        formula_set = FormulaSet(["A+1", "B*2"])
+
+        self.assertEqual(formula_set.evaluate({"A": "x", "B": 2}),
+                         ([None, 4], {0: "The value of the variable A is not a number!"}))
+
+    def test_overflow(self):
+        formula_set = FormulaSet(["A**B", "A+B"])
+
+        self.assertEqual(formula_set.evaluate({"A": 10, "B": 400}),
+                         ([None, 410], {0: "Maximum data limit exceeded! Please try a smaller calculation."}))
+
+    def test_results_match_separate_evaluation(self):
+        expressions = ["max(A, B)*sin(C)+min(A, C)/(B+1)", "(A+B)*(A-B)/(C*C+1)+sqrt(A*A+B*B+C*C)-cos(A)*sin(B)",
+                       "sin(C)*(A+B)", "A**2-B/C", "sqrt(A)+log(B)*C", "log(B)*C-sqrt(A*A+B*B+C*C)"]
+        formula_set = FormulaSet(expressions, self.compiler)
+
+        for variables in ({"A": 1, "B": 2, "C": 3}, {"A": -1, "B": 0, "C": 0.5}, {"A": 4, "B": 0.5, "C": 0}):
+            results, errors = formula_set.evaluate(variables)
+            for index, expression in enumerate(expressions):
+                try:
+                    self.assertEqual(results[index], self.compiler.compile(expression).evaluate(variables))
+                except InvalidExpressionException as e:
+                    self.assertEqual(errors[index], str(e))
+
+    def test_invalid_formula(self):
+        with self.assertRaises(InvalidExpressionException):
+            FormulaSet(["A+1", "1+"])
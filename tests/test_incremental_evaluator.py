@@ -0,0 +1,124 @@
+import random
+import re
+import unittest
+from src.core.expression_compiler import ExpressionCompiler
+from src.core.incremental_evaluator import IncrementalEvaluator
+from src.core.rpn_evaluator import RPNEvaluator
+from src.core.exceptions import InvalidExpressionException
+from tests.extra_operations import register_extra_operations, unregister_extra_operations
+
+
+def setUpModule():
+    # The tests also use functions that are registered only for the tests (see extra_operations.py)
+    register_extra_operations()
+
+def tearDownModule():
+    unregister_extra_operations()
+
+
+class TestIncrementalEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.compiler = ExpressionCompiler()
+
+    def evaluator_for(self, expression: str) -> IncrementalEvaluator:
+        return self.compiler.compile(expression).incremental()
+
+    def test_first_evaluation_calculates_the_whole_program(self):
+        evaluator = self.evaluator_for("sqrt(A*A+B*B)+C")
+
+        self.assertEqual(evaluator.evaluate({"A": 3, "B": 4, "C": 0.5}), 5.5)
+        self.assertEqual(evaluator.recalculated, len(evaluator.program))
+        self.assertEqual(evaluator.variables, frozenset("ABC"))
+
+    def test_only_the_path_of_a_changed_variable_is_recalculated(self):
+        # RPN: A A * B B * + sqrt C +
+        evaluator = self.evaluator_for("sqrt(A*A+B*B)+C")
+        evaluator.evaluate({"A": 3, "B": 4, "C": 0.5})
+        recalculated = evaluator.recalculated
+
+        self.assertEqual(evaluator.evaluate({"A": 3, "B": 4, "C": 2}), 7)
+        # C and the final addition
+        self.assertEqual(evaluator.recalculated - recalculated, 2)
+
+        recalculated = evaluator.recalculated
+        self.assertEqual(evaluator.evaluate({"A": 6, "B": 8, "C": 2}), 12)
+        # Everything except C
+        self.assertEqual(evaluator.recalculated - recalculated, 9)
+
+    def test_unchanged_variables_recalculate_nothing(self):
+        evaluator = self.evaluator_for("A*2+B")
+        evaluator.evaluate({"A": 1, "B": 2})
+        recalculated = evaluator.recalculated
+
+        self.assertEqual(evaluator.evaluate({"A": 1.0, "B": 2, "C": 100}), 4)
+        self.assertEqual(evaluator.recalculated, recalculated)
+        self.assertEqual(evaluator.evaluations, 2)
+
+    def test_program_without_variables(self):
+        evaluator = IncrementalEvaluator((1.0, 2.0, "+"), RPNEvaluator())
+
+        self.assertEqual(evaluator.evaluate(), 3)
+        self.assertEqual(evaluator.evaluate({"A": 1}), 3)
+
+    def test_missing_variable(self):
+        evaluator = self.evaluator_for("A+B")
+        evaluator.evaluate({"A": 1, "B": 2})
+
+        with self.assertRaises(InvalidExpressionException) as error:
+            evaluator.evaluate({"A": 1})
+        self.assertEqual(str(error.exception), "The variable B has not been defined!")
+        self.assertEqual(evaluator.evaluate({"A": 1, "B": 5}), 6)
+
+    def test_variable_that_is_not_a_number(self):
+        evaluator = self.evaluator_for("A+B")
+
+        for value in ("x", [1]):
+            with self.assertRaises(InvalidExpressionException) as error:
+                evaluator.evaluate({"A": 1, "B": value})
+            self.assertEqual(str(error.exception), "The value of the variable B is not a number!")
+        self.assertEqual(evaluator.evaluate({"A": 1, "B": "5"}), 6)
+
+    def test_errors_are_the_same_as_in_full_evaluation_and_recover(self):
+        evaluator = self.evaluator_for("1/A+sqrt(B)")
+        evaluator.evaluate({"A": 1, "B": 4})
+
+        with self.assertRaisesRegex(InvalidExpressionException, "Division with zero undefined!"):
+            evaluator.evaluate({"A": 0, "B": 4})
+        with self.assertRaisesRegex(InvalidExpressionException, "Maximum data limit exceeded!"):
+            self.evaluator_for("A**B").evaluate({"A": 10, "B": 400})
+        with self.assertRaisesRegex(InvalidExpressionException, "Complex numbers are not supported"):
+            self.evaluator_for("sqrt(A**0.5)").evaluate({"A": -8})
+        # After an error the whole program is calculated again
+        recalculated = evaluator.recalculated
+        self.assertEqual(evaluator.evaluate({"A": 2, "B": 4}), 2.5)
+        self.assertEqual(evaluator.recalculated - recalculated, len(evaluator.program))
+
+    def test_reset_calculates_the_whole_program(self):
+        evaluator = self.evaluator_for("A+1")
+        evaluator.evaluate({"A": 1})
+        evaluator.reset()
+        recalculated = evaluator.recalculated
+
+        self.assertEqual(evaluator.evaluate({"A": 1}), 2)
+        self.assertEqual(evaluator.recalculated - recalculated, 3)
+
+    def test_results_match_full_evaluation_on_a_stream(self):
+        rng = random.Random(7)
+        formulas = ["max(A, B)*sin(C)+min(A, C)/(B+1)", "(A+B)*(A-B)/(C*C+1)+sqrt(A*A+B*B+C*C)-cos(A)*sin(B)",
+                    "A**2-B/C", "sqrt(A)+log(B)*C"]
+
+        for formula in formulas:
+            compiled = self.compiler.compile(formula)
+            evaluator = compiled.incremental()
+            values = {"A": 1, "B": 2, "C": 3}
+
+            for _ in range(200):
+                values = dict(values)
+                values[rng.choice("ABC")] = rng.choice([0, 1, -1, 2.5, -3, 4, 0.5])
+                try:
+                    expected = compiled.evaluate(values)
+                except InvalidExpressionException as e:
+                    with self.assertRaisesRegex(InvalidExpressionException, re.escape(str(e))):
+                        evaluator.evaluate(values)
+                else:
+                    self.assertEqual(evaluator.evaluate(values), expected)
@@ -1,6 +1,15 @@
 import unittest
 from src.core.input_validator import InputValidator
 from src.core.exceptions import InvalidExpressionException
+from tests.extra_operations import register_extra_operations, unregister_extra_operations
+
+
+def setUpModule():
+    # The tests also use functions that are registered only for the tests (see extra_operations.py)
+    register_extra_operations()
+
+def tearDownModule():
+    unregister_extra_operations()
 
 
 class TestInputValidator(unittest.TestCase):
@@ -21,22 +30,6 @@ class TestInputValidator(unittest.TestCase):
         self.validator.update_user_variable(new_var_char, new_var_input)
         self.assertEqual(self.validator.user_variables["A"], "45")
 
-    def test_is_number_identifies_float(self):
-        result = self.validator._is_number("5.7")
-        self.assertTrue(result)
-
-    def test_is_number_identifies_neg_int(self):
-        result = self.validator._is_number("-9")
-        self.assertTrue(result)
-
-    def test_is_number_does_not_identify_function_with_number(self):
-        result = self.validator._is_number("sqrt(3)")
-        self.assertFalse(result)
-
-    def test_is_number_does_not_identify_expression(self):
-        result = self.validator._is_number("3+3")
-        self.assertFalse(result)
-
     def test_expand_variable_correctly_expands_variable(self):
         result = self.validator._expand_variable("A")
         self.assertEqual(result, 1.45)
@@ -71,27 +64,6 @@ class TestInputValidator(unittest.TestCase):
         with self.assertRaises(InvalidExpressionException):
             self.validator._validate_first_and_last("12*13/")
 
-    def test_check_for_invalid_characters_succeeds_when_exp_matches_tokenised_exp(self):
-        user_expression = "5.65*pi+sqrt(-9)**sin(4)"
-        tokens = ['5.65', '*', 'pi', '+', 'sqrt', '(', '-', '9', ')', '**', 'sin', '(', '4', ')']
-        try:
-            self.validator._check_for_invalid_characters(user_expression, tokens)
-        except InvalidExpressionException:
-            self.fail("validate_first_and_last raised an unnecessary exception")
-
-    def test_check_for_invalid_characters_fails_when_exp_and_tokens_do_not_match(self):
-        user_expression = "5.65*pi+sqrt(-9)**sin(4)"
-        tokens = ['5.65', '*', 'pi', '+', 'sqrt', '(', '-', '9', ')', '**', 'sin', '(', '4']
-        with self.assertRaises(InvalidExpressionException):
-            self.validator._check_for_invalid_characters(user_expression, tokens)
-
-    def test_tokenise_expression_correctly_tokenises_str(self):
-        user_expression = "12*0.6/5**(-2)+sqrt(90)-min(sin(10), 5)"
-        tokens = ['12', '*', '0.6', '/', '5', '**', '(', '-', '2', ')', '+', 'sqrt', '(',
-                  '90', ')', '-', 'min', '(', 'sin', '(', '10', ')', ',', ' ', '5', ')']
-        result = self.validator._tokenise_expression(user_expression)
-        self.assertEqual(result, tokens)
-
     def test_bracket_value_identifies_left_bracket(self):
         result = self.validator._get_bracket_value("(")
         self.assertEqual(result, 1)
@@ -106,19 +78,19 @@ class TestInputValidator(unittest.TestCase):
 
     def test_validate_expression_accepts_valid_expression(self):
         user_expression = "A+(-3)*A**2.5"
-        tokenised = [1.45, '+', '(', -3.0, ')', '*', 1.45, '**', 2.5]
+        tokenised = ['A', '+', '(', -3.0, ')', '*', 'A', '**', 2.5]
         result = self.validator.validate_expression(user_expression)
         self.assertEqual(result, (tokenised, None))
 
     def test_validate_expression_accepts_valid_short_expression(self):
         user_expression = "A"
-        tokenised = [1.45]
+        tokenised = ['A']
         result = self.validator.validate_expression(user_expression)
         self.assertEqual(result, (tokenised, None))
 
     def test_validate_expression_accepts_valid_short_expression2(self):
         user_expression = "(-A)+5+pi"
-        tokenised = ['(', -1.45, ')', '+', 5.0, '+', 3.141592653589793]
+        tokenised = ['(', '(', 'n', 'A', ')', ')', '+', 5.0, '+', 3.141592653589793]
         result = self.validator.validate_expression(user_expression)
         self.assertEqual(result, (tokenised, None))
 
@@ -164,3 +136,63 @@ class TestInputValidator(unittest.TestCase):
         tokenised = [1, '+', '(', 'n', '(', 3.0, '+', 3, ')', ')']
         result = self.validator._validate_tokens(token_input)
         self.assertEqual(result, tokenised)
+
+    def test_validate_expression_gives_position_of_invalid_character(self):
+        with self.assertRaises(InvalidExpressionException) as context:
+            self.validator.validate_expression("B = 1 + 2 x 3")
+        self.assertEqual(context.exception.position, 10)
+
+    def test_validate_expression_gives_position_of_consecutive_operators(self):
+        with self.assertRaises(InvalidExpressionException) as context:
+            self.validator.validate_expression("(-3) * / 2.5")
+        self.assertEqual(context.exception.position, 7)
+
+    def test_validate_expression_gives_position_of_invalid_last_character(self):
+        with self.assertRaises(InvalidExpressionException) as context:
+            self.validator.validate_expression("12*13/ ")
+        self.assertEqual(context.exception.position, 5)
+
+    def test_validate_expression_tokenises_numbers_functions_and_commas(self):
+        result = self.validator.validate_expression("12*0.6/5**(-2)+sqrt(90)-min(sin(10), 5)")
+        self.assertEqual(result, ([12.0, '*', 0.6, '/', 5.0, '**', '(', -2.0, ')', '+', 'sqrt', '(', 90.0, ')', '-',
+                                   'min', '(', '(', 'sin', '(', 10.0, ')', ')', '(', 5.0, ')', ')'], None))
+
+    def test_validate_expression_tokenises_numbers(self):
+        self.assertEqual(self.validator.validate_expression("5.7")[0], [5.7])
+        self.assertEqual(self.validator.validate_expression("(-9)")[0], ['(', -9.0, ')'])
+        self.assertEqual(self.validator.validate_expression("sqrt(3)")[0], ['sqrt', '(', 3.0, ')'])
+        self.assertEqual(self.validator.validate_expression("3+3")[0], [3.0, '+', 3.0])
+
+    def test_validate_expression_accepts_expression_without_invalid_characters(self):
+        result = self.validator.validate_expression("5.65*pi+sqrt(-9)**sin(4)")
+        self.assertEqual(result[0], [5.65, '*', 3.141592653589793, '+', 'sqrt', '(', -9.0, ')', '**',
+                                     'sin', '(', 4.0, ')'])
+
+    def test_validate_expression_does_not_accept_invalid_characters(self):
+        for expression in ("5.65*pi+sqrt(-9)**sin(4$)", "5.65*pi+sqrt(-9)**sin(4)]", "5,65*pi"):
+            with self.assertRaises(InvalidExpressionException, msg=expression):
+                self.validator.validate_expression(expression)
+
+    def test_validate_expression_reports_the_first_error_in_the_expression(self):
+        # The expression is validated in a single scan, so the first error from the left is reported, e.g.
+        # consecutive operators before an invalid character that comes later in the expression
+        with self.assertRaisesRegex(InvalidExpressionException, "Consecutive operators") as context:
+            self.validator.validate_expression("1**/2+3x4")
+        self.assertEqual(context.exception.position, 3)
+        with self.assertRaisesRegex(InvalidExpressionException, "invalid characters") as context:
+            self.validator.validate_expression("1+2x3**/4")
+        self.assertEqual(context.exception.position, 3)
+
+    def test_validate_expression_handles_spaces_within_tokens(self):
+        result = self.validator.validate_expression("1 2 * s qrt(9)")
+        self.assertEqual(result, ([12.0, '*', 'sqrt', '(', 9.0, ')'], None))
+
+    def test_validate_expression_accepts_any_variable_without_user_variables(self):
+        validator = InputValidator()
+        result = validator.validate_expression("Y*(-Q)")
+        self.assertEqual(result, (['Y', '*', '(', '(', 'n', 'Q', ')', ')'], None))
+
+    def test_validate_expression_accepts_registered_functions(self):
+        result = self.validator.validate_expression("tan(45)+log(exp(2))*abs(-1)")
+        self.assertEqual(result, (['tan', '(', 45.0, ')', '+', 'log', '(', 'exp', '(', 2.0, ')', ')', '*',
+                                   'abs', '(', -1.0, ')'], None))
@@ -0,0 +1,68 @@
+import unittest
+from src.core.instrumentation import Instrumentation, error_category
+from src.core.expression_compiler import ExpressionCompiler
+from src.core.exceptions import InvalidExpressionException
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.instrumentation = Instrumentation()
+        self.compiler = ExpressionCompiler(cache_size=10, instrumentation=self.instrumentation)
+
+    def test_stages_are_timed_and_tokens_counted(self):
+        self.compiler.compile("1+A*2").evaluate({"A": 3})
+        stages = self.instrumentation.snapshot()["stages"]
+
+        for stage in ("validate", "convert", "evaluate"):
+            self.assertEqual(stages[stage]["count"], 1)
+            self.assertGreaterEqual(stages[stage]["total_seconds"], 0)
+            self.assertEqual(stages[stage]["latency_buckets"][float("inf")], 1)
+        self.assertEqual(stages["validate"]["tokens"], 5)
+        self.assertEqual(stages["convert"]["tokens"], 5)
+
+    def test_errors_are_counted_by_category(self):
+        for expression, variables in (("1/0", {}), ("A+1", {}), ("B+1", {})):
+            with self.assertRaises(InvalidExpressionException):
+                self.compiler.compile(expression).evaluate(variables)
+        with self.assertRaises(InvalidExpressionException):
+            self.compiler.compile("1+x+1")
+
+        stages = self.instrumentation.snapshot()["stages"]
+        self.assertEqual(stages["evaluate"]["errors"], {
+            "Division with zero undefined": 1, "The variable X has not been defined": 2
+            })
+        self.assertEqual(stages["validate"]["errors"], {"The expression contains invalid characters": 1})
+
+    def test_cache_lookups_are_counted(self):
+        self.compiler.compile("1+1")
+        self.compiler.compile("1+1")
+        self.assertEqual(self.instrumentation.snapshot()["cache"], {"hits": 1, "misses": 1})
+        self.assertEqual(self.instrumentation.stages["validate"].count, 1)
+
+    def test_error_category(self):
+        self.assertEqual(error_category(InvalidExpressionException("Unrecognised token: x")), "Unrecognised token")
+        self.assertEqual(error_category(ValueError("oops")), "ValueError")
+
+    def test_prometheus_text(self):
+        self.compiler.compile("2*3").evaluate()
+        with self.assertRaises(InvalidExpressionException):
+            self.compiler.compile("1/0").evaluate()
+        text = self.instrumentation.to_prometheus()
+
+        self.assertIn("# TYPE scicalc_stage_duration_seconds histogram", text)
+        self.assertIn('scicalc_stage_duration_seconds_bucket{stage="evaluate",le="+Inf"} 2', text)
+        self.assertIn('scicalc_stage_duration_seconds_count{stage="validate"} 2', text)
+        self.assertIn('scicalc_errors_total{stage="evaluate",category="Division with zero undefined"} 1', text)
+        self.assertIn('scicalc_parse_cache_lookups_total{result="miss"} 2', text)
+
+    def test_reset(self):
+        self.compiler.compile("1+1").evaluate()
+        self.instrumentation.reset()
+        snapshot = self.instrumentation.snapshot()
+        self.assertEqual(snapshot["stages"]["evaluate"]["count"], 0)
+        self.assertEqual(snapshot["cache"], {"hits": 0, "misses": 0})
+
+    def test_compiler_without_instrumentation(self):
+        compiled = ExpressionCompiler().compile("1+2")
+        self.assertIsNone(compiled.instrumentation)
+        self.assertEqual(compiled.evaluate(), 3)
@@ -0,0 +1,70 @@
+import math
+import operator
+import unittest
+from src.core.operations import OPERATIONS, Operation, OperationRegistry, register_operation
+from src.core.expression_compiler import ExpressionCompiler
+from src.core.input_validator import InputValidator
+from src.core.exceptions import InvalidExpressionException
+
+
+class TestOperationRegistry(unittest.TestCase):
+    def tearDown(self):
+        for symbol in ("cube", "hypot", "^"):
+            if symbol in OPERATIONS:
+                OPERATIONS.unregister(symbol)
+
+    def test_default_operations(self):
+        self.assertEqual(OPERATIONS.symbols(kind="operator"), {"+", "-", "*", "/", "**"})
+        self.assertEqual(OPERATIONS.function_names(),
+                         {"cos", "sin", "sqrt", "min", "max"})
+        self.assertEqual(OPERATIONS.get("n").kind, "internal")
+        self.assertEqual(OPERATIONS.precedences()["**"], 3)
+        with self.assertRaises(InvalidExpressionException):
+            InputValidator().validate_expression("log(2)")
+
+    def test_opcodes_depend_on_arity(self):
+        self.assertTrue(all(1 <= operation.opcode < 32 for operation in OPERATIONS if operation.arity == 1))
+        self.assertTrue(all(32 <= operation.opcode < 64 for operation in OPERATIONS if operation.arity == 2))
+        self.assertEqual(OPERATIONS.by_opcode[OPERATIONS.opcodes["sqrt"]].symbol, "sqrt")
+
+    def test_checked_implementation_maps_errors(self):
+        with self.assertRaises(InvalidExpressionException) as context:
+            OPERATIONS.get("sqrt").checked(-1.0)
+        self.assertEqual(str(context.exception), "sqrt(x) is defined for positive input only!")
+        self.assertIs(OPERATIONS.get("+").checked, OPERATIONS.get("+").implementation)
+
+    def test_registered_functions_are_used_by_all_stages(self):
+        register_operation("cube", 1, lambda x: x ** 3)
+        register_operation("hypot", 2, math.hypot)
+
+        for generate_code in (False, True):
+            compiler = ExpressionCompiler(generate_code=generate_code)
+            self.assertEqual(compiler.compile("cube(A)+hypot(3, 4)").evaluate({"A": 2}), 13)
+            self.assertEqual(compiler.compile("2*cube(-(1+1))").evaluate(), -16)
+
+    def test_right_associative_operator(self):
+        register_operation("^", 2, operator.pow, 3, kind="operator", associativity="right", template="{0} ** {1}")
+        compiler = ExpressionCompiler()
+        self.assertEqual(compiler.compile("2^3^2").evaluate(), 512)
+        self.assertEqual(compiler.compile("2**3**2").evaluate(), 64)
+
+    def test_unregistered_function_is_invalid(self):
+        register_operation("cube", 1, lambda x: x ** 3)
+        OPERATIONS.unregister("cube")
+        with self.assertRaises(InvalidExpressionException):
+            InputValidator().validate_expression("cube(2)")
+
+    def test_invalid_registrations(self):
+        registry = OperationRegistry()
+        registry.register(Operation("f", 1, abs))
+        for operation in (Operation("f", 1, abs), Operation("g", 3, abs), Operation("Pi", 1, abs),
+                          Operation("pi", 1, abs), Operation("h", 1, abs, associativity="up"),
+                          Operation("k", 1, abs, kind="macro"), Operation("m", 1, abs, commutative=True)):
+            with self.assertRaises(ValueError):
+                registry.register(operation)
+
+    def test_opcode_is_reused_after_unregistering(self):
+        registry = OperationRegistry()
+        first = registry.register(Operation("f", 1, abs))
+        registry.unregister("f")
+        self.assertEqual(registry.register(Operation("g", 1, abs)).opcode, first.opcode)
@@ -0,0 +1,43 @@
+import unittest
+from src.core.parallel_evaluator import ParallelEvaluator
+
+
+class TestParallelEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.evaluator = ParallelEvaluator(workers=2, chunk_size=3, max_pending=2)
+
+    def test_results_are_in_input_order(self):
+        expressions = [f"{i}*2+A" for i in range(50)]
+        results = list(self.evaluator.evaluate(expressions, {"A": 1}))
+        self.assertEqual(results, [(i * 2 + 1, None) for i in range(50)])
+
+    def test_errors_are_returned_per_expression(self):
+        results = list(self.evaluator.evaluate(["1/0", "sqrt(16)", "B+1", "A=1"]))
+        self.assertEqual(results[0], (None, "Division with zero undefined!"))
+        self.assertEqual(results[1], (4, None))
+        self.assertEqual(results[2], (None, "The variable B has not been defined!"))
+        self.assertEqual(results[3][0], None)
+
+    def test_variables_that_are_not_numbers_are_errors_per_expression(self):
+        results = list(self.evaluator.evaluate(["A+1", "2*2", "sqrt(2**0.5)", "sqrt(A)"], {"A": "x"}))
+        self.assertEqual(results[0], (None, "The value of the variable A is not a number!"))
+        self.assertEqual(results[1], (4, None))
+        self.assertEqual(results[2], (1.189207115, None))
+        self.assertEqual(results[3][0], None)
+
+    def test_input_is_read_lazily(self):
+        consumed = []
+
+        def expressions():
+            for i in range(1000):
+                consumed.append(i)
+                yield str(i)
+
+        results = self.evaluator.evaluate(expressions())
+        self.assertEqual(next(results), (0, None))
+        # At most max_pending chunks (plus the one being returned) have been read
+        self.assertLessEqual(len(consumed), 3 * 3)
+        results.close()
+
+    def test_empty_input(self):
+        self.assertEqual(list(self.evaluator.evaluate([])), [])
@@ -0,0 +1,44 @@
+import unittest
+from src.core.parse_cache import ParseCache
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ParseCache(2)
+
+    def test_get_missing_expression(self):
+        self.assertIsNone(self.cache.get("1+1"))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_put_and_get(self):
+        self.cache.put("1+1", "compiled")
+        self.assertEqual(self.cache.get("1+1"), "compiled")
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.put("1", "a")
+        self.cache.put("2", "b")
+        self.cache.get("1")
+        self.cache.put("3", "c")
+        self.assertIn("1", self.cache)
+        self.assertNotIn("2", self.cache)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_hit_rate(self):
+        self.assertEqual(self.cache.hit_rate(), 0.0)
+        self.cache.put("1", "a")
+        self.cache.get("1")
+        self.cache.get("1")
+        self.cache.get("2")
+        self.assertAlmostEqual(self.cache.hit_rate(), 2 / 3)
+
+    def test_clear(self):
+        self.cache.put("1", "a")
+        self.cache.get("1")
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            ParseCache(0)
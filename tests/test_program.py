@@ -0,0 +1,57 @@
+import pickle
+import unittest
+from array import array
+from src.core.program import Program, CONST, LOAD_VAR
+from src.core.operations import OPERATIONS
+from src.core.exceptions import InvalidExpressionException
+
+
+class TestProgram(unittest.TestCase):
+    def test_from_tokens_encodes_opcodes_and_constants(self):
+        program = Program.from_tokens((2.0, 'A', '**', 1.5, 'sqrt', '+'))
+        opcodes = OPERATIONS.opcodes
+        self.assertEqual(program.opcodes, array('B', [CONST, LOAD_VAR, opcodes['**'], CONST, opcodes['sqrt'],
+                                                      opcodes['+']]))
+        self.assertEqual(program.constants, array('d', [2.0, 1.5]))
+
+    def test_tokens_round_trip(self):
+        tokens = (1.0, 'Z', 'n', '-', 3.25, 'max', 0.5, 'cos', '/')
+        self.assertEqual(Program.from_tokens(tokens).tokens(), tokens)
+
+    def test_stack_depth_and_variables(self):
+        program = Program.from_tokens(('A', 'B', 2.0, '*', '+', 'A', 'min'))
+        self.assertEqual(program.stack_depth, 3)
+        self.assertEqual(program.variables(), frozenset("AB"))
+
+    def test_equal_programs_have_equal_hashes(self):
+        first = Program.from_tokens((1.0, 'A', '+'))
+        second = Program.from_tokens((1.0, 'A', '+'))
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertNotEqual(first, Program.from_tokens((2.0, 'A', '+')))
+
+    def test_zeros_of_different_sign_are_different_constants(self):
+        positive = Program.from_tokens(('A', 0.0, '*'))
+        negative = Program.from_tokens(('A', -0.0, '*'))
+        self.assertNotEqual(positive, negative)
+        self.assertEqual(len({positive, negative, Program.from_tokens(('A', 0.0, '*'))}), 2)
+
+    def test_malformed_programs_are_rejected(self):
+        for tokens in ((), (1.0, '+'), ('n',), (1.0, 2.0), (1.0, 'x')):
+            with self.assertRaises(InvalidExpressionException):
+                Program.from_tokens(tokens)
+
+    def test_constant_pool_must_match_opcodes(self):
+        with self.assertRaises(InvalidExpressionException):
+            Program(array('B', [CONST]), array('d'))
+        with self.assertRaises(InvalidExpressionException):
+            Program(array('B', [200]), array('d'))
+
+    def test_pickled_program_is_equal(self):
+        program = Program.from_tokens(('A', 2.5, '*', 'B', '+', 'A', '-'))
+        hash(program)
+        restored = pickle.loads(pickle.dumps(program))
+
+        self.assertEqual(restored, program)
+        self.assertEqual(restored.stack_depth, program.stack_depth)
+        self.assertEqual(restored.variable_names(), ('A', 'B'))
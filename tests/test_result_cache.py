@@ -0,0 +1,110 @@
+import unittest
+from src.core.result_cache import ResultCache, FrequencySketch
+from src.core.expression_compiler import ExpressionCompiler
+from src.core.exceptions import InvalidExpressionException
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResultCache(max_size=2)
+        self.compiler = ExpressionCompiler(result_cache=ResultCache(16))
+
+    def test_results_are_keyed_by_the_variables_used(self):
+        program = self.compiler.compile("A*2").program
+
+        self.assertEqual(ResultCache.key(program, {"A": 1, "B": 2}), ResultCache.key(program, {"A": 1.0, "C": 3}))
+        self.assertNotEqual(ResultCache.key(program, {"A": 1}), ResultCache.key(program, {"A": 2}))
+        self.assertNotEqual(ResultCache.key(program, {"A": 0.0}), ResultCache.key(program, {"A": -0.0}))
+        self.assertIsNone(ResultCache.key(program, {"B": 1}))
+        self.assertIsNone(ResultCache.key(program, None))
+        self.assertIsNotNone(ResultCache.key(self.compiler.compile("1+2").program, None))
+
+    def test_compiled_expression_uses_the_cache(self):
+        compiled = self.compiler.compile("sqrt(A)+B")
+        cache = self.compiler.evaluator.result_cache
+
+        self.assertEqual(compiled.evaluate({"A": 16, "B": 1}), 5)
+        self.assertEqual(compiled.evaluate({"A": 16, "B": 1, "C": 10}), 5)
+        self.assertEqual(compiled.evaluate({"A": 16, "B": 2}), 6)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 2, 2))
+        # The same program compiled from another expression has the same results
+        self.assertEqual(self.compiler.compile("sqrt(A) + (B)").evaluate({"A": 16, "B": 2}), 6)
+        self.assertEqual(cache.hits, 2)
+
+    def test_generated_functions_use_the_cache(self):
+        compiler = ExpressionCompiler(generate_code=True, result_cache=ResultCache(16))
+        compiled = compiler.compile("A**2")
+
+        self.assertEqual(compiled.evaluate({"A": 3}), 9)
+        self.assertEqual(compiled.evaluate({"A": 3}), 9)
+        self.assertEqual(compiler.evaluator.result_cache.hits, 1)
+
+    def test_errors_are_not_cached(self):
+        compiled = self.compiler.compile("1/A")
+        cache = self.compiler.evaluator.result_cache
+
+        for _ in range(2):
+            with self.assertRaisesRegex(InvalidExpressionException, "Division with zero undefined!"):
+                compiled.evaluate({"A": 0})
+            with self.assertRaisesRegex(InvalidExpressionException, "The variable A has not been defined!"):
+                compiled.evaluate({})
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.get("a")
+        self.cache.put("c", 3)
+
+        self.assertIn("a", self.cache)
+        self.assertNotIn("b", self.cache)
+        self.assertIn("c", self.cache)
+        self.assertEqual(self.cache.get("b"), None)
+
+    def test_tinylfu_keeps_frequent_results(self):
+        cache = ResultCache(max_size=2, policy="tinylfu")
+        for key in ("a", "b"):
+            for _ in range(3):
+                cache.get(key)
+            cache.put(key, key)
+
+        # One-off keys are not admitted in place of the frequently used ones
+        for number in range(20):
+            cache.get(number)
+            cache.put(number, number)
+        self.assertEqual(list(cache._entries), ["a", "b"])
+
+        for _ in range(5):
+            cache.get("c")
+        cache.put("c", "c")
+        self.assertIn("c", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_frequency_sketch(self):
+        sketch = FrequencySketch(8)
+        for _ in range(20):
+            sketch.add("a")
+        sketch.add("b")
+
+        self.assertEqual((sketch.width, FrequencySketch(100).width), (64, 128))
+        self.assertEqual(sketch.estimate("a"), 15)
+        self.assertGreaterEqual(sketch.estimate("b"), 1)
+        # The counters are halved after 80 additions
+        for number in range(60):
+            sketch.add(number)
+        self.assertEqual(sketch.estimate("a"), 7)
+
+    def test_clear_and_hit_rate(self):
+        self.cache.put("a", 1)
+        self.cache.get("a")
+        self.cache.get("b")
+        self.assertEqual(self.cache.hit_rate(), 0.5)
+
+        self.cache.clear()
+        self.assertEqual((len(self.cache), self.cache.hit_rate()), (0, 0.0))
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            ResultCache(0)
+        with self.assertRaises(ValueError):
+            ResultCache(10, policy="fifo")
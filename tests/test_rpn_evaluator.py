@@ -1,7 +1,23 @@
+import math
 import unittest
 from src.core.rpn_evaluator import RPNEvaluator
 from src.core.queue import Queue
+from src.core.program import Program
 from src.core.exceptions import InvalidExpressionException
+from tests.extra_operations import register_extra_operations, unregister_extra_operations
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def setUpModule():
+    # The tests also use functions that are registered only for the tests (see extra_operations.py)
+    register_extra_operations()
+
+def tearDownModule():
+    unregister_extra_operations()
 
 
 class TestRPNEvaluator(unittest.TestCase):
@@ -131,6 +147,25 @@ class TestRPNEvaluator(unittest.TestCase):
         result = self.evaluator.evaluate_rpn_expression(tokens)
         self.assertEqual(47.8571779613, result)
 
+    def test_tangent_in_degrees(self):
+        result = self.evaluator._apply_operation('tan', None, 45.0)
+        self.assertAlmostEqual(1.0, result)
+
+    def test_natural_logarithm_and_exponential(self):
+        self.assertAlmostEqual(2.0, self.evaluator._apply_operation('log', None, math.e ** 2))
+        self.assertAlmostEqual(math.e, self.evaluator._apply_operation('exp', None, 1.0))
+
+    def test_logarithm_of_non_positive_not_accepted(self):
+        with self.assertRaises(InvalidExpressionException):
+            self.evaluator._apply_operation('log', None, 0.0)
+
+    def test_exponential_overflow_not_accepted(self):
+        with self.assertRaises(InvalidExpressionException):
+            self.evaluator._apply_operation('exp', None, 1000.0)
+
+    def test_absolute_value(self):
+        self.assertEqual(2.5, self.evaluator._apply_operation('abs', None, -2.5))
+
     def test_no_tokens(self):
         tokens = Queue()
         with self.assertRaises(InvalidExpressionException):
@@ -186,3 +221,107 @@ class TestRPNEvaluator(unittest.TestCase):
         tokens.enqueue('**')
         with self.assertRaises(InvalidExpressionException):
             self.evaluator.evaluate_rpn_expression(tokens)
+
+    def test_variables_are_loaded_at_evaluation(self):
+        tokens = Queue()
+        tokens.enqueue('A')
+        tokens.enqueue('n')
+        tokens.enqueue('B')
+        tokens.enqueue('*')
+        result = self.evaluator.evaluate_rpn_expression(tokens, {"A": 1.5, "B": "4"})
+        self.assertEqual(-6, result)
+
+    def test_program_can_be_evaluated_repeatedly(self):
+        program = (2.0, 'A', '**', 'B', '+')
+        self.assertEqual(5, self.evaluator.evaluate_rpn_program(program, {"A": 2, "B": 1}))
+        self.assertEqual(9.5, self.evaluator.evaluate_rpn_program(program, {"A": 3, "B": 1.5}))
+
+    def test_program_with_undefined_variable(self):
+        with self.assertRaises(InvalidExpressionException):
+            self.evaluator.evaluate_rpn_program((1.0, 'A', '+'), {"B": 1})
+
+    def test_program_with_variable_that_is_not_a_number(self):
+        for value in ("x", [1], None):
+            with self.assertRaisesRegex(InvalidExpressionException, "The value of the variable A is not a number!"):
+                self.evaluator.evaluate_rpn_program((1.0, 'A', '+'), {"A": value})
+
+    def test_analyse_program_returns_maximum_stack_depth(self):
+        self.assertEqual(1, self.evaluator.analyse_program((1.0, 'n', 'sqrt')))
+        self.assertEqual(2, self.evaluator.analyse_program((1.0, 2.0, '+', 3.0, '*')))
+        self.assertEqual(3, self.evaluator.analyse_program((1.0, 2.0, 'A', '*', '+')))
+
+    def test_analyse_program_rejects_malformed_programs(self):
+        for program, message in (((), "No tokens"), ((1.0, '+'), "two required"), (('n',), "one required"),
+                                 ((1.0, 2.0), "Too many items"), ((1.0, 'x'), "Unrecognised token")):
+            with self.assertRaises(InvalidExpressionException) as context:
+                self.evaluator.analyse_program(program)
+            self.assertIn(message, str(context.exception))
+
+    def test_analysis_happens_before_evaluation(self):
+        with self.assertRaises(InvalidExpressionException) as context:
+            self.evaluator.evaluate_rpn_program((1.0, 0.0, '/', 2.0))
+        self.assertIn("Too many items", str(context.exception))
+
+    def test_evaluate_program_of_opcodes(self):
+        program = Program.from_tokens((9.0, 'sqrt', 'A', '**', 'B', 'n', 'max', 90.0, 'sin', '/'))
+        self.assertEqual(27, self.evaluator.evaluate_program(program, {"A": 3, "B": 1}))
+        self.assertEqual(0.5, self.evaluator.evaluate_program(Program.from_tokens((1.0, 2.0, '/'))))
+
+    def test_evaluate_program_errors(self):
+        for tokens, variables in (((1.0, 0.0, '/'), None), ((1.0, 'n', 'sqrt'), None),
+                                  ((90000.0, 90000.0, '**'), None), (('A',), {"B": 1})):
+            with self.assertRaises(InvalidExpressionException):
+                self.evaluator.evaluate_program(Program.from_tokens(tokens), variables)
+
+    def test_evaluate_analysed_program(self):
+        program = (2.0, 'A', 'A', '*', '+', 'n')
+        depth = self.evaluator.analyse_program(program)
+        self.assertEqual(-11, self.evaluator.evaluate_analysed_program(program, depth, {"A": 3}))
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestRPNEvaluatorBatch(unittest.TestCase):
+    def setUp(self):
+        self.evaluator = RPNEvaluator()
+
+    def test_batch_matches_scalar_evaluation(self):
+        # sqrt(A*A)*A**2.5+sin(B/2+25.5)-cos(B)/max(A+1,0)*(-1)
+        program = ('A', 'A', '*', 'sqrt', 'A', 2.5, '**', '*', 'B', 2.0, '/', 25.5, '+', 'sin', '+',
+                   'B', 'cos', 'A', 1.0, '+', 0.0, 'max', '/', -1.0, '*', '-')
+        a_values = [3.0, 0.5, 10.0]
+        b_values = [51.0, -12.0, 90.0]
+        results, errors = self.evaluator.evaluate_rpn_batch(program, {"A": a_values, "B": b_values})
+        self.assertFalse(errors.any())
+        for a_value, b_value, result in zip(a_values, b_values, results):
+            expected = self.evaluator.evaluate_rpn_program(program, {"A": a_value, "B": b_value})
+            self.assertAlmostEqual(expected, result)
+
+    def test_batch_min_and_max(self):
+        results, _ = self.evaluator.evaluate_rpn_batch(('A', 'B', 'min', 'A', 'B', 'max', '*', 'A', '-'),
+                                                       {"A": np.array([1.0, 4.0]), "B": np.array([2.0, -3.0])})
+        self.assertEqual([1.0, -16.0], results.tolist())
+
+    def test_batch_errors_are_masked_per_row(self):
+        results, errors = self.evaluator.evaluate_rpn_batch(('A', 'B', '/', 'sqrt'),
+                                                            {"A": [4.0, 1.0, -4.0], "B": [1.0, 0.0, 1.0]})
+        self.assertEqual([False, True, True], errors.tolist())
+        self.assertEqual(2.0, results[0])
+        self.assertTrue(np.isnan(results[1:]).all())
+
+    def test_batch_overflow_and_complex_results_are_masked(self):
+        _, errors = self.evaluator.evaluate_rpn_batch(('A', 'B', '**'),
+                                                      {"A": [90000.0, -5.0, 2.0], "B": [90000.0, 0.005, 3.0]})
+        self.assertEqual([True, True, False], errors.tolist())
+
+    def test_batch_constant_program_is_broadcast(self):
+        results, errors = self.evaluator.evaluate_rpn_batch((2.0, 'A', 0.0, '*', '+'), {"A": [1.0, 2.0, 3.0]})
+        self.assertEqual([2.0, 2.0, 2.0], results.tolist())
+        self.assertFalse(errors.any())
+
+    def test_batch_with_undefined_variable(self):
+        with self.assertRaises(InvalidExpressionException):
+            self.evaluator.evaluate_rpn_batch(('A', 'B', '+'), {"A": [1.0]})
+
+    def test_batch_with_insufficient_operands(self):
+        with self.assertRaises(InvalidExpressionException):
+            self.evaluator.evaluate_rpn_batch(('A', '+'), {"A": [1.0]})
@@ -0,0 +1,55 @@
+import math
+import unittest
+from src.core.rpn_optimiser import RPNOptimiser
+from src.core.rpn_evaluator import RPNEvaluator
+from src.core.program import Program
+from src.core.exceptions import InvalidExpressionException
+
+
+class TestRPNOptimiser(unittest.TestCase):
+    def setUp(self):
+        self.optimiser = RPNOptimiser()
+
+    def test_constant_expression_is_folded(self):
+        # sqrt(9)*pi
+        result = self.optimiser.optimise((9.0, 'sqrt', math.pi, '*'))
+        self.assertEqual(result, (3 * math.pi,))
+
+    def test_constant_sub_expression_is_folded(self):
+        # A+min(2, 3)*2
+        result = self.optimiser.optimise(('A', 2.0, 3.0, 'min', 2.0, '*', '+'))
+        self.assertEqual(result, ('A', 4.0, '+'))
+
+    def test_multiplication_and_division_with_one_is_removed(self):
+        result = self.optimiser.optimise((1.0, 'A', '*', 1.0, '/', 'B', 1.0, '**', '+'))
+        self.assertEqual(result, ('A', 'B', '+'))
+
+    def test_addition_and_subtraction_of_zero_is_removed(self):
+        result = self.optimiser.optimise((0.0, 'A', 'sin', '+', 0.0, '-', 0.0, '+'))
+        self.assertEqual(result, ('A', 'sin'))
+
+    def test_double_negation_is_removed(self):
+        result = self.optimiser.optimise(('A', 'n', 'n', 'B', 'n', '+'))
+        self.assertEqual(result, ('A', 'B', 'n', '+'))
+
+    def test_division_with_zero_is_not_folded(self):
+        program = (1.0, 0.0, '/', 'A', '+')
+        result = self.optimiser.optimise(program)
+        self.assertEqual(result, program)
+        with self.assertRaises(InvalidExpressionException):
+            RPNEvaluator().evaluate_rpn_program(result, {"A": 1})
+
+    def test_complex_result_is_not_folded(self):
+        program = (-5.0, 0.005, '**')
+        self.assertEqual(self.optimiser.optimise(program), program)
+
+    def test_invalid_program_is_returned_as_it_is(self):
+        program = (1.0, 2.0, 3.0, '+')
+        self.assertEqual(self.optimiser.optimise(program), program)
+        self.assertEqual(self.optimiser.optimise((1.0, '+')), (1.0, '+'))
+
+    def test_optimise_program_returns_a_program(self):
+        program = Program.from_tokens(('A', 2.0, 3.0, '*', '+'))
+        self.assertEqual(self.optimiser.optimise_program(program).tokens(), ('A', 6.0, '+'))
+        unchanged = Program.from_tokens(('A', 'B', '+'))
+        self.assertIs(self.optimiser.optimise_program(unchanged), unchanged)
@@ -0,0 +1,49 @@
+import struct
+import unittest
+from src.core.program import Program
+from src.core.operations import OPERATIONS, register_operation
+from src.core.serialisation import serialise, deserialise, registry_checksum, MAGIC
+
+
+class TestSerialisation(unittest.TestCase):
+    def setUp(self):
+        self.program = Program.from_tokens((2.0, 'A', '**', 1.5, 'sqrt', '+', -0.25, 'max'))
+        self.data = serialise("max(2**A+sqrt(1.5), -0.25)", self.program)
+
+    def tearDown(self):
+        if "cube" in OPERATIONS:
+            OPERATIONS.unregister("cube")
+
+    def test_round_trip(self):
+        expression, program, var_to_set = deserialise(self.data)
+        self.assertEqual(expression, "max(2**A+sqrt(1.5), -0.25)")
+        self.assertEqual(program, self.program)
+        self.assertEqual(program.stack_depth, self.program.stack_depth)
+        self.assertIsNone(var_to_set)
+
+    def test_round_trip_with_variable_to_set(self):
+        program = Program.from_tokens((1.0, 2.0, '+'))
+        self.assertEqual(deserialise(serialise("B=1+2", program, "B")), ("B=1+2", program, "B"))
+
+    def test_header(self):
+        self.assertTrue(self.data.startswith(MAGIC))
+        self.assertEqual(struct.unpack_from("<I", self.data, 6)[0], registry_checksum())
+
+    def test_invalid_data_raises_value_error(self):
+        corrupted = bytearray(self.data)
+        corrupted[-6] ^= 0xFF
+        wrong_version = bytearray(self.data)
+        wrong_version[4] = 99
+
+        for data in (b"", self.data[:10], self.data[:-1], self.data + b"\x00", b"XXXX" + self.data[4:],
+                     bytes(corrupted), bytes(wrong_version)):
+            with self.assertRaises(ValueError):
+                deserialise(data)
+
+    def test_program_serialised_with_different_operations_is_rejected(self):
+        register_operation("cube", 1, lambda x: x ** 3)
+        with self.assertRaises(ValueError):
+            deserialise(self.data)
+
+        OPERATIONS.unregister("cube")
+        self.assertEqual(deserialise(self.data)[1], self.program)
@@ -0,0 +1,179 @@
+"""Tests for the evaluation server. Starts an EvaluationServer in server.py and connects to it with
+asyncio streams.
+"""
+import asyncio
+import json
+import os
+import tempfile
+from src.server import EvaluationServer, MAX_REQUEST_SIZE
+
+
+async def request(reader, writer, message):
+    writer.write((message if isinstance(message, str) else json.dumps(message)).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+def run_with_server(client, unix=False, batch_window=None, result_cache=None, hot_threshold=None):
+    async def main():
+        async with EvaluationServer(workers=2, batch_window=batch_window, result_cache=result_cache,
+                                    hot_threshold=hot_threshold) as server:
+            if unix:
+                with tempfile.TemporaryDirectory() as directory:
+                    path = os.path.join(directory, "scicalc.sock")
+                    await server.start_unix(path)
+                    result = await client(server, lambda: asyncio.open_unix_connection(path))
+                    await server.close()
+                    assert not os.path.exists(path)
+                    return result
+
+            host, port = await server.start_tcp()
+            return await client(server, lambda: asyncio.open_connection(host, port))
+
+    return asyncio.run(asyncio.wait_for(main(), 5))
+
+def test_server_evaluates_expressions_and_sets_variables():
+    async def client(_, connect):
+        reader, writer = await connect()
+        responses = [await request(reader, writer, message) for message in (
+            {"id": 1, "expression": "A = 1 + 2"},
+            {"id": "b", "expression": "A*2+sqrt(16)"},
+            {"expression": "1/0"},
+            {"command": "variables"},
+            {"command": "reset"},
+            {"expression": "A"},
+            )]
+        writer.close()
+        return responses
+
+    responses = run_with_server(client)
+
+    assert responses[0] == {"id": 1, "result": 3, "variable": "A"}
+    assert responses[1] == {"id": "b", "result": 10}
+    assert responses[2] == {"error": "Division with zero undefined!"}
+    assert responses[3] == {"variables": {"A": 3}}
+    assert responses[4] == {"variables": {}}
+    assert responses[5] == {"error": "The variable A has not been defined!"}
+
+def test_sessions_have_separate_variables():
+    async def session(connect, value):
+        reader, writer = await connect()
+        await request(reader, writer, {"expression": f"A = {value}"})
+        responses = [await request(reader, writer, {"expression": "A*10"}) for _ in range(20)]
+        writer.close()
+        return responses
+
+    async def client(server, connect):
+        results = await asyncio.gather(*(session(connect, value) for value in range(10)))
+        await asyncio.sleep(0)
+        return results, len(server.sessions)
+
+    results, _ = run_with_server(client)
+
+    for value, responses in enumerate(results):
+        assert responses == [{"result": value * 10}] * 20
+
+def test_invalid_requests_get_error_responses():
+    async def client(_, connect):
+        reader, writer = await connect()
+        responses = [await request(reader, writer, message) for message in (
+            "not json", "[1, 2]", {"expression": 5}, {"command": "quit"}, {"expression": "1+1"})]
+        responses.append(await request(reader, writer, "1" * (MAX_REQUEST_SIZE + 1)))
+        responses.append(await reader.readline())
+        return responses
+
+    responses = run_with_server(client)
+
+    assert responses[0] == {"error": "The request is not valid JSON!"}
+    assert responses[1] == {"error": "The request must be a JSON object!"}
+    assert "must contain an expression" in responses[2]["error"]
+    assert "must contain an expression" in responses[3]["error"]
+    assert responses[4] == {"result": 2}
+    assert responses[5] == {"error": "The request is too long!"}
+    assert responses[6] == b""
+
+def test_errors_fail_only_their_request():
+    async def client(server, connect):
+        evaluate = server.evaluate
+
+        async def evaluate_or_fail(expression, variables):
+            if expression == "fail":
+                raise RuntimeError("the worker process failed")
+            return await evaluate(expression, variables)
+
+        server.evaluate = evaluate_or_fail
+        reader, writer = await connect()
+        responses = [await request(reader, writer, message) for message in (
+            {"id": 1, "expression": "fail"}, {"expression": "A = 10**308*10"}, {"expression": "sqrt((-8)**0.5)"},
+            {"expression": "A = 2"}, {"command": "variables"})]
+        writer.close()
+        return responses
+
+    for batch_window in (None, 0.01):
+        assert run_with_server(client, batch_window=batch_window) == [
+            {"id": 1, "error": "Unexpected error: the worker process failed"},
+            {"error": "Maximum data limit exceeded! Please try a smaller calculation."},
+            {"error": "Complex numbers are not supported"},
+            {"result": 2, "variable": "A"}, {"variables": {"A": 2}}]
+
+def test_server_listens_on_unix_socket():
+    async def client(_, connect):
+        reader, writer = await connect()
+        response = await request(reader, writer, {"expression": "max(2, 3)**2"})
+        writer.close()
+        return response
+
+    assert run_with_server(client, unix=True) == {"result": 9}
+
+def test_server_groups_requests_for_same_expression():
+    async def session(connect, value):
+        reader, writer = await connect()
+        responses = [await request(reader, writer, message) for message in (
+            {"expression": f"A = {value}"}, {"expression": "B = A*2"}, {"expression": "A+B"})]
+        writer.close()
+        return responses
+
+    async def client(server, connect):
+        return await asyncio.gather(*(session(connect, value) for value in range(20))), server.coalescer
+
+    results, coalescer = run_with_server(client, batch_window=0.05)
+
+    for value, responses in enumerate(results):
+        assert responses == [{"result": value, "variable": "A"}, {"result": value * 2, "variable": "B"},
+                             {"result": value * 3}]
+    assert coalescer.requests == 60
+    assert coalescer.batches < 60
+
+def test_server_with_result_cache():
+    async def client(_, connect):
+        reader, writer = await connect()
+        responses = [await request(reader, writer, {"expression": expression}) for expression in (
+            "A = 3", "A*2", "B = 1", "A*2", "A = 4", "A*2", "1/(A-4)")]
+        writer.close()
+        return responses
+
+    assert run_with_server(client, result_cache=(16, "tinylfu")) == [
+        {"result": 3, "variable": "A"}, {"result": 6}, {"result": 1, "variable": "B"}, {"result": 6},
+        {"result": 4, "variable": "A"}, {"result": 8}, {"error": "Division with zero undefined!"}]
+
+def test_server_promotes_hot_expressions():
+    async def client(_, connect):
+        reader, writer = await connect()
+        responses = [await request(reader, writer, {"expression": expression}) for expression in (
+            "A = 3", "A*2", "A*2", "A = 4", "A*2", "A*2", "1/(A-4)", "1/(A-4)", "1/(A-4)")]
+        writer.close()
+        return responses
+
+    assert run_with_server(client, hot_threshold=1) == [
+        {"result": 3, "variable": "A"}, {"result": 6}, {"result": 6}, {"result": 4, "variable": "A"},
+        {"result": 8}, {"result": 8}] + [{"error": "Division with zero undefined!"}] * 3
+
+def test_close_closes_open_connections():
+    async def main():
+        server = EvaluationServer(workers=1)
+        host, port = await server.start_tcp()
+        reader, writer = await asyncio.open_connection(host, port)
+        response = await request(reader, writer, {"expression": "1+1"})
+        await server.close()
+        return response, await reader.readline(), server.sessions
+
+    assert asyncio.run(asyncio.wait_for(main(), 5)) == ({"result": 2}, b"", set())
@@ -34,3 +34,20 @@ class TestShuntingYard(unittest.TestCase):
         token_list = []
         with self.assertRaises(InvalidExpressionException):
             self.shunting_yard.convert_to_rpn(token_list)
+
+    def test_convert_to_rpn_does_not_modify_input(self):
+        token_list = ['(', 'A', '+', 2.0, ')', '*', 'sqrt', '(', 9.0, ')']
+        copy_of_tokens = list(token_list)
+        self.shunting_yard.convert_to_rpn(token_list)
+        self.assertEqual(token_list, copy_of_tokens)
+
+    def test_convert_to_rpn_program(self):
+        token_list = [2.0, '*', 'A', '-', 'max', '(', 'B', ')', '(', 1.0, ')']
+        result = self.shunting_yard.convert_to_rpn_program(token_list)
+        self.assertEqual(result, (2.0, 'A', '*', 'B', 1.0, 'max', '-'))
+
+    def test_convert_to_program(self):
+        token_list = ['(', 'A', '+', 2.0, ')', '*', 'sqrt', '(', 9.0, ')']
+        result = self.shunting_yard.convert_to_program(token_list)
+        self.assertEqual(result.tokens(), ('A', 2.0, '+', 9.0, 'sqrt', '*'))
+        self.assertEqual(result.stack_depth, 2)
@@ -0,0 +1,88 @@
+import unittest
+from src.core.superinstructions import (FusedProgram, OpcodeProfiler, PUSH_CONST, PUSH_VAR, UNARY, BINARY,
+                                        VAR_VAR_BINARY, VAR_CONST_BINARY, CONST_VAR_BINARY, VAR_BINARY,
+                                        CONST_BINARY, VAR_UNARY, CONST_UNARY)
+from src.core.program import Program
+from src.core.rpn_evaluator import RPNEvaluator
+from src.core.expression_compiler import ExpressionCompiler
+from src.core.exceptions import InvalidExpressionException
+
+
+class TestSuperinstructions(unittest.TestCase):
+    def setUp(self):
+        self.evaluator = RPNEvaluator()
+        self.compiler = ExpressionCompiler(optimise=False)
+
+    def fuse(self, tokens) -> FusedProgram:
+        return FusedProgram.from_program(Program.from_tokens(tokens), self.evaluator.opcode_operations)
+
+    def kinds(self, tokens) -> list:
+        return [instruction[0] for instruction in self.fuse(tokens).instructions]
+
+    def test_sequences_are_fused(self):
+        self.assertEqual(self.kinds(("A", "B", "*")), [VAR_VAR_BINARY])
+        self.assertEqual(self.kinds(("A", 2.0, "**")), [VAR_CONST_BINARY])
+        self.assertEqual(self.kinds((2.0, "A", "*")), [CONST_VAR_BINARY])
+        self.assertEqual(self.kinds(("A", "sin")), [VAR_UNARY])
+        self.assertEqual(self.kinds((2.0, "n")), [CONST_UNARY])
+        self.assertEqual(self.kinds(("A", "B", "*", "C", "+", 2.0, "/")), [VAR_VAR_BINARY, VAR_BINARY, CONST_BINARY])
+
+    def test_unfused_tokens_stay_plain_instructions(self):
+        self.assertEqual(self.kinds(("A",)), [PUSH_VAR])
+        self.assertEqual(self.kinds((1.0,)), [PUSH_CONST])
+        self.assertEqual(self.kinds(("A", "B", "sin", "C", "cos", "+", "*", "sqrt")),
+                         [PUSH_VAR, VAR_UNARY, VAR_UNARY, BINARY, BINARY, UNARY])
+
+    def test_operands_in_token_order(self):
+        fused = self.fuse(("B", "A", "-", 3.0, "A", "/", "+"))
+
+        self.assertEqual(fused.variable_names, ("A", "B"))
+        self.assertEqual([instruction[2:] for instruction in fused.instructions], [(1, 0), (3.0, 0), (None, None)])
+        self.assertEqual(len(fused), 3)
+        self.assertEqual(fused.stack_depth, fused.program.stack_depth)
+
+    def test_same_results_as_evaluate_program(self):
+        variables = {"A": 3, "B": -0.5, "C": 100}
+        for expression in ("A*B+C", "sqrt(A**2+B**2)*sin(C)", "0-A+2*B-C/4", "max(A,B)-min(2,C)", "1+2*3",
+                           "A**B**2", "cos(2)+A", "2*(-A)"):
+            program = self.compiler.compile(expression).program
+            self.assertEqual(self.evaluator.evaluate_fused(self.fuse(program.tokens()), variables),
+                             self.evaluator.evaluate_program(program, variables), expression)
+
+    def test_errors_are_the_same_as_in_evaluate_program(self):
+        for expression, variables in (("A/B", {"A": 1, "B": 0}), ("B+A", {"A": 1}),
+                                      ("sqrt(A)", {"A": -1}), ("10**A", {"A": 1000}), ("1/0+C", {})):
+            program = self.compiler.compile(expression).program
+            with self.assertRaises(InvalidExpressionException) as expected:
+                self.evaluator.evaluate_program(program, variables)
+            with self.assertRaises(InvalidExpressionException) as fused:
+                self.evaluator.evaluate_fused(self.fuse(program.tokens()), variables)
+            self.assertEqual(str(fused.exception), str(expected.exception), expression)
+
+    def test_compiler_fuses_interpreted_programs_only(self):
+        self.assertIsNotNone(ExpressionCompiler().compile("A*B+1").fused)
+        self.assertIsNone(ExpressionCompiler(fuse=False).compile("A*B+1").fused)
+        self.assertIsNone(ExpressionCompiler(generate_code=True).compile("A*B+1").fused)
+        self.assertEqual(ExpressionCompiler().compile("A*B+1").evaluate({"A": 2, "B": 3}), 7)
+
+    def test_profiler_counts_sequences_by_evaluations(self):
+        profiler = OpcodeProfiler()
+        compiler = ExpressionCompiler(profiler=profiler)
+        hot = compiler.compile("A*B+C")
+        for _ in range(3):
+            hot.evaluate({"A": 1, "B": 2, "C": 3})
+        compiler.compile("sin(A)*2").evaluate({"A": 0})
+
+        self.assertEqual(profiler.most_common(3, 2), [(("var", "var", "*"), 3), (("var", "*", "var"), 3)])
+        self.assertEqual(dict(profiler.most_common(2))[("*", "var")], 3)
+        self.assertEqual(profiler.most_common(3, 1, kinds=True), [(("var", "var", "binary"), 3)])
+        self.assertEqual(profiler.most_common(6), [])
+
+    def test_profiler_report(self):
+        profiler = OpcodeProfiler()
+        profiler.record(Program.from_tokens(("A", 2.0, "**")))
+        report = profiler.report()
+
+        self.assertTrue(report.startswith("1 evaluations of 1 programs\n"))
+        self.assertIn("  var const **: 1\n", report)
+        self.assertIn("Most frequent sequences of 4 opcodes:\n", report)
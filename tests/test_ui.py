@@ -123,6 +123,7 @@ def test_main_validation_error(monkeypatch, capsys):
 
     assert "Validation error" in calc_output
     assert "Unnecessary commas" in calc_output
+    assert "  min(1,2,3)\n            ^" in calc_output
     assert "Quitting the program" in calc_output
 
 def test_main_RPN_evaluation_error(monkeypatch, capsys):
@@ -137,3 +138,35 @@ def test_main_RPN_evaluation_error(monkeypatch, capsys):
     assert "Error when evaluating the RPN expression" in calc_output
     assert "Division with zero undefined!" in calc_output
     assert "Quitting the program" in calc_output
+
+def test_main_with_variable(monkeypatch, capsys):
+    """Set K=2, then evaluate '(-K)*K+1', which keeps the variable in the tokens until evaluation.
+    Result should be '-3'
+    """
+    user_input = iter(["1", "K=2", "1", "(-K)*K+1", "q"])
+    monkeypatch.setattr('builtins.input',lambda _: next(user_input))
+
+    main()
+    calc_output, _ = capsys.readouterr()
+
+    assert "['(', '(', 'n', 'K', ')', ')', '*', 'K', '+', 1.0]" in calc_output
+    assert "['K', 'n', 'K', '*', 1.0, '+']" in calc_output
+    assert "-3" in calc_output
+
+def test_main_with_formulas(monkeypatch, capsys):
+    """With formulas, set P=2 and Q=P*3, then update P=5, which also updates Q. Try to set P=Q+1, which
+    would be a circular reference, and finally list the variables with their formulas.
+    """
+    user_input = iter(["1", "P=2", "1", "Q=P*3", "1", "P=5", "y", "1", "P = Q+1", "y", "2", "q"])
+    monkeypatch.setattr('builtins.input',lambda _: next(user_input))
+
+    main(formulas=True)
+    calc_output, _ = capsys.readouterr()
+
+    assert "Variable Q = P*3 = 6 set!" in calc_output
+    assert "Variable P = 5 = 5 set!" in calc_output
+    assert "  Q = P*3 = 15 updated" in calc_output
+    assert "Variable not updated:" in calc_output
+    assert "Circular reference: P -> Q -> P" in calc_output
+    assert "  P = 5 = 5\n  Q = P*3 = 15" in calc_output
+    assert "Quitting the program" in calc_output